@@ -0,0 +1,68 @@
+from sqlalchemy import Column, String, Text, Integer, Float, Boolean, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+# ----------------------
+# Inference Result Cache
+# ----------------------
+class InferenceCacheEntry(Base):
+    """Analysis result for one exact image (by content hash) under one model version."""
+    __tablename__ = "inference_cache"
+
+    content_hash = Column(String, primary_key=True)
+    model_version = Column(String, primary_key=True)
+    category = Column(String, nullable=False)
+    severity = Column(String, nullable=False)
+    annotated_path = Column(String, nullable=True)
+    details = Column(Text, nullable=True)  # JSON, extra model output
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("idx_inference_cache_version", "model_version"),
+    )
+
+    def __repr__(self):
+        return f"<InferenceCacheEntry(content_hash={self.content_hash[:12]}, model_version={self.model_version}, category={self.category})>"
+
+# ----------------------
+# Detector Output
+# ----------------------
+class ImageDetection(Base):
+    """Pothole boxes found in one uploaded image; the overlay is rendered on demand from these."""
+    __tablename__ = "image_detections"
+
+    filename = Column(String, primary_key=True)  # name under static/uploads
+    severity = Column(String, nullable=False)
+    image_width = Column(Integer, nullable=False)  # size of the image the boxes refer to
+    image_height = Column(Integer, nullable=False)
+    boxes = Column(Text, nullable=False)  # JSON list of {"box", "confidence", "severity"}
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<ImageDetection(filename={self.filename}, severity={self.severity})>"
+
+# ----------------------
+# Shadow Evaluation
+# ----------------------
+class ShadowResult(Base):
+    """One sampled upload classified by both the serving model and a candidate."""
+    __tablename__ = "shadow_results"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    candidate_version = Column(String, nullable=False)
+    primary_version = Column(String, nullable=False)
+    primary_label = Column(String, nullable=False)
+    candidate_label = Column(String, nullable=False)
+    agree = Column(Boolean, nullable=False)
+    primary_confidence = Column(Float, nullable=True)
+    candidate_confidence = Column(Float, nullable=True)
+    primary_ms = Column(Float, nullable=True)  # includes micro-batching wait
+    candidate_ms = Column(Float, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("idx_shadow_results_candidate", "candidate_version"),
+    )
+
+    def __repr__(self):
+        return f"<ShadowResult(candidate={self.candidate_version}, {self.primary_label} vs {self.candidate_label})>"
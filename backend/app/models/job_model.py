@@ -0,0 +1,41 @@
+import uuid
+import enum
+from sqlalchemy import Column, String, Float, Integer, Text, Enum, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+# ----------------------
+# Enums
+# ----------------------
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+# ----------------------
+# Analysis Job Model
+# ----------------------
+class AnalysisJob(Base):
+    """An upload waiting for (or done with) asynchronous analysis."""
+    __tablename__ = "analysis_jobs"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    filename = Column(String, nullable=False)  # stored under static/uploads
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    worker = Column(String, nullable=True)  # "host:pid" of the worker that claimed it
+    result = Column(Text, nullable=True)  # JSON, the /analyze response body
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("idx_analysis_jobs_status_created", "status", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<AnalysisJob(id={self.id}, status={self.status}, attempts={self.attempts})>"
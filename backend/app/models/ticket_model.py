@@ -47,6 +47,7 @@ class Ticket(Base):
     severity = Column(Enum(SeverityLevel), nullable=False, default=SeverityLevel.NA)
     description = Column(String, default="")
     address = Column(String, nullable=True)
+    image_phash = Column(String, nullable=True)  # 64-bit perceptual hash (hex), for duplicate detection
     status = Column(Enum(TicketStatus), nullable=False, default=TicketStatus.NEW)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
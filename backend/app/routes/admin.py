@@ -0,0 +1,84 @@
+# app/routes/admin.py
+import os
+import hmac
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services import model_registry, shadow
+from app.services.global_ai import get_ai_service, get_reload_status, reload_ai_service
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Shared secret for /admin endpoints; when unset they only accept loopback clients
+ADMIN_TOKEN = os.environ.get("FIXMATE_ADMIN_TOKEN")
+LOOPBACK_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+def require_admin(request: Request, x_admin_token: Optional[str] = Header(None)) -> None:
+    if ADMIN_TOKEN:
+        if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+            raise HTTPException(status_code=401, detail="Invalid admin token")
+    elif not request.client or request.client.host not in LOOPBACK_HOSTS:
+        raise HTTPException(status_code=403, detail="Admin endpoints are local-only unless FIXMATE_ADMIN_TOKEN is set")
+
+class ActivateModelRequest(BaseModel):
+    version: Optional[str] = None  # None switches back to the default model files
+
+# ----------------------
+# GET /admin/models - Registry versions and what this worker serves
+# ----------------------
+@router.get("/admin/models", dependencies=[Depends(require_admin)])
+def list_models():
+    ai_service = get_ai_service()
+    return {
+        "registry": model_registry.REGISTRY_DIR,
+        "active": model_registry.active_version(),
+        "versions": model_registry.list_versions(),
+        "serving": ai_service.model_version,
+        "reload": get_reload_status(),
+    }
+
+# ----------------------
+# POST /admin/models/activate - Hot swap to another registry version
+# ----------------------
+@router.post("/admin/models/activate", status_code=202, dependencies=[Depends(require_admin)])
+def activate_model(payload: ActivateModelRequest):
+    """
+    Marks a version as active and starts loading it in the background; this
+    worker swaps it in once it is warmed up, and other workers follow via
+    the registry watcher. Poll GET /admin/models for progress.
+    """
+    try:
+        # Start the reload first: it rejects unknown versions, process mode and
+        # concurrent reloads, and ACTIVE (which every other worker follows) is
+        # only written once this worker has accepted the version
+        started = reload_ai_service(payload.version)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not started:
+        raise HTTPException(status_code=409, detail="A model reload is already in progress")
+    model_registry.set_active_version(payload.version)
+    logger.info(f"Model version '{payload.version or 'default'}' activation requested")
+    return {"target": payload.version, "reload": get_reload_status()}
+
+# ----------------------
+# GET /admin/shadow - Candidate vs. serving model on sampled traffic
+# ----------------------
+@router.get("/admin/shadow", dependencies=[Depends(require_admin)])
+def shadow_summary(
+    candidate: Optional[str] = Query(None, description="Only this candidate model_version"),
+    db: Session = Depends(get_db)
+):
+    evaluator = getattr(get_ai_service(), "shadow", None)
+    return {
+        "running": evaluator.candidate_version if evaluator else None,
+        "sample_rate": evaluator.sample_rate if evaluator else None,
+        "candidates": shadow.summarize(db, candidate),
+    }
@@ -0,0 +1,115 @@
+# app/routes/jobs.py
+import json
+import asyncio
+import logging
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.database import get_db, SessionLocal
+from app.services.job_service import FINISHED_STATUSES, create_job, get_job, job_to_dict
+from app.routes.report import ALLOWED_EXTENSIONS, ALLOWED_CONTENT_TYPES
+from app.utils import make_image_url
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Seconds between status checks on an SSE stream, and between keep-alive comments
+EVENTS_POLL_SECONDS = 0.5
+EVENTS_KEEPALIVE_SECONDS = 15
+
+# ----------------------
+# POST /analyze/jobs - Queue an image for analysis, return immediately
+# ----------------------
+@router.post("/analyze/jobs", status_code=202)
+async def submit_analysis_job(
+    image: UploadFile = File(...),
+    latitude: Optional[float] = Form(None),
+    longitude: Optional[float] = Form(None),
+    db: Session = Depends(get_db),
+    request: Request = None
+):
+    """
+    Asynchronous variant of /analyze: stores the upload, records a job and
+    returns its id. Poll GET /jobs/{job_id} or subscribe to
+    GET /jobs/{job_id}/events for the result, which has the /analyze shape.
+    """
+    file_ext = Path(image.filename).suffix.lower()
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Only image files are allowed")
+    if image.content_type not in ALLOWED_CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid file type")
+
+    content = await image.read()
+    try:
+        job = await asyncio.to_thread(create_job, db, content, file_ext, latitude, longitude)
+    except Exception:
+        logger.exception("Failed to queue analysis job")
+        raise HTTPException(status_code=500, detail="Failed to queue analysis job")
+
+    base = str(request.base_url).rstrip("/")
+    return {
+        **job_to_dict(job),
+        "status_url": f"{base}/api/jobs/{job.id}",
+        "events_url": f"{base}/api/jobs/{job.id}/events",
+    }
+
+# ----------------------
+# GET /jobs/{job_id} - Poll a job
+# ----------------------
+@router.get("/jobs/{job_id}")
+def get_analysis_job(job_id: str, request: Request, db: Session = Depends(get_db)):
+    job = get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job_to_dict(job, lambda path: make_image_url(path, request))
+
+# ----------------------
+# GET /jobs/{job_id}/events - Server-Sent Events until the job finishes
+# ----------------------
+@router.get("/jobs/{job_id}/events")
+async def stream_analysis_job(job_id: str, request: Request):
+    """
+    Emits a `status` event on every status change and a final `result`
+    event (the same body as GET /jobs/{job_id}) when the job is done or
+    failed. Works from any worker, since state is read from the database.
+    """
+    def load() -> Optional[dict]:
+        db = SessionLocal()
+        try:
+            job = get_job(db, job_id)
+            return job_to_dict(job, lambda path: make_image_url(path, request)) if job else None
+        finally:
+            db.close()
+
+    if await asyncio.to_thread(load) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    async def events():
+        last_status = None
+        idle = 0.0
+        while True:
+            data = await asyncio.to_thread(load)
+            if data is None:
+                yield f"event: error\ndata: {json.dumps({'detail': 'Job was deleted'})}\n\n"
+                return
+            if data["status"] in {s.value for s in FINISHED_STATUSES}:
+                yield f"event: result\ndata: {json.dumps(data)}\n\n"
+                return
+            if data["status"] != last_status:
+                last_status = data["status"]
+                idle = 0.0
+                yield f"event: status\ndata: {json.dumps(data)}\n\n"
+            elif idle >= EVENTS_KEEPALIVE_SECONDS:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(EVENTS_POLL_SECONDS)
+            idle += EVENTS_POLL_SECONDS
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,14 @@
+# app/routes/metrics.py
+from fastapi import APIRouter
+from typing import Dict, Any
+from app.services import metrics
+
+router = APIRouter()
+
+# ----------------------
+# GET /metrics
+# ----------------------
+@router.get("/metrics", response_model=Dict[str, Any])
+def get_metrics():
+    """Returns this worker's in-process counters (cache hits/misses, etc.) and per-stage latency histograms."""
+    return metrics.snapshot()
@@ -1,14 +1,18 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from pathlib import Path
-import logging, uuid
+import asyncio, json, logging, os, time, uuid, zipfile, zlib
 
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.services.ticket_service import TicketService, SeverityLevel
 from app.models.ticket_model import User
-from app.services.global_ai import get_ai_service
+from app.services import metrics
+from app.services.inference_executor import get_inference_executor, InferenceQueueFull
+from app.services.analysis_service import analyze_content
+from app.services.dedup import DEDUP_ENABLED, perceptual_hash
+from app.services.image_io import INGEST_MAX_SIDE, load_image
 from app.utils import make_image_url, normalize_image_path_for_url
 
 router = APIRouter()
@@ -18,76 +22,186 @@ logger.setLevel(logging.DEBUG)
 UPLOAD_DIR = Path("static") / "uploads"
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+def _queue_full_error(retry_after: int) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Analysis queue is full, please retry shortly",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
+ALLOWED_CONTENT_TYPES = {
+    'image/jpeg', 'image/png', 'image/gif', 'image/bmp', 'image/webp',
+    'application/octet-stream'
+}
+
+# Limits for /analyze/batch: images per request (zip members included), the
+# uncompressed size of a single image taken from an archive, and the total
+# size of all images in the request (they are held in memory until analyzed)
+BATCH_MAX_IMAGES = int(os.environ.get("FIXMATE_BATCH_MAX_IMAGES", "100"))
+BATCH_MAX_IMAGE_BYTES = int(float(os.environ.get("FIXMATE_BATCH_MAX_IMAGE_MB", "25")) * 1024 * 1024)
+BATCH_MAX_TOTAL_BYTES = int(float(os.environ.get("FIXMATE_BATCH_MAX_TOTAL_MB", "256")) * 1024 * 1024)
+
 # ----------------------
 # API 1: Analyze image (no DB write)
 # ----------------------
 @router.post("/analyze")
 async def analyze_image(
     image: UploadFile = File(...),
+    latitude: Optional[float] = Form(None),
+    longitude: Optional[float] = Form(None),
+    db: Session = Depends(get_db),
     request: Request = None
 ):
     logger.debug("Received analyze request")
 
     # Validate file extension and type
-    allowed_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
-    allowed_content_types = {
-        'image/jpeg', 'image/png', 'image/gif', 'image/bmp', 'image/webp',
-        'application/octet-stream'
-    }
-
     file_ext = Path(image.filename).suffix.lower()
-    if file_ext not in allowed_extensions:
+    if file_ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(status_code=400, detail="Only image files are allowed")
-    if image.content_type not in allowed_content_types:
+    if image.content_type not in ALLOWED_CONTENT_TYPES:
         raise HTTPException(status_code=400, detail="Invalid file type")
 
-    # Save file
-    filename = f"{uuid.uuid4()}{file_ext}"
-    file_path_obj = UPLOAD_DIR / filename
+    # Fail fast before touching the disk if we are already shedding load
+    executor = get_inference_executor()
+    if executor.is_saturated():
+        raise _queue_full_error(executor.retry_after)
+
+    start = time.perf_counter()
+    content = await image.read()
+    metrics.record_stage("read", (time.perf_counter() - start) * 1000)
     try:
-        content = await image.read()
-        file_path_obj.write_bytes(content)
-        logger.debug(f"Saved image for analysis: {file_path_obj}")
-    except Exception:
-        logger.exception("Failed to save image for analysis")
+        response = await analyze_content(content, f"{uuid.uuid4()}{file_ext}", latitude, longitude, db, request)
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e.retry_after)
+    except OSError:
         raise HTTPException(status_code=500, detail="Failed to save uploaded image")
+    logger.debug(f"Analyze response: {response}")
+    return JSONResponse(status_code=200, content=response)
 
-    # Run AI
-    ai_service = get_ai_service()
-    try:
-        category = ai_service.classify_category(str(file_path_obj))
-        logger.debug(f"Classification result: {category}")
-
-        severity = SeverityLevel.NA
-        annotated_path = None
-        if category.lower() == "pothole":
-            severity_str, annotated_path = ai_service.detect_pothole_severity(str(file_path_obj))
-            severity = {
-                "High": SeverityLevel.HIGH,
-                "Medium": SeverityLevel.MEDIUM,
-                "Low": SeverityLevel.LOW,
-                "Unknown": SeverityLevel.NA
-            }.get(severity_str, SeverityLevel.NA)
-            logger.debug(f"Severity detection: {severity_str}")
-    except Exception:
-        logger.exception("AI analysis failed")
-        category = "Unknown"
-        severity = SeverityLevel.NA
+# ----------------------
+# API 1b: Analyze many images, streaming NDJSON
+# ----------------------
+def _too_many_images() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"At most {BATCH_MAX_IMAGES} images per batch")
 
-    rel_path = normalize_image_path_for_url(file_path_obj.as_posix())
-    image_url = make_image_url(rel_path, request)
+def _too_large_batch() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Images in one batch may total at most "
+                                                 f"{BATCH_MAX_TOTAL_BYTES // (1024 * 1024)} MB")
 
-    response = {
-        "temp_id": str(uuid.uuid4()),
-        "filename": filename,
-        "image_path": rel_path,
-        "image_url": image_url,
-        "category": category,
-        "severity": severity.value
-    }
-    logger.debug(f"Analyze response: {response}")
-    return JSONResponse(status_code=200, content=response)
+def _expand_archive(fileobj, archive_name: str, max_images: int, max_bytes: int) -> List[Tuple[str, str, bytes]]:
+    """
+    Returns (source name, extension, bytes) for every image inside a zip
+    archive. The limits are checked against each member's header before
+    it is decompressed. Members that cannot be read (encrypted, an
+    unsupported compression method, corrupt data) reject the request.
+    """
+    entries = []
+    total = 0
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            ext = Path(name).suffix.lower()
+            if info.is_dir() or ext not in ALLOWED_EXTENSIONS or Path(name).name.startswith("."):
+                continue
+            if len(entries) >= max_images:
+                raise _too_many_images()
+            if info.file_size > BATCH_MAX_IMAGE_BYTES:
+                raise HTTPException(status_code=400, detail=f"{archive_name}/{name} is too large")
+            total += info.file_size
+            if total > max_bytes:
+                raise _too_large_batch()
+            try:
+                content = archive.read(info)
+            except (RuntimeError, NotImplementedError, zlib.error, zipfile.BadZipFile):
+                raise HTTPException(status_code=400, detail=f"{archive_name}/{name} could not be extracted")
+            entries.append((f"{archive_name}/{name}", ext, content))
+    return entries
+
+@router.post("/analyze/batch")
+async def analyze_batch(
+    images: List[UploadFile] = File(..., description="Image files and/or zip archives of images"),
+    latitude: Optional[float] = Form(None),
+    longitude: Optional[float] = Form(None),
+    request: Request = None
+):
+    """
+    Analyzes many photos in one request. Zip archives are expanded. Images
+    are analyzed concurrently, so their classifier and detector calls are
+    coalesced into batched forward passes, and one NDJSON line is streamed
+    per image as soon as its result is ready (completion order, not upload
+    order). Each line has the /analyze response shape plus "index" and
+    "source"; a failed image yields a line with "error" instead.
+    """
+    logger.debug(f"Received batch analyze request with {len(images)} part(s)")
 
+    # Limits are checked before each body is read or decompressed; uploads
+    # themselves are spooled to disk by the multipart parser
+    items: List[Tuple[str, str, bytes]] = []
+    total_bytes = 0
+    for upload in images:
+        name = upload.filename or "upload"
+        ext = Path(name).suffix.lower()
+        if ext == ".zip":
+            try:
+                members = await asyncio.to_thread(
+                    _expand_archive, upload.file, name,
+                    BATCH_MAX_IMAGES - len(items), BATCH_MAX_TOTAL_BYTES - total_bytes,
+                )
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail=f"{name} is not a valid zip archive")
+            items += members
+            total_bytes += sum(len(content) for _, _, content in members)
+        elif ext in ALLOWED_EXTENSIONS and upload.content_type in ALLOWED_CONTENT_TYPES:
+            if len(items) >= BATCH_MAX_IMAGES:
+                raise _too_many_images()
+            if upload.size is not None and total_bytes + upload.size > BATCH_MAX_TOTAL_BYTES:
+                raise _too_large_batch()
+            content = await upload.read()
+            total_bytes += len(content)
+            if total_bytes > BATCH_MAX_TOTAL_BYTES:
+                raise _too_large_batch()
+            items.append((name, ext, content))
+        else:
+            raise HTTPException(status_code=400, detail=f"{name}: only image files and zip archives are allowed")
+    if not items:
+        raise HTTPException(status_code=400, detail="No images found in request")
+
+    executor = get_inference_executor()
+    if executor.is_saturated():
+        raise _queue_full_error(executor.retry_after)
+    # Keep enough images in flight to fill a batch without starving other clients
+    window = asyncio.Semaphore(executor.max_concurrency)
+
+    async def analyze_one(index: int, source: str, ext: str, content: bytes) -> dict:
+        async with window:
+            # One session per image: a get_db session would already be closed
+            # when the streamed body runs, and the concurrent analyses must
+            # not share one session.
+            db = SessionLocal()
+            try:
+                response = await analyze_content(content, f"{uuid.uuid4()}{ext}", latitude, longitude, db, request)
+            except InferenceQueueFull as e:
+                return {"index": index, "source": source, "error": "Analysis queue is full",
+                        "retry_after": e.retry_after}
+            except Exception as e:
+                logger.exception(f"Batch analysis failed for {source}")
+                detail = "Failed to save uploaded image" if isinstance(e, OSError) else "Analysis failed"
+                return {"index": index, "source": source, "error": detail}
+            finally:
+                db.close()
+        return {"index": index, "source": source, **response}
+
+    async def stream():
+        tasks = [asyncio.create_task(analyze_one(i, *item)) for i, item in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 # ----------------------
 # API 2: Submit report (with analyzed file + DB write)
@@ -129,6 +243,14 @@ async def report_issue(
         logger.error(f"Analyzed file not found: {analyzed_file}")
         raise HTTPException(status_code=400, detail="Analyzed file not found")
 
+    # Perceptual hash of the stored photo, used to spot later duplicate reports
+    image_phash = None
+    if DEDUP_ENABLED:
+        try:
+            image_phash = await asyncio.to_thread(lambda: perceptual_hash(load_image(str(file_path_obj), INGEST_MAX_SIDE)))
+        except Exception:
+            logger.exception("Failed to hash analyzed image")
+
     # Save ticket
     severity_enum = SeverityLevel.__members__.get(severity.upper(), SeverityLevel.NA)
     try:
@@ -140,7 +262,8 @@ async def report_issue(
             latitude=latitude,
             longitude=longitude,
             description=description,
-            address=address
+            address=address,
+            image_phash=image_phash
         )
         logger.info(f"Ticket created: {ticket.id} for user {user.id}")
     except Exception:
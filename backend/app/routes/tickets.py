@@ -1,12 +1,15 @@
 # app/routes/tickets.py
 from typing import Optional, List
 import logging
+from pathlib import Path
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.services.ticket_service import TicketService, TicketStatus, SeverityLevel
 from pydantic import BaseModel
-from app.utils import ticket_to_dict
+from app.utils import ticket_to_dict, normalize_image_path_for_url
+from app.services.annotation_service import FORMATS, get_detections, render_annotated
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -49,6 +52,40 @@ def get_ticket(ticket_id: str, request: Request, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail=f"Ticket {ticket_id} not found")
     return ticket_to_dict(ticket, request)
 
+# ----------------------
+# GET /tickets/{ticket_id}/annotated - Photo with detected boxes drawn on it
+# ----------------------
+@router.get("/tickets/{ticket_id}/annotated")
+def get_annotated_image(
+    ticket_id: str,
+    format: str = Query("jpeg", pattern="^(jpeg|webp)$", description="Output format"),
+    db: Session = Depends(get_db)
+):
+    """
+    Renders the pothole overlay lazily from the stored detector boxes and
+    caches the result on disk. Tickets without detections get their
+    original photo.
+    """
+    service = TicketService(db)
+    ticket = service.get_ticket(ticket_id)
+    if not ticket:
+        raise HTTPException(status_code=404, detail=f"Ticket {ticket_id} not found")
+
+    rel = normalize_image_path_for_url(ticket.image_path)
+    source = Path(rel) if rel else None
+    if source is None or not source.exists():
+        raise HTTPException(status_code=404, detail="Ticket image not found")
+
+    detection = get_detections(db, source.name)
+    if detection is None:
+        return FileResponse(source)
+    try:
+        rendered = render_annotated(source, detection, format)
+    except Exception as e:
+        logger.error(f"Failed to render annotated image for ticket {ticket_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to render annotated image")
+    return FileResponse(rendered, media_type=FORMATS[format][1])
+
 # ----------------------
 # PATCH /tickets/{ticket_id}/status - Update status
 # ----------------------
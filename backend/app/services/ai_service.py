@@ -1,61 +1,255 @@
 import os
+import time
+import hashlib
 import logging
-from typing import Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+import numpy as np
 import torch
-from torchvision import transforms, models
+from torchvision import transforms
+from torchvision.ops import nms
 from PIL import Image
 import cv2
-from ultralytics import YOLO
 import json
+from app.services.batching import MicroBatcher
+from app.services.image_io import load_image
+from app.services import engines, metrics, model_registry, slicing
+from app.services.thread_budget import ThreadBudget, apply_thread_budget
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Micro-batching of classifier and detector requests (FIXMATE_BATCH_MAX_SIZE=1 disables it)
+BATCH_MAX_SIZE = int(os.environ.get("FIXMATE_BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("FIXMATE_BATCH_MAX_WAIT_MS", "5"))
+
+# Number of ranked labels returned with each prediction
+CLASSIFIER_TOP_K = int(os.environ.get("FIXMATE_CLASSIFIER_TOP_K", "3"))
+# Softmax temperature; a best_model.calibration.json written by
+# scripts/calibrate_classifier.py takes precedence over this value
+CLASSIFIER_TEMPERATURE = float(os.environ.get("FIXMATE_CLASSIFIER_TEMPERATURE", "1.0"))
+
+# Warmup on synthetic inputs after loading, so the first real request does
+# not pay for lazy kernel initialisation
+WARMUP_ENABLED = os.environ.get("FIXMATE_WARMUP", "1") == "1"
+WARMUP_BATCH_SIZES = [int(n) for n in os.environ.get("FIXMATE_WARMUP_BATCH_SIZES", "1,4,8").split(",") if n.strip()]
+WARMUP_DETECTOR_SIZE = (640, 640)
+
+# When to load the YOLO detector:
+#   eager      - at startup, alongside the classifier (default)
+#   lazy       - on the first pothole
+#   background - in a background thread after the classifier is up
+#   disabled   - never; for API-only replicas serving list/analytics traffic
+DETECTOR_LOAD_MODES = ("eager", "lazy", "background", "disabled")
+DETECTOR_LOAD_MODE = os.environ.get("FIXMATE_DETECTOR_LOAD", "eager").lower()
+
+
+SEVERITY_TIERS = ("Low", "Medium", "High")
+# BGR colors used when drawing boxes
+SEVERITY_COLORS = {"Low": (0, 255, 0), "Medium": (0, 255, 255), "High": (0, 0, 255)}
+
+
+class DetectorDisabledError(RuntimeError):
+    """Raised when detection is requested on a node started with FIXMATE_DETECTOR_LOAD=disabled."""
+
 # ----------------------
 # AI Model Manager
 # ----------------------
 class AIModelManager:
     """Loads and keeps classification and detection models in memory."""
-    def __init__(self, device: str = None):
+    def __init__(self, device: str = None, engine: str = None, detector_engine: str = None,
+                 detector_load: str = None, registry_version: str = None, thread_budget: ThreadBudget = None):
+        # Size torch/OpenCV thread pools before any model runs (no-op if already done in this process)
+        self.thread_budget = apply_thread_budget(thread_budget)
         self.device = torch.device(device or ("cuda" if torch.cuda.is_available() else "cpu"))
+        self.engine = (engine or engines.INFERENCE_ENGINE).lower()
+        self.detector_engine = (detector_engine or engine or engines.DETECTOR_ENGINE).lower()
+        if self.detector_engine == "int8":
+            self.detector_engine = "torch"  # only the classifier is quantized
+        self.detector_load = (detector_load or DETECTOR_LOAD_MODE).lower()
+        if self.detector_load not in DETECTOR_LOAD_MODES:
+            logger.warning(f"Unknown detector load mode '{self.detector_load}', using 'eager'.")
+            self.detector_load = "eager"
 
-        # Compute relative paths
-        BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self.class_model_path = os.path.join(BASE_DIR, "models", "classification", "best_model.pth")
-        self.class_mapping_path = os.path.join(BASE_DIR, "models", "classification", "class_mapping.json")
-        self.detection_model_path = os.path.join(BASE_DIR, "models", "detection", "best_severity_check.pt")
+        # Model files of the requested registry version (None = the default files)
+        self.registry_version = registry_version
+        files = model_registry.resolve_files(registry_version)
+        self.class_model_path = files["classifier"]
+        self.class_mapping_path = files["class_mapping"]
+        self.detection_model_path = files["detector"]
 
+        # Preprocess for classification
+        self.preprocess = transforms.Compose([
+            transforms.Resize(engines.CLASSIFIER_INPUT_SIZE),
+            transforms.ToTensor()
+        ])
 
         # Initialize models
         self.class_model = None
         self.class_names = None
-        self._load_classification_model()
-        self.detection_model = None
-        self._load_detection_model()
+        self._detection_model = None
+        self._detector_lock = threading.Lock()
+        self.execution_options = None
+        self.load_timings = {}
+        self.warmup_timings = {}
+        self._load_models()
+        self.model_version = self._compute_model_version()
 
-        # Preprocess for classification
-        self.preprocess = transforms.Compose([
-            transforms.Resize((224, 224)),
-            transforms.ToTensor()
-        ])
+    def _timed_load(self, name: str, loader: Callable[[], None]) -> None:
+        start = time.perf_counter()
+        loader()
+        self.load_timings[name] = round(time.perf_counter() - start, 3)
+
+    def _load_models(self):
+        # Both loads spend most of their time in file I/O and native code, so they overlap well
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="model-load") as pool:
+            futures = [pool.submit(self._timed_load, "classifier", self._load_classification_model)]
+            if self.detector_load == "eager":
+                futures.append(pool.submit(self._ensure_detection_model))
+            for future in futures:
+                future.result()
+        self.load_timings["total"] = round(time.perf_counter() - start, 3)
+        logger.info(f"Models loaded in {self.load_timings['total']}s ({self.load_timings}, "
+                    f"detector: {self.detector_load}).")
+
+        if self.detector_load == "background":
+            threading.Thread(target=self._background_detector_load, name="detector-load", daemon=True).start()
+
+    # ----------------------
+    # Detector (eager, lazy, background or disabled)
+    # ----------------------
+    @property
+    def detection_model(self):
+        model = self._detection_model
+        if model is None:
+            model = self._ensure_detection_model()
+        return model
+
+    @property
+    def detector_state(self) -> str:
+        if self.detector_load == "disabled":
+            return "disabled"
+        if self._detection_model is not None:
+            return "loaded"
+        return "loading" if self._detector_lock.locked() else "not_loaded"
+
+    def _ensure_detection_model(self):
+        if self.detector_load == "disabled":
+            raise DetectorDisabledError("Pothole detector is disabled on this node (FIXMATE_DETECTOR_LOAD=disabled)")
+        with self._detector_lock:
+            if self._detection_model is None:
+                self._timed_load("detector", self._load_detection_model)
+        return self._detection_model
+
+    def _background_detector_load(self):
+        try:
+            self._ensure_detection_model()
+            if WARMUP_ENABLED:
+                self.warmup_timings["detector"] = self._warmup_detector(WARMUP_BATCH_SIZES)
+        except Exception:
+            logger.exception("Background detector load failed; it will be retried on the first pothole.")
+
+    # ----------------------
+    # Warmup
+    # ----------------------
+    def warmup(self, batch_sizes: List[int] = None) -> dict:
+        """Runs the loaded models on synthetic inputs at several batch sizes; returns timings in ms."""
+        batch_sizes = batch_sizes or WARMUP_BATCH_SIZES
+        timings = {"classifier": self._warmup_classifier(batch_sizes)}
+        # Lazy/background detectors are warmed up when they load, not here
+        if self.detector_load == "eager":
+            timings["detector"] = self._warmup_detector(batch_sizes)
+        self.warmup_timings.update(timings)
+        logger.info(f"Warmup finished: {timings}")
+        return timings
+
+    def _warmup_classifier(self, batch_sizes: List[int]) -> dict:
+        timings = {}
+        for n in batch_sizes:
+            batch = torch.rand(n, 3, *engines.CLASSIFIER_INPUT_SIZE, device=self.device)
+            start = time.perf_counter()
+            with torch.no_grad():
+                self.class_model(batch)
+            timings[str(n)] = round((time.perf_counter() - start) * 1000, 1)
+        return timings
+
+    def _warmup_detector(self, batch_sizes: List[int]) -> dict:
+        timings = {}
+        rng = np.random.default_rng(0)
+        for n in batch_sizes:
+            images = [rng.integers(0, 256, size=(*WARMUP_DETECTOR_SIZE, 3), dtype=np.uint8) for _ in range(n)]
+            start = time.perf_counter()
+            self.detection_model(images, verbose=False)
+            timings[str(n)] = round((time.perf_counter() - start) * 1000, 1)
+        return timings
+
+    def status(self) -> dict:
+        return {
+            "model_version": self.model_version,
+            "registry_version": self.registry_version,
+            "engine": self.engine,
+            "detector_engine": self.detector_engine,
+            "detector_load": self.detector_load,
+            "detector_state": self.detector_state,
+            "device": str(self.device),
+            "execution_options": self.execution_options,
+            "thread_budget": self.thread_budget.to_dict(),
+            "load_seconds": self.load_timings,
+            "warmup_ms": self.warmup_timings,
+        }
+
+    def _compute_model_version(self) -> str:
+        """
+        Identifies the loaded weights + engines; changes whenever either model
+        file or the classifier's calibration file changes.
+        """
+        digest = hashlib.sha256()
+        calibration = engines.calibration_path(self.class_model_path)
+        for path in (self.class_model_path, self.detection_model_path, calibration):
+            # The detector and calibration files may legitimately be absent
+            if os.path.exists(path):
+                digest.update(engines.file_sha256(path).encode())
+        version = f"{self.engine}+{self.detector_engine}-{digest.hexdigest()[:12]}"
+        return f"{self.registry_version}/{version}" if self.registry_version else version
 
     def _load_classification_model(self):
-        logger.info("Loading classification model...")
+        self.engine = engines.resolve_classifier_engine(self.engine, self.class_model_path)
+        logger.info(f"Loading classification model ({self.engine})...")
         with open(self.class_mapping_path, "r") as f:
             class_mapping = json.load(f)
         self.class_names = [class_mapping[str(i)] for i in range(len(class_mapping))]
 
-        self.class_model = models.resnet18(weights=None)
-        self.class_model.fc = torch.nn.Linear(self.class_model.fc.in_features, len(self.class_names))
-        state_dict = torch.load(self.class_model_path, map_location=self.device)
-        self.class_model.load_state_dict(state_dict)
-        self.class_model.to(self.device)
-        self.class_model.eval()
+        self.class_model = engines.load_classifier(self.engine, self.class_model_path, len(self.class_names), self.device)
+        if self.engine == "int8":
+            self.device = torch.device("cpu")
+        if self.engine == "torch":
+            # Opt-in bf16 / channels_last / torch.compile, checked against fp32 here
+            self.class_model, self.execution_options = engines.optimize_classifier(self.class_model, self.device)
+        self.temperature = self._load_temperature()
         logger.info("Classification model loaded successfully.")
 
+    def _load_temperature(self) -> float:
+        calibration_path = engines.calibration_path(self.class_model_path)
+        try:
+            with open(calibration_path, "r") as f:
+                temperature = float(json.load(f)["temperature"])
+            logger.info(f"Using calibrated softmax temperature {temperature:.3f}.")
+            return temperature
+        except FileNotFoundError:
+            return CLASSIFIER_TEMPERATURE
+        except (OSError, ValueError, KeyError):
+            logger.warning(f"Ignoring unreadable calibration file '{calibration_path}'.")
+            return CLASSIFIER_TEMPERATURE
+
     def _load_detection_model(self):
-        logger.info("Loading YOLO detection model...")
-        self.detection_model = YOLO(self.detection_model_path)
+        self.detector_engine = engines.resolve_engine(
+            self.detector_engine, engines.detector_artifact_path(self.detection_model_path, self.detector_engine), "Detector")
+        logger.info(f"Loading YOLO detection model ({self.detector_engine})...")
+        self._detection_model = engines.load_detector(self.detector_engine, self.detection_model_path)
+        # Importing ultralytics resets OpenCV to its own thread count
+        cv2.setNumThreads(self.thread_budget.cv2_threads)
         logger.info("YOLO detection model loaded successfully.")
 
 
@@ -64,19 +258,93 @@ class AIModelManager:
 # ----------------------
 class AIService:
     """Handles classification and detection using preloaded models."""
-    def __init__(self, model_manager: AIModelManager):
+    def __init__(self, model_manager: AIModelManager, batch_max_size: int = None, batch_max_wait_ms: float = None,
+                 shadow=None):
         self.models = model_manager
+        # Optional ShadowEvaluator comparing a candidate classifier on sampled traffic
+        self.shadow = shadow
+        # Concurrent classify_category calls are coalesced into one forward pass
+        self.classifier_batcher = MicroBatcher(
+            self._classify_batch,
+            max_batch_size=batch_max_size or BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS if batch_max_wait_ms is None else batch_max_wait_ms,
+            name="classifier-batcher",
+        )
+        # ...and so are concurrent detect_boxes calls, into one YOLO call
+        self.detector_batcher = MicroBatcher(
+            self._detect_batch,
+            max_batch_size=batch_max_size or BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS if batch_max_wait_ms is None else batch_max_wait_ms,
+            name="detector-batcher",
+        )
+        # Sliced detection of large images bypasses the batcher, one image at a time
+        self._sliced_lock = threading.Lock()
+
+    @property
+    def model_version(self) -> str:
+        return self.models.model_version
+
+    def swap_models(self, model_manager: AIModelManager) -> AIModelManager:
+        """
+        Replaces the models served from now on and returns the previous
+        manager. Batches already running keep the manager they started with,
+        so in-flight requests are never dropped.
+        """
+        previous, self.models = self.models, model_manager
+        logger.info(f"Swapped models {previous.model_version} -> {model_manager.model_version}")
+        return previous
+
+    def status(self) -> dict:
+        return self.models.status()
 
     # ----------------------
     # Classification
     # ----------------------
-    def classify_category(self, image_path: str) -> str:
-        image = Image.open(image_path).convert("RGB")
-        input_tensor = self.models.preprocess(image).unsqueeze(0).to(self.models.device)
+    def _classify_batch(self, tensors: List[torch.Tensor]) -> List[dict]:
+        """Runs one forward pass over a list of preprocessed (C, H, W) tensors."""
+        models = self.models  # one manager per batch, even across a hot swap
+        start = time.perf_counter()
+        input_batch = torch.stack(tensors).to(models.device)
         with torch.no_grad():
-            outputs = self.models.class_model(input_tensor)
-            _, predicted = torch.max(outputs, 1)
-            category = self.models.class_names[predicted.item()]
+            outputs = models.class_model(input_batch)
+            probabilities = torch.softmax(outputs.float() / models.temperature, dim=1).cpu()
+        metrics.observe("classifier.forward", (time.perf_counter() - start) * 1000)
+        logger.debug(f"Classified batch of {len(tensors)} image(s).")
+        return [self._prediction(row, models.class_names) for row in probabilities]
+
+    def _prediction(self, probabilities: torch.Tensor, names: List[str]) -> dict:
+        values, indices = torch.topk(probabilities, min(CLASSIFIER_TOP_K, len(names)))
+        top_k = [{"label": names[i], "confidence": round(v, 4)} for v, i in zip(values.tolist(), indices.tolist())]
+        return {
+            "label": top_k[0]["label"],
+            "confidence": top_k[0]["confidence"],
+            "top_k": top_k,
+            "probabilities": dict(zip(names, probabilities.tolist())),
+        }
+
+    def predict_image(self, image: np.ndarray) -> dict:
+        """
+        Classifies an RGB uint8 (H, W, 3) array and returns the label with its
+        (temperature-calibrated) confidence, the top-k labels and the full
+        probability distribution.
+        """
+        with metrics.timed("preprocess"):
+            input_tensor = self.models.preprocess(Image.fromarray(image))
+        start = time.perf_counter()
+        prediction = self.classifier_batcher(input_tensor)
+        # Includes the micro-batching wait; classifier.forward has the pure model time
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        metrics.record_stage("classify", elapsed_ms)
+        if self.shadow is not None:
+            self.shadow.maybe_submit(input_tensor, prediction, self.model_version, elapsed_ms)
+        return prediction
+
+    def classify_image(self, image: np.ndarray) -> str:
+        """Classifies an RGB uint8 (H, W, 3) array."""
+        return self.predict_image(image)["label"]
+
+    def classify_category(self, image_path: str) -> str:
+        category = self.classify_image(load_image(image_path))
         logger.info(f"Image '{image_path}' classified as '{category}'.")
         return category
 
@@ -95,44 +363,162 @@ class AIService:
             return "Low"
 
     @staticmethod
-    def draw_boxes_and_severity(image, results) -> None:
-        for r in results:
-            for box in r.boxes.xyxy:
-                x1, y1, x2, y2 = map(int, box.cpu().numpy())
-                conf = float(r.boxes.conf[0]) if hasattr(r.boxes, "conf") else 0.0
-                severity = AIService.classify_severity((x1, y1, x2, y2), image.shape[0])
-                color = (0, 255, 0) if severity == "Low" else (0, 255, 255) if severity == "Medium" else (0, 0, 255)
-                cv2.rectangle(image, (x1, y1), (x2, y2), color, 2)
-                cv2.putText(image, f"{severity} ({conf:.2f})", (x1, y1 - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    def severity_tiers(xyxy: np.ndarray, image_height: int) -> np.ndarray:
+        """
+        Vectorized classify_severity: maps an (N, 4) array of integer xyxy boxes
+        to tier indices into SEVERITY_TIERS (0 = Low, 1 = Medium, 2 = High).
+        """
+        area = (xyxy[:, 2] - xyxy[:, 0]) * (xyxy[:, 3] - xyxy[:, 1])
+        bottom = xyxy[:, 3]
+        high = (area > 50000) | (bottom > image_height * 0.75)
+        medium = (area > 20000) | (bottom > image_height * 0.5)
+        return np.where(high, 2, np.where(medium, 1, 0))
 
-    def detect_pothole_severity(self, image_path: str, output_path: str = None) -> Tuple[str, str]:
-        image = cv2.imread(image_path)
-        results = self.models.detection_model(image)
-        self.draw_boxes_and_severity(image, results)
+    @staticmethod
+    def boxes_from_results(results, image_height: int, scale: float = 1.0) -> List[dict]:
+        """
+        Pulls xyxy and confidences out of YOLO results once per result object
+        and grades all boxes in one step. A scale other than 1 maps boxes
+        from a downscaled input back to the original image before grading,
+        since the severity thresholds are absolute pixel areas.
+        """
+        xyxy, conf = AIService._raw_boxes(results)
+        return AIService.grade_boxes(xyxy, conf, image_height, scale)
 
-        # Determine highest severity
-        severities = []
+    @staticmethod
+    def _raw_boxes(results, offset: Tuple[int, int] = (0, 0)) -> Tuple[np.ndarray, np.ndarray]:
+        """Float (N, 4) xyxy and (N,) confidences of YOLO results, shifted by an (x, y) tile offset."""
+        xyxy_parts, conf_parts = [], []
         for r in results:
-            for box in r.boxes.xyxy:
-                severities.append(self.classify_severity(map(int, box.cpu().numpy()), image.shape[0]))
-
-        if severities:
-            if "High" in severities:
-                severity = "High"
-            elif "Medium" in severities:
-                severity = "Medium"
+            if len(r.boxes) == 0:
+                continue
+            xyxy_parts.append(r.boxes.xyxy.cpu().numpy())
+            conf_parts.append(r.boxes.conf.cpu().numpy())
+        if not xyxy_parts:
+            return np.zeros((0, 4), dtype=np.float32), np.zeros((0,), dtype=np.float32)
+        xyxy = np.concatenate(xyxy_parts)
+        if offset != (0, 0):
+            xyxy = xyxy + np.array([offset[0], offset[1], offset[0], offset[1]], dtype=xyxy.dtype)
+        return xyxy, np.concatenate(conf_parts)
+
+    @staticmethod
+    def grade_boxes(xyxy: np.ndarray, conf: np.ndarray, image_height: int, scale: float = 1.0) -> List[dict]:
+        if len(xyxy) == 0:
+            return []
+        # Truncate like int() did, so tiers match the original per-box code
+        xyxy = (xyxy * scale).astype(np.int64)
+        conf = conf.astype(float)
+        tiers = AIService.severity_tiers(xyxy, int(image_height * scale))
+        return [
+            {"box": box, "confidence": round(c, 4), "severity": SEVERITY_TIERS[t]}
+            for box, c, t in zip(xyxy.tolist(), conf.tolist(), tiers.tolist())
+        ]
+
+    @staticmethod
+    def overall_severity(boxes: List[dict]) -> str:
+        if not boxes:
+            return "Unknown"
+        return SEVERITY_TIERS[max(SEVERITY_TIERS.index(b["severity"]) for b in boxes)]
+
+    @staticmethod
+    def draw_boxes(image: np.ndarray, boxes: List[dict]) -> None:
+        """Draws structured boxes onto a BGR image in place."""
+        for b in boxes:
+            x1, y1, x2, y2 = b["box"]
+            color = SEVERITY_COLORS[b["severity"]]
+            cv2.rectangle(image, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(image, f"{b['severity']} ({b['confidence']:.2f})", (x1, y1 - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+
+    @staticmethod
+    def draw_boxes_and_severity(image, results) -> None:
+        AIService.draw_boxes(image, AIService.boxes_from_results(results, image.shape[0]))
+
+    def _detect_batch(self, items: List[Tuple[np.ndarray, int, float]]) -> List[List[dict]]:
+        """Runs YOLO once over a list of (BGR image, height, scale) items; returns boxes per image."""
+        models = self.models  # one manager per batch, even across a hot swap
+        start = time.perf_counter()
+        results = models.detection_model([image for image, _, _ in items], verbose=False)
+        metrics.observe("detector.forward", (time.perf_counter() - start) * 1000)
+        logger.debug(f"Detected batch of {len(items)} image(s).")
+        return [self.boxes_from_results([r], height, scale) for r, (_, height, scale) in zip(results, items)]
+
+    def _detect_sliced(self, image: np.ndarray, scale: float) -> List[dict]:
+        """
+        Detects one large BGR image as the whole frame plus overlapping
+        tiles, SLICE_BATCH inputs per YOLO call, and merges the boxes with
+        NMS. Runs outside the micro-batcher, one image at a time, so a large
+        photo neither holds up nor inflates the batches of other requests.
+        """
+        models = self.models  # one manager for every chunk, even across a hot swap
+        height, width = image.shape[:2]
+        offsets = [(0, 0)] + [(x1, y1) for x1, y1, _, _ in slicing.tile_windows(width, height)]
+        parts = []
+        with self._sliced_lock:
+            for first in range(0, len(offsets), slicing.SLICE_BATCH):
+                chunk = offsets[first:first + slicing.SLICE_BATCH]
+                inputs = [image if first + i == 0 else
+                          np.ascontiguousarray(image[y:y + slicing.SLICE_TILE, x:x + slicing.SLICE_TILE])
+                          for i, (x, y) in enumerate(chunk)]
+                start = time.perf_counter()
+                results = models.detection_model(inputs, verbose=False)
+                metrics.observe("detector.forward", (time.perf_counter() - start) * 1000)
+                parts.extend(self._raw_boxes([r], offset) for r, offset in zip(results, chunk))
+        logger.debug(f"Detected sliced image in {len(offsets)} input(s).")
+
+        xyxy = np.concatenate([p[0] for p in parts])
+        conf = np.concatenate([p[1] for p in parts])
+        if len(xyxy):
+            keep = nms(torch.from_numpy(xyxy).float(), torch.from_numpy(conf).float(),
+                       slicing.SLICE_NMS_IOU).numpy()
+            xyxy, conf = xyxy[keep], conf[keep]
+        metrics.increment("detector.sliced")
+        return self.grade_boxes(xyxy, conf, height, scale)
+
+    def detect_boxes(self, image: np.ndarray, output_path: Optional[str] = None,
+                     source_size: Optional[Tuple[int, int]] = None) -> dict:
+        """
+        Runs pothole detection on an RGB uint8 (H, W, 3) array.
+
+        Returns the highest severity plus structured per-box results
+        ({"box": [x1, y1, x2, y2], "confidence", "severity"}) and the image
+        size they refer to. When the array is a downscaled copy, pass the
+        original (width, height) as source_size and boxes are reported and
+        graded in original coordinates. Large images are additionally
+        detected tile by tile when sliced detection is enabled (see
+        app.services.slicing). The annotated image is only rendered when
+        output_path is given.
+        """
+        # Fail before batching: an error raised inside a batch is logged as a batch failure
+        if getattr(self.models, "detector_load", None) == "disabled":
+            raise DetectorDisabledError("Pothole detector is disabled on this node (FIXMATE_DETECTOR_LOAD=disabled)")
+        height, width = image.shape[:2]
+        scale = source_size[0] / width if source_size else 1.0
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+        with metrics.timed("detect"):
+            if slicing.should_slice(width, height):
+                boxes = self._detect_sliced(image, scale)
             else:
-                severity = "Low"
-        else:
-            severity = "Unknown"
+                boxes = self.detector_batcher((image, height, scale))
+        severity = self.overall_severity(boxes)
 
         # Save annotated image
         if output_path:
+            drawn = boxes if scale == 1.0 else [dict(b, box=[int(v / scale) for v in b["box"]]) for b in boxes]
+            with metrics.timed("draw"):
+                self.draw_boxes(image, drawn)
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            cv2.imwrite(output_path, image)
-        else:
-            output_path = image_path
+            with metrics.timed("imwrite"):
+                cv2.imwrite(output_path, image)
+        image_size = list(source_size) if source_size else [width, height]
+        return {"severity": severity, "boxes": boxes, "image_size": image_size}
 
+    def detect_image(self, image: np.ndarray, output_path: Optional[str] = None) -> str:
+        """Runs pothole detection on an RGB array and returns the highest severity found."""
+        return self.detect_boxes(image, output_path)["severity"]
+
+    def detect_pothole_severity(self, image_path: str, output_path: str = None) -> Tuple[str, str]:
+        severity = self.detect_image(load_image(image_path), output_path)
+        output_path = output_path or image_path
         logger.info(f"Pothole severity: {severity}, output image saved to '{output_path}'.")
         return severity, output_path
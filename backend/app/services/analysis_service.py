@@ -0,0 +1,272 @@
+# app/services/analysis_service.py
+import json
+import uuid
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.ticket_model import SeverityLevel
+from app.services.image_io import INGEST_MAX_SIDE, ingest_image
+from app.services.ai_service import CLASSIFIER_TEMPERATURE, CLASSIFIER_TOP_K, DetectorDisabledError
+from app.services import cascade, engines, metrics, slicing
+from app.services.global_ai import MockAIService, get_ai_service
+from app.services.inference_executor import get_inference_executor, InferenceQueueFull
+from app.services.dedup import (DEDUP_ENABLED, find_duplicate_tickets, get_duplicate_index, perceptual_hash,
+                                refresh_duplicate_index)
+from app.services.annotation_service import save_detections
+from app.services.result_cache import get_result_cache, content_hash
+from app.utils import UPLOADS_DIR, make_image_url, normalize_image_path_for_url
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Settings besides the model weights that change what /analyze returns for
+# the same image; cached results are only reused under the same settings.
+# A calibration file overriding the temperature is part of the model version.
+PIPELINE_SETTINGS = {
+    "ingest_max_side": INGEST_MAX_SIDE,
+    "cascade": [cascade.CASCADE_SKIP_BELOW, cascade.CASCADE_BORDERLINE],
+    "slicing": [slicing.SLICE_MODE, slicing.SLICE_MIN_SIDE, slicing.SLICE_TILE, slicing.SLICE_OVERLAP,
+                slicing.SLICE_NMS_IOU, slicing.SLICE_BATCH, slicing.SLICE_MAX_SIDE],
+    "classifier": [engines.CLASSIFIER_PRECISION, engines.CLASSIFIER_CHANNELS_LAST, engines.CLASSIFIER_COMPILE,
+                   CLASSIFIER_TEMPERATURE, CLASSIFIER_TOP_K],
+}
+PIPELINE_FINGERPRINT = hashlib.sha256(json.dumps(PIPELINE_SETTINGS, sort_keys=True).encode()).hexdigest()[:12]
+
+def cache_version(model_version: str) -> str:
+    """Result-cache key for a model version: the version plus a digest of PIPELINE_SETTINGS."""
+    return f"{model_version}+{PIPELINE_FINGERPRINT}"
+
+SEVERITY_MAP = {
+    "High": SeverityLevel.HIGH,
+    "Medium": SeverityLevel.MEDIUM,
+    "Low": SeverityLevel.LOW,
+    "Unknown": SeverityLevel.NA
+}
+
+# ----------------------
+# Analysis pipeline
+# ----------------------
+# These functions block on model inference; async callers should run them on
+# the inference executor (see app.services.inference_executor).
+
+def run_analysis(ai_service, image: np.ndarray, source_size: Optional[Tuple[int, int]] = None,
+                 content: Optional[bytes] = None) -> dict:
+    """
+    Classifies an already decoded RGB image and, where the cascade policy
+    says it can matter, grades pothole severity with the detector.
+
+    Returns category, severity (SeverityLevel), confidence, top_k, the
+    detector's per-box results (empty when it did not run) with the image
+    size they refer to, and the cascade branch taken. If the image was
+    downscaled at ingest, source_size is the original (width, height) and
+    boxes are reported in original coordinates. When the detector will
+    slice the original, the encoded `content` is decoded again at up to
+    SLICE_MAX_SIDE for the detector alone.
+    """
+    prediction = ai_service.predict_image(image)
+    category = prediction["label"]
+    logger.debug(f"Classification result: {category} ({prediction['confidence']:.2f})")
+
+    result = {
+        "category": category,
+        "severity": SeverityLevel.NA,
+        "confidence": prediction["confidence"],
+        "top_k": prediction["top_k"],
+        "detections": [],
+        "image_size": list(source_size) if source_size else [image.shape[1], image.shape[0]],
+        "cascade": cascade.decide(prediction),
+    }
+    if result["cascade"] not in (cascade.DETECT, cascade.DETECT_BORDERLINE):
+        return result
+
+    detector_image = image
+    if content is not None and source_size and slicing.needs_detector_decode(source_size, image.shape[1::-1]):
+        detector_image, _ = metrics.timed_call("decode_detector", ingest_image, content, slicing.SLICE_MAX_SIDE)
+    try:
+        detection = ai_service.detect_boxes(detector_image, source_size=source_size)
+    except DetectorDisabledError:
+        # Detector-less node: keep the category, leave severity ungraded
+        logger.debug("Detector disabled, skipping severity grading")
+        return result
+    severity_str = detection["severity"]
+    logger.debug(f"Severity detection: {severity_str} ({len(detection['boxes'])} box(es))")
+
+    if result["cascade"] == cascade.DETECT_BORDERLINE:
+        # A borderline image only becomes a pothole if the detector finds one
+        promoted = severity_str != "Unknown"
+        cascade.record_borderline_outcome(promoted)
+        if not promoted:
+            return result
+        result["category"] = cascade.POTHOLE_LABEL
+    result["severity"] = SEVERITY_MAP.get(severity_str, SeverityLevel.NA)
+    result["detections"] = detection["boxes"]
+    return result
+
+def analyze_upload(ai_service, content: bytes) -> dict:
+    """Decodes uploaded bytes once and feeds the same normalized array to both models."""
+    image, source_size = ingest_image(content)
+    return run_analysis(ai_service, image, source_size, content)
+
+
+# ----------------------
+# Upload pipeline
+# ----------------------
+async def _discard_upload(save_task: Optional[asyncio.Task], path: Path) -> None:
+    if save_task is None:
+        return
+    await asyncio.gather(save_task, return_exceptions=True)
+    path.unlink(missing_ok=True)
+
+async def analyze_content(
+    content: bytes,
+    filename: str,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    db: Optional[Session] = None,
+    request=None,
+    saved: bool = False,
+) -> dict:
+    """
+    Runs one upload through ingest, duplicate lookup, the result cache and
+    the models, and returns the /analyze response body. The upload is
+    written to static/uploads/<filename> unless `saved` says it already is.
+
+    Raises InferenceQueueFull when the executor is shedding load (a file
+    written here is removed again first) and OSError if saving fails.
+    """
+    executor = get_inference_executor()
+
+    # Save the original in the background while the same bytes are decoded
+    # once in memory and fed to both models
+    file_path_obj = UPLOADS_DIR / filename
+    save_task = None
+    if not saved:
+        save_task = asyncio.create_task(asyncio.to_thread(metrics.timed_call, "save", file_path_obj.write_bytes, content))
+
+    ai_service = get_ai_service()
+    # Pinned once, so the cache key and the reported version agree even if
+    # the models are hot-swapped while this request is running
+    model_version = ai_service.model_version
+
+    # Ingest: upright per EXIF and downscaled (reduced-size JPEG decode);
+    # this one buffer feeds the hash, the classifier and the detector
+    # (except for images the detector slices, see run_analysis)
+    decoded, source_size = None, None
+    try:
+        decoded, source_size = await executor.run(
+            metrics.timed_call, "decode", ingest_image, content)
+    except InferenceQueueFull:
+        await _discard_upload(save_task, file_path_obj)
+        raise
+    except Exception:
+        logger.exception("Failed to decode uploaded image")
+
+    # With a location, look for existing tickets showing the same issue first;
+    # if there are any, the client can attach to one and we skip inference
+    duplicates = []
+    if DEDUP_ENABLED and db is not None and decoded is not None and latitude is not None and longitude is not None:
+        try:
+            phash = await asyncio.to_thread(metrics.timed_call, "phash", perceptual_hash, decoded)
+            if get_duplicate_index().refresh_due():
+                # Incremental top-up queries the database: keep it off the event loop
+                await asyncio.to_thread(refresh_duplicate_index)
+            with metrics.timed("dedup"):
+                duplicates = find_duplicate_tickets(db, latitude, longitude, phash)
+        except Exception:
+            logger.exception("Duplicate lookup failed")
+
+    # Retries and re-reports of the same photo are answered from the cache;
+    # mock results (models failed to load, or load tests) are never cached
+    cache = get_result_cache() if not isinstance(ai_service, MockAIService) else None
+    digest = await asyncio.to_thread(metrics.timed_call, "sha256", content_hash, content)
+    cached = None
+    if cache and not duplicates:
+        cached = await asyncio.to_thread(metrics.timed_call, "cache", cache.get, digest, cache_version(model_version))
+
+    details = {}
+    if duplicates:
+        best, _ = duplicates[0]
+        category = best.category
+        severity = best.severity
+        logger.debug(f"Upload looks like existing ticket {best.id}, skipping inference")
+    elif cached is not None:
+        category = cached["category"]
+        severity = SeverityLevel(cached["severity"])
+        details = cached["details"] or {}
+        logger.debug(f"Inference cache hit for {digest[:12]}")
+    else:
+        try:
+            if decoded is None:
+                raise ValueError("Uploaded image could not be decoded")
+            result = await executor.run(run_analysis, ai_service, decoded, source_size, content)
+        except InferenceQueueFull:
+            await _discard_upload(save_task, file_path_obj)
+            raise
+        except Exception:
+            logger.exception("AI analysis failed")
+            category = "Unknown"
+            severity = SeverityLevel.NA
+        else:
+            category, severity = result["category"], result["severity"]
+            details = {"confidence": result["confidence"], "top_k": result["top_k"],
+                       "detections": result["detections"], "image_size": result["image_size"]}
+            if cache and ai_service.model_version != model_version:
+                # Hot-swapped while this request ran: the result may come from
+                # either model, so it cannot be stored under the pinned version
+                logger.debug("Model version changed during analysis, not caching the result")
+            elif cache:
+                await asyncio.to_thread(
+                    cache.put, digest, cache_version(model_version), category, severity.value,
+                    normalize_image_path_for_url(file_path_obj.as_posix()), details,
+                )
+
+    if save_task is not None:
+        try:
+            await save_task
+            logger.debug(f"Saved image for analysis: {file_path_obj}")
+        except Exception:
+            logger.exception("Failed to save image for analysis")
+            raise
+
+    # Keep only box metadata; the overlay is rendered on demand by
+    # GET /api/tickets/{id}/annotated
+    if details.get("detections") and details.get("image_size"):
+        await asyncio.to_thread(
+            metrics.timed_call, "store_boxes",
+            save_detections, filename, severity.value, details["detections"], details["image_size"]
+        )
+
+    rel_path = normalize_image_path_for_url(file_path_obj.as_posix())
+    response = {
+        "temp_id": str(uuid.uuid4()),
+        "filename": filename,
+        "image_path": rel_path,
+        "image_url": make_image_url(rel_path, request) if request is not None else None,
+        "category": category,
+        "severity": severity.value,
+        "confidence": details.get("confidence"),
+        "top_k": details.get("top_k"),
+        "detections": details.get("detections", []),
+        "model_version": model_version,
+    }
+    if duplicates:
+        response["duplicates"] = [
+            {
+                "ticket_id": ticket.id,
+                "distance_m": match["distance_m"],
+                "hash_distance": match["hash_distance"],
+                "category": ticket.category,
+                "severity": ticket.severity.value,
+                "status": ticket.status.value,
+                "image_path": normalize_image_path_for_url(ticket.image_path),
+                "image_url": make_image_url(ticket.image_path, request) if request is not None else None,
+            }
+            for ticket, match in duplicates
+        ]
+    return response
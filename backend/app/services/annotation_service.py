@@ -0,0 +1,135 @@
+# app/services/annotation_service.py
+import os
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import cv2
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.inference_model import ImageDetection
+from app.services.ai_service import AIService
+from app.services import metrics
+from app.services.image_io import load_image
+
+logger = logging.getLogger(__name__)
+
+# Rendered overlays live outside static/uploads so originals are never touched
+DERIVED_DIR = Path(os.environ.get("FIXMATE_DERIVED_DIR", str(Path("static") / "derived")))
+DERIVED_CACHE_MAX_BYTES = int(float(os.environ.get("FIXMATE_DERIVED_CACHE_MB", "256")) * 1024 * 1024)
+ANNOTATED_JPEG_QUALITY = int(os.environ.get("FIXMATE_ANNOTATED_JPEG_QUALITY", "85"))
+
+FORMATS = {
+    "jpeg": (".jpg", "image/jpeg", [cv2.IMWRITE_JPEG_QUALITY, ANNOTATED_JPEG_QUALITY]),
+    "webp": (".webp", "image/webp", [cv2.IMWRITE_WEBP_QUALITY, ANNOTATED_JPEG_QUALITY]),
+}
+
+_evict_lock = threading.Lock()
+
+
+# ----------------------
+# Box metadata store
+# ----------------------
+def save_detections(filename: str, severity: str, boxes: List[dict], image_size: List[int],
+                    session_factory=SessionLocal) -> None:
+    """Persists the detector output for an uploaded image (instead of an annotated copy)."""
+    db = session_factory()
+    try:
+        db.merge(ImageDetection(
+            filename=filename,
+            severity=severity,
+            image_width=int(image_size[0]),
+            image_height=int(image_size[1]),
+            boxes=json.dumps(boxes),
+        ))
+        db.commit()
+    except Exception:
+        logger.exception(f"Failed to store detections for {filename}")
+        db.rollback()
+    finally:
+        db.close()
+
+def get_detections(db: Session, filename: str) -> Optional[ImageDetection]:
+    return db.query(ImageDetection).filter(ImageDetection.filename == filename).first()
+
+def delete_detections(db: Session, filename: str) -> None:
+    """Drops box metadata and any rendered overlays for an upload."""
+    db.query(ImageDetection).filter(ImageDetection.filename == filename).delete()
+    stem = Path(filename).stem
+    for path in DERIVED_DIR.glob(f"{stem}-*"):
+        path.unlink(missing_ok=True)
+
+
+# ----------------------
+# Derived-image cache
+# ----------------------
+def _derived_path(filename: str, detection: ImageDetection, fmt: str) -> Path:
+    # Boxes are part of the key, so re-analysis never serves a stale overlay
+    digest = hashlib.sha1(detection.boxes.encode()).hexdigest()[:10]
+    return DERIVED_DIR / f"{Path(filename).stem}-{digest}{FORMATS[fmt][0]}"
+
+def _evict(max_bytes: int = DERIVED_CACHE_MAX_BYTES) -> None:
+    """Removes least recently used overlays until the cache fits in max_bytes."""
+    with _evict_lock:
+        entries = []
+        total = 0
+        for path in DERIVED_DIR.iterdir():
+            if path.suffix == ".tmp":
+                continue  # being written by another request
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        if total <= max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        logger.debug(f"Derived image cache trimmed to {total} bytes")
+
+def render_annotated(source_path: Path, detection: ImageDetection, fmt: str = "jpeg") -> Path:
+    """
+    Returns the path of the annotated overlay for an upload, rendering and
+    caching it on first request. Cache hits refresh the file's mtime so
+    eviction is least-recently-used.
+    """
+    out_path = _derived_path(source_path.name, detection, fmt)
+    if out_path.exists():
+        os.utime(out_path)
+        return out_path
+
+    with metrics.timed("decode"):
+        image = cv2.cvtColor(load_image(str(source_path)), cv2.COLOR_RGB2BGR)
+    boxes = json.loads(detection.boxes)
+    # Boxes may refer to a resized copy of the upload; map them back
+    sx = image.shape[1] / detection.image_width
+    sy = image.shape[0] / detection.image_height
+    if sx != 1.0 or sy != 1.0:
+        boxes = [dict(b, box=[int(b["box"][0] * sx), int(b["box"][1] * sy),
+                              int(b["box"][2] * sx), int(b["box"][3] * sy)]) for b in boxes]
+    with metrics.timed("draw"):
+        AIService.draw_boxes(image, boxes)
+
+    ext, _, params = FORMATS[fmt]
+    with metrics.timed("encode"):
+        ok, encoded = cv2.imencode(ext, image, params)
+    if not ok:
+        raise RuntimeError(f"Failed to encode annotated image as {fmt}")
+
+    DERIVED_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_suffix(out_path.suffix + f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(encoded.tobytes())
+    os.replace(tmp_path, out_path)
+    logger.debug(f"Rendered annotated image {out_path}")
+
+    _evict()
+    return out_path
@@ -0,0 +1,121 @@
+# app/services/batching.py
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ----------------------
+# Micro-batching scheduler
+# ----------------------
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item calls into batched calls.
+
+    Callers submit one item and get a Future back. A worker thread collects
+    items until either `max_batch_size` is reached or `max_wait_ms` has passed
+    since the first item of the batch arrived, then runs `batch_fn` once on the
+    whole list. `batch_fn` must return one result per item, in order.
+
+    The worker thread is started lazily (and restarted after a fork), so a
+    batcher can be created before the server forks its workers.
+    """
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0,
+        name: str = "micro-batcher",
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def submit(self, item: Any) -> Future:
+        future: Future = Future()
+        if self.max_batch_size == 1:
+            # Batching disabled: run inline on the caller's thread
+            try:
+                future.set_result(self.batch_fn([item])[0])
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        self._ensure_worker().put((item, future))
+        return future
+
+    def __call__(self, item: Any) -> Any:
+        return self.submit(item).result()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._queue is not None and self._pid == os.getpid():
+                self._queue.put(None)
+            self._queue = None
+            self._thread = None
+
+    # ------------------
+    # Worker
+    # ------------------
+    def _ensure_worker(self) -> queue.Queue:
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name=self.name, daemon=True
+                )
+                self._thread.start()
+                logger.debug(f"{self.name}: worker started (max_batch_size={self.max_batch_size}, "
+                             f"max_wait_ms={self.max_wait * 1000:.1f})")
+            return self._queue
+
+    def _collect(self, q: queue.Queue, first: Tuple[Any, Future]) -> Tuple[List[Tuple[Any, Future]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = q.get(timeout=remaining) if remaining > 0 else q.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self, q: queue.Queue) -> None:
+        stop = False
+        while not stop:
+            first = q.get()
+            if first is None:
+                break
+            batch, stop = self._collect(q, first)
+
+            # Skip items whose caller has already given up
+            batch = [(item, fut) for item, fut in batch if fut.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                results = self.batch_fn([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"{self.name}: batch_fn returned {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                logger.exception(f"{self.name}: batch of {len(batch)} failed")
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+
+            for (_, fut), result in zip(batch, results):
+                fut.set_result(result)
@@ -0,0 +1,45 @@
+# app/services/cascade.py
+import os
+import logging
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+# ----------------------
+# Classifier -> detector cascade policy
+# ----------------------
+# The detector only changes the answer for images that are (or might be)
+# potholes, so its cost is spent according to the classifier's pothole
+# probability rather than its argmax label:
+#
+#   pothole is top-1, p >= SKIP_BELOW         -> "detect"
+#   pothole is top-1, p <  SKIP_BELOW         -> "skip_low_confidence" (severity N/A)
+#   other label top-1, p(pothole) >= BORDERLINE -> "detect_borderline"
+#                                               (relabelled pothole if boxes are found)
+#   other label top-1, p(pothole) <  BORDERLINE -> "skip_not_pothole"
+POTHOLE_LABEL = "pothole"
+CASCADE_SKIP_BELOW = float(os.environ.get("FIXMATE_CASCADE_SKIP_BELOW", "0.25"))
+CASCADE_BORDERLINE = float(os.environ.get("FIXMATE_CASCADE_BORDERLINE", "0.30"))
+
+DETECT = "detect"
+SKIP_LOW_CONFIDENCE = "skip_low_confidence"
+DETECT_BORDERLINE = "detect_borderline"
+SKIP_NOT_POTHOLE = "skip_not_pothole"
+
+
+def decide(prediction: dict, skip_below: float = None, borderline: float = None) -> str:
+    """Picks the cascade branch for one classifier prediction and counts it."""
+    skip_below = CASCADE_SKIP_BELOW if skip_below is None else skip_below
+    borderline = CASCADE_BORDERLINE if borderline is None else borderline
+    p_pothole = prediction.get("probabilities", {}).get(POTHOLE_LABEL, 0.0)
+
+    if prediction["label"].lower() == POTHOLE_LABEL:
+        branch = DETECT if p_pothole >= skip_below else SKIP_LOW_CONFIDENCE
+    else:
+        branch = DETECT_BORDERLINE if p_pothole >= borderline else SKIP_NOT_POTHOLE
+
+    metrics.increment(f"cascade.{branch}")
+    return branch
+
+def record_borderline_outcome(promoted: bool) -> None:
+    metrics.increment("cascade.borderline_promoted" if promoted else "cascade.borderline_rejected")
@@ -0,0 +1,231 @@
+# app/services/dedup.py
+import os
+import math
+import time
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.ticket_model import Ticket
+
+logger = logging.getLogger(__name__)
+
+DEDUP_ENABLED = os.environ.get("FIXMATE_DEDUP_ENABLED", "1") == "1"
+# A report is a duplicate candidate if it is within this many metres...
+DEDUP_RADIUS_M = float(os.environ.get("FIXMATE_DEDUP_RADIUS_M", "25"))
+# ...and its photo's perceptual hash differs in at most this many of 64 bits
+DEDUP_MAX_HASH_DISTANCE = int(os.environ.get("FIXMATE_DEDUP_MAX_HASH_DISTANCE", "10"))
+DEDUP_MAX_RESULTS = int(os.environ.get("FIXMATE_DEDUP_MAX_RESULTS", "5"))
+# How often to pick up tickets created by other workers
+DEDUP_REFRESH_SECONDS = float(os.environ.get("FIXMATE_DEDUP_REFRESH_SECONDS", "5"))
+
+EARTH_RADIUS_M = 6371000.0
+METRES_PER_DEGREE = 111320.0
+
+
+# ----------------------
+# Perceptual hash
+# ----------------------
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+_DCT_32 = _dct_matrix(32)
+
+def perceptual_hash(image: np.ndarray) -> str:
+    """
+    64-bit DCT perceptual hash of an RGB array, as 16 hex characters.
+    Robust to rescaling, recompression and small crops/exposure changes.
+    """
+    gray = Image.fromarray(image).convert("L").resize((32, 32), Image.BILINEAR)
+    pixels = np.asarray(gray, dtype=np.float32)
+    low = (_DCT_32 @ pixels @ _DCT_32.T)[:8, :8].flatten()
+    bits = low > np.median(low[1:])
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return f"{value:016x}"
+
+def hash_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+# ----------------------
+# Spatial + perceptual duplicate index
+# ----------------------
+class DuplicateIndex:
+    """
+    In-memory grid index of (ticket, location, photo hash).
+
+    Tickets are bucketed into square cells roughly `radius_m` wide, so a
+    lookup only inspects the handful of cells around the query point, which
+    keeps it well under a millisecond even with hundreds of thousands of
+    tickets. The index is filled from the `tickets` table in a background
+    thread at startup and topped up incrementally (by SQLite rowid) with
+    tickets written by other workers; lookups before the initial load has
+    finished find nothing rather than wait for it.
+    """
+    def __init__(self, radius_m: float = DEDUP_RADIUS_M):
+        self.radius_m = radius_m
+        self.cell_deg = max(radius_m, 1.0) / METRES_PER_DEGREE
+        self._cells: Dict[Tuple[int, int], List[Tuple[str, float, float, int]]] = defaultdict(list)
+        self._ticket_cells: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._last_rowid = 0
+        self._last_refresh: Optional[float] = None
+        self.loaded = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._ticket_cells)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    def add(self, ticket_id: str, lat: float, lon: float, phash: str) -> None:
+        if not phash:
+            return
+        cell = self._cell(lat, lon)
+        with self._lock:
+            if ticket_id in self._ticket_cells:
+                return
+            self._cells[cell].append((ticket_id, lat, lon, int(phash, 16)))
+            self._ticket_cells[ticket_id] = cell
+
+    def remove(self, ticket_id: str) -> None:
+        with self._lock:
+            cell = self._ticket_cells.pop(ticket_id, None)
+            if cell is None:
+                return
+            entries = [e for e in self._cells[cell] if e[0] != ticket_id]
+            if entries:
+                self._cells[cell] = entries
+            else:
+                del self._cells[cell]
+
+    def query(self, lat: float, lon: float, phash: str, radius_m: float = None,
+              max_hash_distance: int = DEDUP_MAX_HASH_DISTANCE, limit: int = DEDUP_MAX_RESULTS) -> List[dict]:
+        """Returns candidates sorted by hash distance, then physical distance."""
+        radius_m = radius_m or self.radius_m
+        target = int(phash, 16)
+        lat_span = int(math.ceil(radius_m / (self.cell_deg * METRES_PER_DEGREE)))
+        lon_scale = max(math.cos(math.radians(lat)), 1e-6)
+        lon_span = int(math.ceil(radius_m / (self.cell_deg * METRES_PER_DEGREE * lon_scale)))
+        row, col = self._cell(lat, lon)
+
+        candidates = []
+        with self._lock:
+            for dr in range(-lat_span, lat_span + 1):
+                for dc in range(-lon_span, lon_span + 1):
+                    for ticket_id, t_lat, t_lon, t_hash in self._cells.get((row + dr, col + dc), ()):
+                        distance = hash_distance(target, t_hash)
+                        if distance > max_hash_distance:
+                            continue
+                        metres = haversine_m(lat, lon, t_lat, t_lon)
+                        if metres <= radius_m:
+                            candidates.append({"ticket_id": ticket_id, "distance_m": round(metres, 1),
+                                               "hash_distance": distance})
+        candidates.sort(key=lambda c: (c["hash_distance"], c["distance_m"]))
+        return candidates[:limit]
+
+    def refresh_due(self) -> bool:
+        return self._last_refresh is None or time.monotonic() - self._last_refresh >= DEDUP_REFRESH_SECONDS
+
+    def refresh(self, db: Session, force: bool = False) -> None:
+        """
+        Loads tickets with a photo hash that were inserted since the last
+        refresh. Runs synchronous queries, so call it off the event loop;
+        concurrent calls return at once while one is in progress.
+        """
+        if not force and not self.refresh_due():
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_refresh = time.monotonic()
+            rows = db.execute(
+                text("SELECT rowid, id, latitude, longitude, image_phash FROM tickets "
+                     "WHERE rowid > :last AND image_phash IS NOT NULL ORDER BY rowid"),
+                {"last": self._last_rowid},
+            ).fetchall()
+            for rowid, ticket_id, lat, lon, phash in rows:
+                self.add(ticket_id, lat, lon, phash)
+                self._last_rowid = max(self._last_rowid, rowid)
+            if rows:
+                logger.debug(f"Duplicate index: +{len(rows)} ticket(s), {len(self)} total")
+            self.loaded.set()
+        finally:
+            self._refresh_lock.release()
+
+
+_index: Optional[DuplicateIndex] = None
+_index_lock = threading.Lock()
+
+def get_duplicate_index() -> DuplicateIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = DuplicateIndex()
+        return _index
+
+def refresh_duplicate_index(force: bool = False) -> None:
+    """Picks up tickets written by other workers, with its own session (blocking; use asyncio.to_thread)."""
+    index = get_duplicate_index()
+    db = SessionLocal()
+    try:
+        index.refresh(db, force=force)
+    except Exception:
+        logger.exception("Failed to refresh duplicate index")
+    finally:
+        db.close()
+
+def start_duplicate_index() -> None:
+    """Builds the index in a background thread, so no request pays for loading every ticket."""
+    if not DEDUP_ENABLED:
+        return
+    def build():
+        start = time.perf_counter()
+        refresh_duplicate_index(force=True)
+        logger.info(f"Duplicate index built with {len(get_duplicate_index())} ticket(s) "
+                    f"in {time.perf_counter() - start:.2f}s")
+    threading.Thread(target=build, name="dedup-index", daemon=True).start()
+
+def find_duplicate_tickets(db: Session, latitude: float, longitude: float, phash: str) -> List[Tuple[Ticket, dict]]:
+    """
+    Returns (ticket, match info) pairs for existing tickets that look like
+    the same issue. Only an in-memory lookup plus a primary-key fetch of the
+    matches; refreshing the index is left to refresh_duplicate_index().
+    """
+    index = get_duplicate_index()
+    if not index.loaded.is_set():
+        return []
+    matches = index.query(latitude, longitude, phash)
+    if not matches:
+        return []
+
+    tickets = {t.id: t for t in db.query(Ticket).filter(Ticket.id.in_([m["ticket_id"] for m in matches])).all()}
+    found = []
+    for match in matches:
+        ticket = tickets.get(match["ticket_id"])
+        if ticket is None:
+            # Deleted by another worker since it was indexed
+            index.remove(match["ticket_id"])
+            continue
+        found.append((ticket, match))
+    return found
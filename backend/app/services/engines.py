@@ -0,0 +1,330 @@
+# app/services/engines.py
+import os
+import json
+import hashlib
+import logging
+from typing import Callable
+import torch
+from torchvision import models
+
+logger = logging.getLogger(__name__)
+
+# ----------------------
+# Inference engines
+# ----------------------
+# "torch"       - eager PyTorch (default, uses the original .pth / .pt weights)
+# "torchscript" - frozen TorchScript modules produced by scripts/export_models.py
+# "onnx"        - ONNX Runtime with the CPU execution provider
+# "int8"        - INT8 quantized classifier produced by scripts/quantize_classifier.py
+#                 (the detector stays on eager torch in this mode)
+ENGINES = ("torch", "torchscript", "onnx", "int8")
+INFERENCE_ENGINE = os.environ.get("FIXMATE_INFERENCE_ENGINE", "torch").lower()
+DETECTOR_ENGINE = os.environ.get("FIXMATE_DETECTOR_ENGINE", "torch" if INFERENCE_ENGINE == "int8" else INFERENCE_ENGINE).lower()
+# The INT8 classifier is only activated if its validation report shows at
+# least this top-1 agreement with the fp32 model on the held-out set
+INT8_MIN_AGREEMENT = float(os.environ.get("FIXMATE_INT8_MIN_AGREEMENT", "0.98"))
+
+CLASSIFIER_INPUT_SIZE = (224, 224)
+
+# Opt-in execution options for the eager ("torch") classifier on CPU:
+#   FIXMATE_CLASSIFIER_PRECISION=bf16  - run under CPU bfloat16 autocast
+#   FIXMATE_CLASSIFIER_CHANNELS_LAST=1 - NHWC weights and inputs
+#   FIXMATE_CLASSIFIER_COMPILE=1       - torch.compile with the inductor backend
+# Each is dropped when the CPU or torch build cannot run it, and the result
+# must agree with plain fp32 on a startup parity check before it is used.
+CLASSIFIER_PRECISION = os.environ.get("FIXMATE_CLASSIFIER_PRECISION", "fp32").lower()
+CLASSIFIER_CHANNELS_LAST = os.environ.get("FIXMATE_CLASSIFIER_CHANNELS_LAST", "0") == "1"
+CLASSIFIER_COMPILE = os.environ.get("FIXMATE_CLASSIFIER_COMPILE", "0") == "1"
+PRECISION_MIN_AGREEMENT = float(os.environ.get("FIXMATE_PRECISION_MIN_AGREEMENT", "0.98"))
+PRECISION_PARITY_SAMPLES = int(os.environ.get("FIXMATE_PRECISION_PARITY_SAMPLES", "64"))
+
+
+def classifier_artifact_path(weights_path: str, engine: str) -> str:
+    """best_model.pth -> best_model.torchscript.pt / best_model.onnx"""
+    stem, _ = os.path.splitext(weights_path)
+    if engine == "torchscript":
+        return f"{stem}.torchscript.pt"
+    if engine == "onnx":
+        return f"{stem}.onnx"
+    if engine == "int8":
+        return f"{stem}.int8.pt"
+    return weights_path
+
+def calibration_path(weights_path: str) -> str:
+    stem, _ = os.path.splitext(weights_path)
+    return f"{stem}.calibration.json"
+
+def int8_report_path(weights_path: str) -> str:
+    stem, _ = os.path.splitext(weights_path)
+    return f"{stem}.int8.json"
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def int8_is_approved(weights_path: str, min_agreement: float = None) -> bool:
+    """
+    Accuracy gate for the INT8 classifier: its validation report must exist,
+    be built from the current fp32 weights and meet the agreement threshold.
+    """
+    min_agreement = INT8_MIN_AGREEMENT if min_agreement is None else min_agreement
+    report_path = int8_report_path(weights_path)
+    try:
+        with open(report_path, "r") as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        logger.warning(f"INT8 validation report '{report_path}' missing or unreadable.")
+        return False
+
+    if not report.get("approved"):
+        logger.warning(f"INT8 classifier was rejected at build time (see '{report_path}').")
+        return False
+    if report.get("source_sha256") != file_sha256(weights_path):
+        logger.warning("INT8 classifier was built from different fp32 weights, re-run scripts/quantize_classifier.py.")
+        return False
+    agreement = float(report.get("top1_agreement", 0.0))
+    if agreement < min_agreement:
+        logger.warning(f"INT8 classifier top-1 agreement {agreement:.3f} is below {min_agreement:.3f}.")
+        return False
+    return True
+
+def detector_artifact_path(weights_path: str, engine: str) -> str:
+    """best_severity_check.pt -> best_severity_check.torchscript / .onnx (ultralytics export naming)"""
+    stem, _ = os.path.splitext(weights_path)
+    if engine == "torchscript":
+        return f"{stem}.torchscript"
+    if engine == "onnx":
+        return f"{stem}.onnx"
+    return weights_path
+
+def resolve_engine(engine: str, artifact_path: str, kind: str) -> str:
+    """Falls back to eager torch when the engine is unknown or its artifact was never exported."""
+    if engine not in ENGINES:
+        logger.warning(f"Unknown {kind} engine '{engine}', using 'torch'.")
+        return "torch"
+    if engine != "torch" and not os.path.exists(artifact_path):
+        logger.warning(f"{kind} artifact '{artifact_path}' not found (run scripts/export_models.py), using 'torch'.")
+        return "torch"
+    return engine
+
+def resolve_classifier_engine(engine: str, weights_path: str) -> str:
+    engine = resolve_engine(engine, classifier_artifact_path(weights_path, engine), "Classifier")
+    if engine == "int8" and not int8_is_approved(weights_path):
+        logger.warning("Refusing to activate the INT8 classifier, using 'torch'.")
+        return "torch"
+    return engine
+
+
+# ----------------------
+# Classifier engines
+# ----------------------
+# Every classifier engine is a callable that maps a float32 (N, 3, 224, 224)
+# tensor to (N, num_classes) logits, so AIService does not care which one runs.
+
+def build_eager_classifier(weights_path: str, num_classes: int, device: torch.device) -> torch.nn.Module:
+    model = models.resnet18(weights=None)
+    model.fc = torch.nn.Linear(model.fc.in_features, num_classes)
+    state_dict = torch.load(weights_path, map_location=device)
+    model.load_state_dict(state_dict)
+    model.to(device)
+    model.eval()
+    return model
+
+class OnnxClassifier:
+    """Runs an exported classifier on ONNX Runtime (CPU execution provider)."""
+    def __init__(self, onnx_path: str, num_threads: int = None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = num_threads or torch.get_num_threads()
+        self.session = ort.InferenceSession(onnx_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch: torch.Tensor) -> torch.Tensor:
+        logits = self.session.run(None, {self.input_name: batch.detach().cpu().numpy()})[0]
+        return torch.from_numpy(logits)
+
+def load_classifier(engine: str, weights_path: str, num_classes: int, device: torch.device) -> Callable:
+    if engine == "int8":
+        # Quantized kernels are CPU-only
+        if "x86" in torch.backends.quantized.supported_engines:
+            torch.backends.quantized.engine = "x86"
+        model = torch.jit.load(classifier_artifact_path(weights_path, engine), map_location="cpu")
+        model.eval()
+        return model
+    if engine == "torchscript":
+        model = torch.jit.load(classifier_artifact_path(weights_path, engine), map_location=device)
+        model.eval()
+        if device.type == "cpu":
+            model = torch.jit.optimize_for_inference(model)
+        return model
+    if engine == "onnx":
+        return OnnxClassifier(classifier_artifact_path(weights_path, engine))
+    return build_eager_classifier(weights_path, num_classes, device)
+
+
+
+# ----------------------
+# Classifier precision / layout options
+# ----------------------
+class OptimizedClassifier:
+    """Eager classifier run in channels_last and/or under CPU bf16 autocast; always returns float32 logits."""
+    def __init__(self, model: Callable, channels_last: bool, bf16: bool):
+        self.model = model
+        self.channels_last = channels_last
+        self.bf16 = bf16
+
+    def __call__(self, batch: torch.Tensor) -> torch.Tensor:
+        if self.channels_last:
+            batch = batch.contiguous(memory_format=torch.channels_last)
+        if self.bf16:
+            with torch.autocast("cpu", dtype=torch.bfloat16):
+                return self.model(batch).float()
+        return self.model(batch)
+
+def cpu_supports_bf16() -> bool:
+    """True when the CPU has native bf16 (AVX512-BF16 or AMX); elsewhere bf16 is emulated and slower than fp32."""
+    cpu = getattr(torch, "cpu", None)
+    checks = [getattr(cpu, name, None) for name in ("_is_avx512_bf16_supported", "_is_amx_tile_supported")]
+    checks = [check for check in checks if check is not None]
+    if checks:
+        return any(check() for check in checks)
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+def parity_inputs(count: int, seed: int = 0) -> torch.Tensor:
+    """Deterministic photo-like inputs (smooth noise, not white noise) in [0, 1]."""
+    generator = torch.Generator().manual_seed(seed)
+    coarse = torch.rand(count, 3, CLASSIFIER_INPUT_SIZE[0] // 16, CLASSIFIER_INPUT_SIZE[1] // 16, generator=generator)
+    return torch.nn.functional.interpolate(coarse, size=CLASSIFIER_INPUT_SIZE, mode="bilinear", align_corners=False)
+
+def _parity(reference: torch.Tensor, candidate: Callable, inputs: torch.Tensor) -> dict:
+    with torch.no_grad():
+        probabilities = torch.softmax(candidate(inputs).float(), dim=1)
+    expected = torch.softmax(reference, dim=1)
+    return {
+        "samples": len(inputs),
+        "top1_agreement": round((probabilities.argmax(1) == expected.argmax(1)).float().mean().item(), 4),
+        "max_prob_diff": round((probabilities - expected).abs().max().item(), 5),
+    }
+
+def _log_notes(report: dict) -> None:
+    for note in report["notes"]:
+        logger.warning(f"Classifier execution options: {note}")
+
+def optimize_classifier(model: torch.nn.Module, device: torch.device, precision: str = None,
+                        channels_last: bool = None, compile_model: bool = None) -> tuple:
+    """
+    Applies the requested precision/layout options to an eager classifier.
+    Returns (callable, report). Options the hardware or torch build cannot
+    run are dropped; whatever remains must reach PRECISION_MIN_AGREEMENT
+    top-1 agreement with plain fp32, otherwise the fp32 model is returned.
+    """
+    precision = (precision or CLASSIFIER_PRECISION).lower()
+    channels_last = CLASSIFIER_CHANNELS_LAST if channels_last is None else channels_last
+    compile_model = CLASSIFIER_COMPILE if compile_model is None else compile_model
+    requested = {"precision": precision, "channels_last": channels_last, "compile": compile_model}
+    report = {"requested": requested, "active": {"precision": "fp32", "channels_last": False, "compile": False},
+              "notes": []}
+    if precision == "fp32" and not channels_last and not compile_model:
+        return model, report
+    if device.type != "cpu":
+        report["notes"].append(f"options apply to CPU inference only (device is {device.type})")
+        _log_notes(report)
+        return model, report
+
+    bf16 = precision == "bf16"
+    if precision not in ("fp32", "bf16"):
+        report["notes"].append(f"unknown precision '{precision}', using fp32")
+        bf16 = False
+    if bf16 and not cpu_supports_bf16():
+        report["notes"].append("CPU has no native bf16 support, using fp32")
+        bf16 = False
+    if compile_model and not hasattr(torch, "compile"):
+        report["notes"].append("torch.compile needs torch 2.x")
+        compile_model = False
+
+    inputs = parity_inputs(PRECISION_PARITY_SAMPLES).to(device)
+    with torch.no_grad():
+        reference = model(inputs).float()
+
+    # Try the full request first, then without compile (the most fragile part)
+    attempts = [(bf16, channels_last, compile_model)]
+    if compile_model:
+        attempts.append((bf16, channels_last, False))
+    for attempt_bf16, attempt_channels_last, attempt_compile in attempts:
+        if not (attempt_bf16 or attempt_channels_last or attempt_compile):
+            continue
+        try:
+            model.to(memory_format=torch.channels_last if attempt_channels_last else torch.contiguous_format)
+            runner = torch.compile(model, backend="inductor") if attempt_compile else model
+            candidate = OptimizedClassifier(runner, attempt_channels_last, attempt_bf16)
+            parity = _parity(reference, candidate, inputs)  # also triggers compilation
+        except Exception as e:
+            report["notes"].append(f"{'compile' if attempt_compile else 'bf16/channels_last'} failed: {e!r}")
+            continue
+        report["parity"] = parity
+        if parity["top1_agreement"] < PRECISION_MIN_AGREEMENT:
+            report["notes"].append(f"top-1 agreement {parity['top1_agreement']} with fp32 is below "
+                                   f"{PRECISION_MIN_AGREEMENT}, using fp32")
+            break
+        report["active"] = {"precision": "bf16" if attempt_bf16 else "fp32",
+                            "channels_last": attempt_channels_last, "compile": attempt_compile}
+        logger.info(f"Classifier execution options: {report['active']} (parity vs fp32: {parity})")
+        _log_notes(report)
+        return candidate, report
+
+    model.to(memory_format=torch.contiguous_format)
+    _log_notes(report)
+    return model, report
+
+# ----------------------
+# Detector engines
+# ----------------------
+def load_detector(engine: str, weights_path: str):
+    # ultralytics can drive exported TorchScript and ONNX files itself
+    from ultralytics import YOLO
+    return YOLO(detector_artifact_path(weights_path, engine), task="detect")
+
+
+# ----------------------
+# Export
+# ----------------------
+def export_classifier(weights_path: str, num_classes: int, engine: str, opset: int = 17) -> str:
+    """Writes the classifier in the given engine's format next to the .pth file."""
+    model = build_eager_classifier(weights_path, num_classes, torch.device("cpu"))
+    example = torch.rand(1, 3, *CLASSIFIER_INPUT_SIZE)
+    out_path = classifier_artifact_path(weights_path, engine)
+    if engine == "torchscript":
+        # Saved frozen only: optimize_for_inference prepacks weights into
+        # constants that cannot be serialized, so it runs at load time
+        with torch.no_grad():
+            frozen = torch.jit.freeze(torch.jit.trace(model, example))
+        frozen.save(out_path)
+    elif engine == "onnx":
+        torch.onnx.export(
+            model, example, out_path,
+            input_names=["input"], output_names=["logits"],
+            dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+            opset_version=opset,
+        )
+    else:
+        raise ValueError(f"Nothing to export for engine '{engine}' (use scripts/quantize_classifier.py for int8)")
+    logger.info(f"Exported classifier to '{out_path}'.")
+    return out_path
+
+def export_detector(weights_path: str, engine: str, opset: int = 17) -> str:
+    from ultralytics import YOLO
+    fmt = {"torchscript": "torchscript", "onnx": "onnx"}.get(engine)
+    if fmt is None:
+        raise ValueError(f"Nothing to export for engine '{engine}'")
+    kwargs = {"dynamic": True, "opset": opset} if fmt == "onnx" else {}
+    out_path = YOLO(weights_path).export(format=fmt, **kwargs)
+    logger.info(f"Exported detector to '{out_path}'.")
+    return out_path
@@ -1,25 +1,59 @@
 import os
-from app.services.ai_service import AIModelManager, AIService
+import cv2
+import numpy as np
+from app.services.ai_service import AIModelManager, AIService, WARMUP_ENABLED, CLASSIFIER_TOP_K
+from app.services.image_io import INGEST_MAX_SIDE, load_image
+from app.services import metrics, model_registry
+from app.services.shadow import create_shadow_evaluator
+import math
+import hashlib
 import logging
 import random
-from typing import Tuple
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional, Tuple
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# "thread" runs models inside the API process, "process" in a pool of worker processes
+INFERENCE_MODE = os.environ.get("FIXMATE_INFERENCE_MODE", "thread").lower()
+INFERENCE_WORKERS = int(os.environ.get("FIXMATE_INFERENCE_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# Seconds between checks of the registry's ACTIVE file (0 disables the watcher)
+MODEL_WATCH_SECONDS = float(os.environ.get("FIXMATE_MODEL_WATCH_SECONDS", "10"))
+# Serve MockAIService instead of loading models (load tests without weights)
+MOCK_AI = os.environ.get("FIXMATE_MOCK_AI", "0") == "1"
+
 # ----------------------
 # Lazy-initialized AI service
 # ----------------------
 _ai_service: AIService = None
+_ready = False
 
 def init_ai_service() -> AIService:
     """Initializes the AI service if not already initialized."""
-    global _ai_service
+    global _ai_service, _ready
+    if _ai_service is None and MOCK_AI:
+        logger.info("FIXMATE_MOCK_AI=1: serving mock results, no models loaded.")
+        _ai_service = MockAIService()
+        _ready = True
+    if _ai_service is None and INFERENCE_MODE == "process":
+        logger.debug(f"Initializing process-pool AI service with {INFERENCE_WORKERS} worker(s)...")
+        try:
+            from app.services.process_pool import ProcessPoolAIService
+            _ai_service = ProcessPoolAIService(INFERENCE_WORKERS)
+            _ready = True
+        except Exception as e:
+            logger.warning(f"Failed to start inference workers: {e}. Falling back to in-process inference.")
     if _ai_service is None:
         logger.debug("Initializing AI service...")
         try:
-            model_manager = AIModelManager()
-            _ai_service = AIService(model_manager)
+            model_manager = AIModelManager(registry_version=model_registry.active_version())
+            if WARMUP_ENABLED:
+                model_manager.warmup()
+            _ai_service = AIService(model_manager, shadow=create_shadow_evaluator())
+            _ready = True
             logger.info("AI service ready.")
         except Exception as e:
             logger.warning(f"Failed to initialize AI service: {e}. Using mock service.")
@@ -31,13 +65,242 @@ def get_ai_service() -> AIService:
     """Returns the initialized AI service."""
     return init_ai_service()
 
-# Mock AI service for testing when models can't be loaded
+def get_readiness() -> dict:
+    """
+    Readiness of this worker for the load balancer: models loaded and warmed
+    up. A worker that fell back to the mock service is never ready.
+    """
+    if _ai_service is None:
+        return {"ready": False, "reason": "AI service not initialized"}
+    if not _ready:
+        return {"ready": False, "reason": "models failed to load, serving mock results"}
+    return {"ready": True, **_ai_service.status()}
+
+# ----------------------
+# Hot model swap
+# ----------------------
+_reload_lock = threading.Lock()
+_reload_state = {"state": "idle", "target": None, "error": None, "swapped_at": None}
+_watcher: Optional[threading.Thread] = None
+_watcher_stop = threading.Event()
+
+def get_reload_status() -> dict:
+    return dict(_reload_state)
+
+def reload_ai_service(version: Optional[str], wait: bool = False) -> bool:
+    """
+    Loads `version` from the model registry (None = default files) in a
+    background thread, warms it up and swaps it into the running AIService.
+    Requests keep being served by the current models until the swap.
+    Returns False if a reload is already in progress.
+    """
+    if _ai_service is not None and not isinstance(_ai_service, (AIService, MockAIService)):
+        raise RuntimeError("Hot swap is not supported in process mode; restart the workers instead")
+    model_registry.resolve_files(version)  # fail fast on unknown versions
+    if not _reload_lock.acquire(blocking=False):
+        return False
+    _reload_state.update(state="loading", target=version, error=None)
+    thread = threading.Thread(target=_reload, args=(version,), name="model-reload", daemon=True)
+    thread.start()
+    if wait:
+        thread.join()
+    return True
+
+def _reload(version: Optional[str]) -> None:
+    global _ai_service, _ready
+    try:
+        start = time.perf_counter()
+        model_manager = AIModelManager(registry_version=version)
+        if WARMUP_ENABLED:
+            model_manager.warmup()
+        if isinstance(_ai_service, AIService):
+            _ai_service.swap_models(model_manager)
+        else:
+            # Recovering from the mock service after a failed startup
+            _ai_service = AIService(model_manager, shadow=create_shadow_evaluator())
+            _ready = True
+        _reload_state.update(state="idle", swapped_at=datetime.now(timezone.utc).isoformat())
+        logger.info(f"Model version '{version or 'default'}' live after {time.perf_counter() - start:.1f}s "
+                    f"({model_manager.model_version}).")
+    except Exception as e:
+        logger.exception(f"Failed to load model version '{version or 'default'}'; keeping current models.")
+        _reload_state.update(state="failed", error=repr(e))
+    finally:
+        _reload_lock.release()
+
+def _watch_registry() -> None:
+    """Follows the registry's ACTIVE file, so `set_active_version` in one worker reaches all of them."""
+    seen_mtime = model_registry.active_marker_mtime()
+    while not _watcher_stop.wait(MODEL_WATCH_SECONDS):
+        mtime = model_registry.active_marker_mtime()
+        if mtime == seen_mtime:
+            continue
+        version = model_registry.active_version()
+        loaded = getattr(getattr(_ai_service, "models", None), "registry_version", None)
+        if version == loaded and isinstance(_ai_service, AIService):
+            seen_mtime = mtime
+            continue
+        try:
+            if reload_ai_service(version):
+                # A failed load is not retried until ACTIVE changes again
+                seen_mtime = mtime
+        except Exception:
+            logger.exception(f"Ignoring invalid active model version '{version}'")
+            seen_mtime = mtime
+
+def start_model_watcher() -> None:
+    global _watcher
+    if MODEL_WATCH_SECONDS <= 0 or INFERENCE_MODE == "process" or MOCK_AI or _watcher is not None:
+        return
+    _watcher_stop.clear()
+    _watcher = threading.Thread(target=_watch_registry, name="model-registry-watch", daemon=True)
+    _watcher.start()
+
+def shutdown_ai_service() -> None:
+    """Stops worker processes, if any, and forgets the current service."""
+    global _ai_service, _ready, _watcher
+    _watcher_stop.set()
+    _watcher = None
+    if _ai_service is not None and hasattr(_ai_service, "close"):
+        _ai_service.close()
+    if getattr(_ai_service, "shadow", None) is not None:
+        _ai_service.shadow.close()
+    _ai_service = None
+    _ready = False
+
+# ----------------------
+# Mock AI service
+# ----------------------
+# Used when the models cannot be loaded, or always with FIXMATE_MOCK_AI=1 to
+# capacity-test the API, queueing and database layers without weights.
+# Results are a pure function of the image content, so repeated runs are
+# comparable; service time follows a configurable distribution so load
+# tests see realistic queueing.
+MOCK_CATEGORIES = ["pothole", "streetlight", "garbage", "signage", "drainage", "other"]
+# Mean simulated service time per call (ms); defaults approximate ResNet18 at
+# 224 px and YOLO at 640 px on a few CPU cores
+MOCK_CLASSIFY_MS = float(os.environ.get("FIXMATE_MOCK_CLASSIFY_MS", "25"))
+MOCK_DETECT_MS = float(os.environ.get("FIXMATE_MOCK_DETECT_MS", "80"))
+# fixed | normal | lognormal | exponential; spread as coefficient of variation
+MOCK_LATENCY_DIST = os.environ.get("FIXMATE_MOCK_LATENCY_DIST", "lognormal").lower()
+MOCK_LATENCY_CV = float(os.environ.get("FIXMATE_MOCK_LATENCY_CV", "0.3"))
+# Spend the service time computing instead of sleeping, so CPU contention shows up too
+MOCK_CPU_BURN = os.environ.get("FIXMATE_MOCK_CPU_BURN", "0") == "1"
+
+def _sample_latency_ms(mean_ms: float, dist: str = None, cv: float = None) -> float:
+    dist = dist or MOCK_LATENCY_DIST
+    cv = MOCK_LATENCY_CV if cv is None else cv
+    if mean_ms <= 0:
+        return 0.0
+    if dist == "normal":
+        return max(0.0, random.gauss(mean_ms, cv * mean_ms))
+    if dist == "lognormal" and cv > 0:
+        sigma = math.sqrt(math.log(1 + cv * cv))
+        return random.lognormvariate(math.log(mean_ms) - sigma * sigma / 2, sigma)
+    if dist == "exponential":
+        return random.expovariate(1 / mean_ms)
+    return mean_ms
+
+_BURN_BLOCK = bytes(1 << 16)
+
+def _spend(value_ms: float, burn: bool) -> None:
+    if not burn:
+        time.sleep(value_ms / 1000)
+        return
+    # hashlib releases the GIL on large buffers, like torch kernels do
+    deadline = time.perf_counter() + value_ms / 1000
+    while time.perf_counter() < deadline:
+        hashlib.sha256(_BURN_BLOCK).digest()
+
+def _image_digest(image) -> bytes:
+    """Stable digest of an RGB array; every 4th pixel is plenty to tell uploads apart."""
+    if image is None:
+        return hashlib.sha256(b"").digest()
+    sample = np.ascontiguousarray(image[::4, ::4])
+    return hashlib.sha256(repr(image.shape).encode() + sample.tobytes()).digest()
+
 class MockAIService:
+    model_version = "mock"
+
+    def __init__(self, classify_ms: float = None, detect_ms: float = None, cpu_burn: bool = None):
+        self.classify_ms = MOCK_CLASSIFY_MS if classify_ms is None else classify_ms
+        self.detect_ms = MOCK_DETECT_MS if detect_ms is None else detect_ms
+        self.cpu_burn = MOCK_CPU_BURN if cpu_burn is None else cpu_burn
+
+    def status(self) -> dict:
+        return {
+            "model_version": self.model_version,
+            "mock": {
+                "classify_ms": self.classify_ms,
+                "detect_ms": self.detect_ms,
+                "latency_dist": MOCK_LATENCY_DIST,
+                "latency_cv": MOCK_LATENCY_CV,
+                "cpu_burn": self.cpu_burn,
+            },
+        }
+
+    def _simulate(self, stage: str, mean_ms: float) -> None:
+        with metrics.timed(stage):
+            _spend(_sample_latency_ms(mean_ms), self.cpu_burn)
+
+    def predict_image(self, image) -> dict:
+        digest = _image_digest(image)
+        self._simulate("classify", self.classify_ms)
+        # The peak height varies per image, so the cascade sees confident,
+        # borderline and low-confidence predictions alike
+        weights = [1 + digest[i] for i in range(len(MOCK_CATEGORIES))]
+        top = digest[len(MOCK_CATEGORIES)] % len(MOCK_CATEGORIES)
+        weights[top] += 8 * digest[len(MOCK_CATEGORIES) + 1]
+        total = sum(weights)
+        probabilities = {label: round(w / total, 4) for label, w in zip(MOCK_CATEGORIES, weights)}
+        ranked = sorted(probabilities.items(), key=lambda kv: kv[1], reverse=True)
+        return {
+            "label": ranked[0][0],
+            "confidence": ranked[0][1],
+            "top_k": [{"label": label, "confidence": p} for label, p in ranked[:CLASSIFIER_TOP_K]],
+            "probabilities": probabilities,
+        }
+
+    def classify_image(self, image) -> str:
+        return self.predict_image(image)["label"]
+
+    @staticmethod
+    def _load_image(image_path: str):
+        """Decodes a file like /analyze ingest does, so both path-based entry points see the same array."""
+        return load_image(image_path, INGEST_MAX_SIDE)
+
     def classify_category(self, image_path: str) -> str:
-        categories = ["pothole", "streetlight", "garbage", "signage", "drainage", "other"]
-        return random.choice(categories)
+        return self.classify_image(self._load_image(image_path))
+
+    def detect_boxes(self, image, output_path: str = None, source_size=None) -> dict:
+        height, width = image.shape[:2]
+        scale = source_size[0] / width if source_size else 1.0
+        digest = _image_digest(image)
+        self._simulate("detect", self.detect_ms)
+
+        # Up to three boxes, placed and sized from the digest (array coordinates)
+        xyxy, conf = [], []
+        for k in range(digest[8] % 4):
+            b = digest[9 + 5 * k: 14 + 5 * k]
+            w, h = max(8, width * (0.05 + b[0] / 1024)), max(8, height * (0.05 + b[1] / 1024))
+            x1, y1 = (width - w) * b[2] / 255, (height - h) * b[3] / 255
+            xyxy.append([x1, y1, x1 + w, y1 + h])
+            conf.append(0.25 + 0.75 * b[4] / 255)
+        boxes = AIService.grade_boxes(np.array(xyxy, dtype=np.float32).reshape(-1, 4),
+                                      np.array(conf, dtype=np.float32), height, scale)
+
+        if output_path:
+            bgr = np.ascontiguousarray(image[:, :, ::-1])
+            drawn = boxes if scale == 1.0 else [dict(b, box=[int(v / scale) for v in b["box"]]) for b in boxes]
+            AIService.draw_boxes(bgr, drawn)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            cv2.imwrite(output_path, bgr)
+        image_size = list(source_size) if source_size else [width, height]
+        return {"severity": AIService.overall_severity(boxes), "boxes": boxes, "image_size": image_size}
+
+    def detect_image(self, image, output_path: str = None) -> str:
+        return self.detect_boxes(image, output_path)["severity"]
 
-    def detect_pothole_severity(self, image_path: str) -> Tuple[str, str]:
-        severities = ["High", "Medium", "Low"]
-        severity = random.choice(severities)
-        return severity, image_path  # Return same path as annotated path
+    def detect_pothole_severity(self, image_path: str, output_path: str = None) -> Tuple[str, str]:
+        severity = self.detect_image(self._load_image(image_path), output_path)
+        return severity, output_path or image_path
@@ -0,0 +1,66 @@
+# app/services/image_io.py
+import io
+import os
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Longest side uploads are reduced to before inference (0 keeps full size).
+# The classifier works at 224x224 and YOLO at 640, so 12 MP phone photos
+# carry far more pixels than either model can use.
+INGEST_MAX_SIDE = int(os.environ.get("FIXMATE_INGEST_MAX_SIDE", "1280"))
+
+EXIF_ORIENTATION = 0x0112
+# Orientations that rotate by 90 degrees and therefore swap width and height
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+# ----------------------
+# Image decoding helpers
+# ----------------------
+# Every model entry point works on the same in-memory representation:
+# an RGB uint8 ndarray of shape (H, W, 3), upright according to EXIF.
+
+def _normalize(image: Image.Image, max_side: Optional[int]) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    Applies EXIF orientation and, when max_side is set, downscales so the
+    longest side is at most max_side. Returns the array and the upright
+    (width, height) of the original image.
+
+    For JPEGs, draft() makes libjpeg decode straight to the smallest 1/2,
+    1/4 or 1/8 scale that is still at least the target size, so a large
+    photo is never materialized at full resolution.
+    """
+    width, height = image.size
+    if image.getexif().get(EXIF_ORIENTATION, 1) in _TRANSPOSED_ORIENTATIONS:
+        width, height = height, width
+
+    if max_side and max(width, height) > max_side:
+        scale = max_side / max(width, height)
+        image.draft("RGB", (int(image.size[0] * scale), int(image.size[1] * scale)))
+    image = ImageOps.exif_transpose(image)
+    if max_side and max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.BILINEAR)
+    return np.asarray(image.convert("RGB")), (width, height)
+
+def load_image(image_path: str, max_side: Optional[int] = None) -> np.ndarray:
+    """Reads an image file from disk into an RGB uint8 array."""
+    with Image.open(image_path) as image:
+        return _normalize(image, max_side)[0]
+
+def decode_image(data: bytes, max_side: Optional[int] = None) -> np.ndarray:
+    """Decodes encoded image bytes (e.g. an upload) into an RGB uint8 array."""
+    with Image.open(io.BytesIO(data)) as image:
+        return _normalize(image, max_side)[0]
+
+def ingest_image(data: bytes, max_side: int = INGEST_MAX_SIDE) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    Ingest stage for uploads: decodes once into the normalized buffer both
+    models consume, and returns the original (width, height) so detector
+    boxes can be mapped back to full-resolution coordinates.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        return _normalize(image, max_side)
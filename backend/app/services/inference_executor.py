@@ -0,0 +1,117 @@
+# app/services/inference_executor.py
+import os
+import asyncio
+import logging
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Threads that run model inference, and how many extra requests may wait for one
+INFERENCE_CONCURRENCY = int(os.environ.get("FIXMATE_INFERENCE_CONCURRENCY", "8"))
+INFERENCE_QUEUE_DEPTH = int(os.environ.get("FIXMATE_INFERENCE_QUEUE_DEPTH", "32"))
+# Seconds suggested to clients in the Retry-After header when we shed load
+INFERENCE_RETRY_AFTER = int(os.environ.get("FIXMATE_INFERENCE_RETRY_AFTER", "2"))
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the inference executor has no free slot for a new job."""
+    def __init__(self, retry_after: int = INFERENCE_RETRY_AFTER):
+        super().__init__("Inference queue is full")
+        self.retry_after = retry_after
+
+
+# ----------------------
+# Bounded inference executor
+# ----------------------
+class InferenceExecutor:
+    """
+    Runs blocking model calls on a dedicated thread pool so they never stall
+    the asyncio event loop.
+
+    At most `max_concurrency` jobs run at once and at most `max_queue` more
+    wait for a thread. Anything beyond that is rejected immediately with
+    InferenceQueueFull instead of adding latency for everyone.
+    """
+    def __init__(
+        self,
+        max_concurrency: int = INFERENCE_CONCURRENCY,
+        max_queue: int = INFERENCE_QUEUE_DEPTH,
+        retry_after: int = INFERENCE_RETRY_AFTER,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="inference")
+        self._slots = threading.BoundedSemaphore(self.max_concurrency + self.max_queue)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self.max_concurrency + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def is_saturated(self) -> bool:
+        return self._in_flight >= self.capacity
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queues fn(*args, **kwargs) or raises InferenceQueueFull."""
+        if not self._slots.acquire(blocking=False):
+            logger.warning(f"Inference queue full ({self.capacity} jobs in flight), rejecting request")
+            raise InferenceQueueFull(self.retry_after)
+        with self._lock:
+            self._in_flight += 1
+
+        # Carry context variables (e.g. per-request state) into the worker thread
+        ctx = contextvars.copy_context()
+        try:
+            future = self._pool.submit(ctx.run, fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Awaitable wrapper around submit()."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+
+# ----------------------
+# Process-wide executor
+# ----------------------
+_executor: Optional[InferenceExecutor] = None
+_executor_pid: Optional[int] = None
+_executor_lock = threading.Lock()
+
+def get_inference_executor() -> InferenceExecutor:
+    """Returns the executor for this process, creating it on first use (and after a fork)."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = InferenceExecutor()
+            _executor_pid = os.getpid()
+            logger.info(f"Inference executor ready (concurrency={_executor.max_concurrency}, "
+                        f"queue_depth={_executor.max_queue})")
+        return _executor
+
+def shutdown_inference_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(wait=False)
+        _executor = None
@@ -0,0 +1,259 @@
+# app/services/job_service.py
+import os
+import json
+import uuid
+import socket
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.job_model import AnalysisJob, JobStatus
+from app.services.analysis_service import analyze_content
+from app.services.inference_executor import get_inference_executor, InferenceQueueFull
+from app.utils import UPLOADS_DIR
+
+logger = logging.getLogger(__name__)
+
+JOBS_ENABLED = os.environ.get("FIXMATE_JOBS_ENABLED", "1") == "1"
+# How often idle workers look for queued jobs (new local jobs wake them immediately)
+JOB_POLL_SECONDS = float(os.environ.get("FIXMATE_JOB_POLL_SECONDS", "1"))
+# A running job not finished within this many seconds is assumed lost and requeued
+JOB_LEASE_SECONDS = float(os.environ.get("FIXMATE_JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("FIXMATE_JOB_MAX_ATTEMPTS", "3"))
+
+FINISHED_STATUSES = (JobStatus.DONE, JobStatus.FAILED)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# ----------------------
+# Job rows
+# ----------------------
+def create_job(db: Session, content: bytes, file_ext: str,
+               latitude: Optional[float] = None, longitude: Optional[float] = None) -> AnalysisJob:
+    """Stores the upload and queues it; the file is written before the row so workers never see a job without it."""
+    job_id = str(uuid.uuid4())
+    job = AnalysisJob(id=job_id, status=JobStatus.QUEUED, filename=f"{job_id}{file_ext}",
+                      latitude=latitude, longitude=longitude)
+    UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+    (UPLOADS_DIR / job.filename).write_bytes(content)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    get_job_runner().notify()
+    return job
+
+def get_job(db: Session, job_id: str) -> Optional[AnalysisJob]:
+    return db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+
+def job_to_dict(job: AnalysisJob, result_url=None) -> dict:
+    """Serializes a job; result_url(path) turns stored image paths into absolute URLs."""
+    data = {
+        "job_id": job.id,
+        "status": job.status.value,
+        "attempts": job.attempts,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.status == JobStatus.DONE and job.result:
+        result = json.loads(job.result)
+        if result_url:
+            result["image_url"] = result_url(result.get("image_path"))
+            for duplicate in result.get("duplicates", []):
+                duplicate["image_url"] = result_url(duplicate.get("image_path"))
+        data["result"] = result
+    if job.status == JobStatus.FAILED:
+        data["error"] = job.error
+    return data
+
+
+# ----------------------
+# Background job runner
+# ----------------------
+class JobRunner:
+    """
+    Claims queued jobs from the `analysis_jobs` table and runs them through
+    the same pipeline as /api/analyze, using at most the inference
+    executor's concurrency.
+
+    Claiming is a conditional UPDATE (queued -> running), so any number of
+    server workers sharing the database can poll the table and each job is
+    taken exactly once. Jobs left running by a process that died (same host,
+    pid gone) are requeued at startup; elsewhere they are requeued once
+    their lease expires.
+    """
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.worker_id = _worker_id()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running: set = set()
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="analysis-job-runner")
+        logger.info(f"Analysis job runner started ({self.worker_id})")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, *self._running, return_exceptions=True)
+        self._task = None
+        # Jobs interrupted here go back to the queue for the next worker
+        await asyncio.to_thread(self._requeue, lambda job: job.worker == self.worker_id, count_attempt=False)
+
+    def notify(self) -> None:
+        """Wakes the runner when this process queues a job (safe to call from any thread)."""
+        if self._wakeup is not None and self._task is not None:
+            self._task.get_loop().call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self) -> None:
+        await asyncio.to_thread(self._recover)
+        executor = get_inference_executor()
+        while True:
+            try:
+                while len(self._running) < executor.max_concurrency and not executor.is_saturated():
+                    job_id = await asyncio.to_thread(self._claim_next)
+                    if job_id is None:
+                        break
+                    task = asyncio.create_task(self._process(job_id))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job runner poll failed")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _recover(self) -> None:
+        """Requeues jobs whose worker is gone: dead local pids now, anything else once its lease expires."""
+        host = socket.gethostname()
+        def is_orphan(job: AnalysisJob) -> bool:
+            owner_host, _, pid = (job.worker or "").rpartition(":")
+            return owner_host == host and pid.isdigit() and not _pid_alive(int(pid))
+        self._requeue(is_orphan)
+
+    def _requeue(self, predicate, count_attempt: bool = True) -> None:
+        db = self.session_factory()
+        try:
+            for job in db.query(AnalysisJob).filter(AnalysisJob.status == JobStatus.RUNNING).all():
+                if not predicate(job):
+                    continue
+                owner = job.worker or "unknown worker"
+                if not count_attempt:
+                    job.attempts = max(0, job.attempts - 1)
+                if job.attempts >= JOB_MAX_ATTEMPTS:
+                    job.status = JobStatus.FAILED
+                    job.error = f"Gave up after {job.attempts} attempt(s)"
+                    job.finished_at = _now()
+                else:
+                    job.status = JobStatus.QUEUED
+                    job.worker = None
+                logger.info(f"Recovered job {job.id} from {owner}: {job.status.value}")
+            db.commit()
+        except Exception:
+            logger.exception("Failed to requeue analysis jobs")
+            db.rollback()
+        finally:
+            db.close()
+
+    def _claim_next(self) -> Optional[str]:
+        db = self.session_factory()
+        try:
+            # Expired leases first: their worker is presumed dead
+            expired = _now() - timedelta(seconds=JOB_LEASE_SECONDS)
+            stale = db.query(AnalysisJob.id).filter(
+                AnalysisJob.status == JobStatus.RUNNING, AnalysisJob.started_at < expired
+            ).all()
+            if stale:
+                stale_ids = {row.id for row in stale}
+                db.close()
+                self._requeue(lambda job: job.id in stale_ids)
+                db = self.session_factory()
+
+            candidates = db.query(AnalysisJob.id).filter(AnalysisJob.status == JobStatus.QUEUED) \
+                .order_by(AnalysisJob.created_at).limit(8).all()
+            for (job_id,) in candidates:
+                claimed = db.query(AnalysisJob).filter(
+                    AnalysisJob.id == job_id, AnalysisJob.status == JobStatus.QUEUED
+                ).update({
+                    AnalysisJob.status: JobStatus.RUNNING,
+                    AnalysisJob.worker: self.worker_id,
+                    AnalysisJob.started_at: _now(),
+                    AnalysisJob.attempts: AnalysisJob.attempts + 1,
+                }, synchronize_session=False)
+                db.commit()
+                if claimed:
+                    return job_id
+            return None
+        finally:
+            db.close()
+
+    async def _process(self, job_id: str) -> None:
+        db = self.session_factory()
+        try:
+            job = get_job(db, job_id)
+            path = UPLOADS_DIR / job.filename
+            try:
+                content = await asyncio.to_thread(path.read_bytes)
+                result = await analyze_content(content, job.filename, job.latitude, job.longitude, db, saved=True)
+            except InferenceQueueFull:
+                # Interactive traffic took the slots; try again on a later poll
+                job.status = JobStatus.QUEUED
+                job.worker = None
+                job.attempts = max(0, job.attempts - 1)
+                db.commit()
+                return
+            except Exception as e:
+                logger.exception(f"Analysis job {job_id} failed")
+                job.status = JobStatus.FAILED
+                job.error = "Uploaded image is missing" if isinstance(e, FileNotFoundError) else "Analysis failed"
+            else:
+                job.status = JobStatus.DONE
+                job.result = json.dumps(result)
+            job.finished_at = _now()
+            db.commit()
+            logger.debug(f"Analysis job {job_id} {job.status.value}")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"Failed to record outcome of analysis job {job_id}")
+            db.rollback()
+        finally:
+            db.close()
+
+
+_runner: Optional[JobRunner] = None
+
+def get_job_runner() -> JobRunner:
+    global _runner
+    if _runner is None:
+        _runner = JobRunner()
+    return _runner
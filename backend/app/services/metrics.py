@@ -0,0 +1,132 @@
+# app/services/metrics.py
+import time
+import bisect
+import threading
+import contextvars
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# ----------------------
+# In-process metrics registry
+# ----------------------
+# Cheap enough to call on every request; exposed by GET /api/metrics.
+_lock = threading.Lock()
+_counters: Dict[str, int] = defaultdict(int)
+
+def increment(name: str, value: int = 1) -> None:
+    with _lock:
+        _counters[name] += value
+
+def get_counter(name: str) -> int:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+# ----------------------
+# Latency histograms
+# ----------------------
+# Fixed buckets (upper bounds, ms): observing is a bisect and two additions.
+BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+class Histogram:
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS_MS, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation (None above the last bound)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, n in zip(BUCKETS_MS, self.counts):
+            cumulative += n
+            if cumulative >= rank:
+                return bound
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": {str(b): n for b, n in zip(BUCKETS_MS + ("+Inf",), self.counts)},
+        }
+
+_histograms: Dict[str, Histogram] = defaultdict(Histogram)
+
+def observe(name: str, value_ms: float) -> None:
+    with _lock:
+        _histograms[name].observe(value_ms)
+
+
+# ----------------------
+# Per-request stage timings (Server-Timing)
+# ----------------------
+# Holds the list of (stage, ms) for the request being served. Context vars
+# follow the request into asyncio.to_thread and the inference executor.
+_request_stages: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = \
+    contextvars.ContextVar("request_stages", default=None)
+
+def start_request() -> List[Tuple[str, float]]:
+    stages: List[Tuple[str, float]] = []
+    _request_stages.set(stages)
+    return stages
+
+def record_stage(stage: str, value_ms: float) -> None:
+    """Adds a timing to the stage histogram and, inside a request, to its Server-Timing."""
+    observe(f"stage.{stage}", value_ms)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages.append((stage, value_ms))
+
+class timed:
+    """Context manager timing a block as one pipeline stage: `with metrics.timed("decode"): ...`"""
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_stage(self.stage, (time.perf_counter() - self.start) * 1000)
+        return False
+
+def timed_call(stage: str, fn, *args, **kwargs):
+    """Runs fn(*args, **kwargs) as one stage; handy with asyncio.to_thread and executors."""
+    with timed(stage):
+        return fn(*args, **kwargs)
+
+def server_timing_header(stages: List[Tuple[str, float]]) -> str:
+    """Formats stages as a Server-Timing header; repeated stages (e.g. batches) are summed."""
+    totals: Dict[str, float] = {}
+    for stage, value_ms in list(stages):
+        totals[stage] = totals.get(stage, 0.0) + value_ms
+    return ", ".join(f"{stage.replace('.', '-')};dur={value_ms:.1f}" for stage, value_ms in totals.items())
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {
+            "counters": dict(sorted(_counters.items())),
+            "histograms": {name: h.to_dict() for name, h in sorted(_histograms.items())},
+        }
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
@@ -0,0 +1,101 @@
+# app/services/model_registry.py
+import os
+import re
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Default (unversioned) model files, used when the registry is empty
+DEFAULT_FILES = {
+    "classifier": os.path.join(BASE_DIR, "models", "classification", "best_model.pth"),
+    "class_mapping": os.path.join(BASE_DIR, "models", "classification", "class_mapping.json"),
+    "detector": os.path.join(BASE_DIR, "models", "detection", "best_severity_check.pt"),
+}
+# Layout of one version inside the registry, relative to its directory
+VERSION_LAYOUT = {
+    "classifier": os.path.join("classification", "best_model.pth"),
+    "class_mapping": os.path.join("classification", "class_mapping.json"),
+    "detector": os.path.join("detection", "best_severity_check.pt"),
+}
+
+# One sub-directory per version; the ACTIVE file names the version to serve
+REGISTRY_DIR = os.environ.get("FIXMATE_MODEL_REGISTRY", os.path.join(BASE_DIR, "models", "registry"))
+ACTIVE_FILE = "ACTIVE"
+VERSION_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+
+# ----------------------
+# Versioned model registry
+# ----------------------
+# registry/
+#   ACTIVE                 <- e.g. "2025-10-03-retrain"
+#   2025-09-27/classification/best_model.pth, class_mapping.json
+#   2025-10-03-retrain/classification/best_model.pth
+#   2025-10-03-retrain/detection/best_severity_check.pt
+#
+# A version only needs the files that changed; anything missing falls back
+# to the default files under app/models. Engine artifacts (ONNX, INT8,
+# calibration) are looked up next to each version's weights as usual.
+
+def list_versions() -> List[dict]:
+    active = active_version()
+    versions = []
+    if os.path.isdir(REGISTRY_DIR):
+        for name in sorted(os.listdir(REGISTRY_DIR)):
+            path = os.path.join(REGISTRY_DIR, name)
+            if not os.path.isdir(path) or not VERSION_NAME.match(name):
+                continue
+            versions.append({
+                "name": name,
+                "active": name == active,
+                "files": {k: os.path.exists(os.path.join(path, rel)) for k, rel in VERSION_LAYOUT.items()},
+            })
+    return versions
+
+def active_version() -> Optional[str]:
+    """The version named in the ACTIVE file, or None to serve the default files."""
+    try:
+        with open(os.path.join(REGISTRY_DIR, ACTIVE_FILE), "r") as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return name or None
+
+def active_marker_mtime() -> Optional[float]:
+    try:
+        return os.path.getmtime(os.path.join(REGISTRY_DIR, ACTIVE_FILE))
+    except FileNotFoundError:
+        return None
+
+def set_active_version(name: Optional[str]) -> None:
+    """
+    Points ACTIVE at a version (None = default files); the rename makes the
+    switch atomic for readers in other workers.
+    """
+    path = os.path.join(REGISTRY_DIR, ACTIVE_FILE)
+    if name is None:
+        if os.path.exists(path):
+            os.remove(path)
+        logger.info("Model registry: serving the default model files")
+        return
+    resolve_files(name)  # validates
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(name + "\n")
+    os.replace(tmp_path, path)
+    logger.info(f"Model registry: active version set to '{name}'")
+
+def resolve_files(name: Optional[str]) -> dict:
+    """Returns the classifier / class mapping / detector paths for a version (None = defaults)."""
+    if name is None:
+        return dict(DEFAULT_FILES)
+    version_dir = os.path.join(REGISTRY_DIR, name)
+    if not VERSION_NAME.match(name) or not os.path.isdir(version_dir):
+        raise ValueError(f"Unknown model version '{name}'")
+    files = {}
+    for key, rel in VERSION_LAYOUT.items():
+        path = os.path.join(version_dir, rel)
+        files[key] = path if os.path.exists(path) else DEFAULT_FILES[key]
+    return files
@@ -0,0 +1,265 @@
+# app/services/process_pool.py
+import os
+import time
+import queue
+import logging
+import threading
+import itertools
+import multiprocessing as mp
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.services import metrics
+from app.services.image_io import load_image
+from app.services.ai_service import DetectorDisabledError
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for every worker to load its models, and for a single task
+PROCESS_START_TIMEOUT = float(os.environ.get("FIXMATE_PROCESS_START_TIMEOUT", "300"))
+PROCESS_TASK_TIMEOUT = float(os.environ.get("FIXMATE_PROCESS_TASK_TIMEOUT", "120"))
+# How often the dispatcher checks for dead workers, and the minimum time
+# between two starts of the same worker (so a crash loop does not spin)
+WORKER_CHECK_SECONDS = 0.5
+WORKER_RESTART_DELAY = 5.0
+
+
+# ----------------------
+# Worker process
+# ----------------------
+def _worker_main(worker_id: int, num_workers: int, tasks, results) -> None:
+    """Loads its own models, then serves tasks until it receives None."""
+    try:
+        from app.services.ai_service import AIModelManager, AIService, WARMUP_ENABLED
+        from app.services.model_registry import active_version
+        from app.services.thread_budget import SERVER_WORKERS, compute_budget
+        # Split the cores between every worker on the box instead of letting each one grab all of them
+        budget = compute_budget(processes=num_workers * SERVER_WORKERS)
+        model_manager = AIModelManager(registry_version=active_version(), thread_budget=budget)
+        if WARMUP_ENABLED:
+            model_manager.warmup()
+        from app.services.shadow import create_shadow_evaluator
+        # Tasks arrive one at a time, so there is nothing to coalesce
+        service = AIService(model_manager, batch_max_size=1, shadow=create_shadow_evaluator())
+    except Exception as e:
+        results.put((None, "failed", f"worker {worker_id}: {e!r}"))
+        return
+    results.put((None, "ready", dict(service.status(), worker=worker_id, pid=os.getpid())))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, method, shm_name, shape, dtype, kwargs = task
+        shm = None
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name)
+            image = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+            try:
+                result = getattr(service, method)(image, **kwargs)
+            finally:
+                # The view must be released before the segment can be closed
+                del image
+            results.put((task_id, "ok", result))
+        except DetectorDisabledError as e:
+            results.put((task_id, "detector_disabled", str(e)))
+        except Exception as e:
+            results.put((task_id, "error", f"{method} failed in worker {worker_id}: {e!r}"))
+        finally:
+            if shm is not None:
+                shm.close()
+
+
+# ----------------------
+# Process-pool AI service
+# ----------------------
+class ProcessPoolAIService:
+    """
+    Drop-in replacement for AIService that runs inference in N worker
+    processes, each holding its own AIModelManager.
+
+    Images are decoded in the API process and handed to workers through a
+    shared-memory segment; only the segment name, shape and dtype travel
+    over the task queue, so pixel buffers are never pickled.
+
+    Each worker has its own task queue and tasks go to the worker with the
+    fewest outstanding tasks, so when a worker dies (OOM kill, segfault) its
+    tasks are known: they fail at once and the worker is restarted.
+    """
+    def __init__(self, num_workers: int):
+        self.num_workers = max(1, num_workers)
+        self._ctx = mp.get_context("spawn")
+        self._results = self._ctx.Queue()
+        self._pending: Dict[int, Future] = {}
+        self._pending_lock = threading.Lock()
+        self._task_ids = itertools.count()
+        self._closing = False
+        self.model_version = None
+        self.worker_status: Dict[int, dict] = {}
+
+        self._workers = [self._start_worker(i) for i in range(self.num_workers)]
+        try:
+            self._wait_until_ready()
+        except Exception:
+            self.close()
+            raise
+
+        self._dispatcher = threading.Thread(target=self._dispatch_results, name="inference-results", daemon=True)
+        self._dispatcher.start()
+        logger.info(f"Process-pool AI service ready with {self.num_workers} worker(s).")
+
+    def _start_worker(self, worker_id: int) -> dict:
+        tasks = self._ctx.Queue()
+        proc = self._ctx.Process(target=_worker_main, args=(worker_id, self.num_workers, tasks, self._results),
+                                 name=f"inference-worker-{worker_id}", daemon=True)
+        proc.start()
+        return {"id": worker_id, "proc": proc, "tasks": tasks, "task_ids": set(),
+                "ready": False, "started_at": time.monotonic()}
+
+    def _wait_until_ready(self) -> None:
+        ready = 0
+        while ready < self.num_workers:
+            try:
+                _, status, detail = self._results.get(timeout=PROCESS_START_TIMEOUT)
+            except queue.Empty:
+                raise RuntimeError(f"Inference workers did not start within {PROCESS_START_TIMEOUT}s")
+            if status != "ready":
+                raise RuntimeError(detail)
+            self._mark_ready(detail)
+            ready += 1
+
+    def _mark_ready(self, detail: dict) -> None:
+        self.model_version = detail["model_version"]
+        self.worker_status[detail["worker"]] = detail
+        self._workers[detail["worker"]]["ready"] = True
+
+    def _dispatch_results(self) -> None:
+        while True:
+            try:
+                message = self._results.get(timeout=WORKER_CHECK_SECONDS)
+            except queue.Empty:
+                message = ()
+            if message is None:
+                break
+            if message:
+                self._handle(*message)
+            self._check_workers()
+
+    def _handle(self, task_id, status: str, payload) -> None:
+        if task_id is None:
+            # Start-up report of a restarted worker
+            if status == "ready":
+                self._mark_ready(payload)
+                logger.info(f"Inference worker {payload['worker']} restarted (pid {payload['pid']}).")
+            else:
+                logger.error(f"Inference worker failed to restart: {payload}")
+            return
+        with self._pending_lock:
+            future = self._pending.pop(task_id, None)
+            for worker in self._workers:
+                worker["task_ids"].discard(task_id)
+        if future is None:
+            return
+        if status == "ok":
+            future.set_result(payload)
+        elif status == "detector_disabled":
+            future.set_exception(DetectorDisabledError(payload))
+        else:
+            future.set_exception(RuntimeError(payload))
+
+    def _check_workers(self) -> None:
+        """Fails the tasks of dead workers and starts replacements."""
+        for i, worker in enumerate(self._workers):
+            exitcode = worker["proc"].exitcode
+            if exitcode is None or self._closing:
+                continue
+            with self._pending_lock:
+                lost = [self._pending.pop(t) for t in worker["task_ids"] if t in self._pending]
+                worker["task_ids"].clear()
+                worker["ready"] = False
+            for future in lost:
+                future.set_exception(RuntimeError(f"inference worker {i} died (exit code {exitcode})"))
+            # A worker that cannot even start is retried at most every WORKER_RESTART_DELAY seconds
+            if time.monotonic() - worker["started_at"] < WORKER_RESTART_DELAY:
+                continue
+            logger.error(f"Inference worker {i} (pid {worker['proc'].pid}) died with exit code {exitcode}; "
+                         f"failed {len(lost)} task(s), restarting it.")
+            metrics.increment("process_pool.worker_restarts")
+            worker["proc"].join(timeout=0)
+            self.worker_status.pop(i, None)
+            with self._pending_lock:
+                self._workers[i] = self._start_worker(i)
+
+    def _pick_worker(self) -> dict:
+        """The ready worker with the fewest outstanding tasks (any live one while all are restarting)."""
+        candidates = [w for w in self._workers if w["ready"]] or \
+                     [w for w in self._workers if w["proc"].exitcode is None] or self._workers
+        return min(candidates, key=lambda w: len(w["task_ids"]))
+
+    def _call(self, method: str, image: np.ndarray, **kwargs) -> Any:
+        image = np.ascontiguousarray(image)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, image.nbytes))
+        task_id = next(self._task_ids)
+        future: Future = Future()
+        try:
+            np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)[:] = image
+            with self._pending_lock:
+                worker = self._pick_worker()
+                self._pending[task_id] = future
+                worker["task_ids"].add(task_id)
+            worker["tasks"].put((task_id, method, shm.name, image.shape, image.dtype.str, kwargs))
+            return future.result(timeout=PROCESS_TASK_TIMEOUT)
+        finally:
+            with self._pending_lock:
+                self._pending.pop(task_id, None)
+                for w in self._workers:
+                    w["task_ids"].discard(task_id)
+            shm.close()
+            shm.unlink()
+
+    # ----------------------
+    # AIService interface
+    # ----------------------
+    def status(self) -> dict:
+        return {
+            "model_version": self.model_version,
+            "mode": "process",
+            "workers": [self.worker_status[i] for i in sorted(self.worker_status)],
+        }
+
+    def predict_image(self, image: np.ndarray) -> dict:
+        with metrics.timed("classify"):
+            return self._call("predict_image", image)
+
+    def classify_image(self, image: np.ndarray) -> str:
+        return self.predict_image(image)["label"]
+
+    def classify_category(self, image_path: str) -> str:
+        category = self.classify_image(load_image(image_path))
+        logger.info(f"Image '{image_path}' classified as '{category}'.")
+        return category
+
+    def detect_boxes(self, image: np.ndarray, output_path: Optional[str] = None,
+                     source_size: Optional[Tuple[int, int]] = None) -> dict:
+        with metrics.timed("detect"):
+            return self._call("detect_boxes", image, output_path=output_path, source_size=source_size)
+
+    def detect_image(self, image: np.ndarray, output_path: Optional[str] = None) -> str:
+        return self.detect_boxes(image, output_path)["severity"]
+
+    def detect_pothole_severity(self, image_path: str, output_path: str = None) -> Tuple[str, str]:
+        severity = self.detect_image(load_image(image_path), output_path)
+        return severity, output_path or image_path
+
+    def close(self) -> None:
+        self._closing = True
+        for worker in self._workers:
+            worker["tasks"].put(None)
+        for worker in self._workers:
+            worker["proc"].join(timeout=5)
+            if worker["proc"].is_alive():
+                worker["proc"].terminate()
+        self._results.put(None)
@@ -0,0 +1,201 @@
+# app/services/result_cache.py
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.database import SessionLocal
+from app.models.inference_model import InferenceCacheEntry
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.environ.get("FIXMATE_CACHE_ENABLED", "1") == "1"
+# Entries kept in the per-process LRU tier
+CACHE_MEMORY_ITEMS = int(os.environ.get("FIXMATE_CACHE_MEMORY_ITEMS", "1024"))
+# The SQLite tier is trimmed by age and size, never by model version: other
+# replicas (rolling deploys, other engines) may still be serving other versions
+CACHE_MAX_AGE_DAYS = float(os.environ.get("FIXMATE_CACHE_MAX_AGE_DAYS", "30"))
+CACHE_MAX_ROWS = int(os.environ.get("FIXMATE_CACHE_MAX_ROWS", "100000"))
+CACHE_PURGE_SECONDS = float(os.environ.get("FIXMATE_CACHE_PURGE_SECONDS", "3600"))
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+# ----------------------
+# Two-tier result cache
+# ----------------------
+class ResultCache:
+    """
+    Caches analysis results by (image content hash, model version).
+
+    Lookups hit a small in-memory LRU first, then the `inference_cache`
+    SQLite table, which survives restarts and is shared by every worker
+    using the same database. Because the model version is part of the key,
+    loading a new model makes old entries unreachable; purge() ages them
+    out of the table along with anything beyond the row cap.
+    """
+    def __init__(self, max_items: int = CACHE_MEMORY_ITEMS, session_factory=SessionLocal,
+                 max_age_days: float = CACHE_MAX_AGE_DAYS, max_rows: int = CACHE_MAX_ROWS,
+                 purge_interval: float = CACHE_PURGE_SECONDS):
+        self.max_items = max(0, max_items)
+        self.session_factory = session_factory
+        self.max_age_days = max_age_days
+        self.max_rows = max_rows
+        self.purge_interval = purge_interval
+        self._lru: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_purge: Optional[float] = None
+
+    def get(self, digest: str, model_version: str) -> Optional[dict]:
+        key = (digest, model_version)
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+        if entry is not None:
+            metrics.increment("inference_cache.hit.memory")
+            return entry
+
+        db = self.session_factory()
+        try:
+            row = db.query(InferenceCacheEntry).filter(
+                InferenceCacheEntry.content_hash == digest,
+                InferenceCacheEntry.model_version == model_version,
+            ).first()
+            entry = self._row_to_dict(row) if row else None
+        except Exception:
+            logger.exception("Inference cache lookup failed")
+            entry = None
+        finally:
+            db.close()
+
+        if entry is None:
+            metrics.increment("inference_cache.miss")
+            return None
+        metrics.increment("inference_cache.hit.sqlite")
+        self._remember(key, entry)
+        return entry
+
+    def put(self, digest: str, model_version: str, category: str, severity: str,
+            annotated_path: Optional[str] = None, details: Optional[dict] = None) -> None:
+        entry = {
+            "category": category,
+            "severity": severity,
+            "annotated_path": annotated_path,
+            "details": details,
+        }
+        self._remember((digest, model_version), entry)
+
+        db = self.session_factory()
+        try:
+            db.merge(InferenceCacheEntry(
+                content_hash=digest,
+                model_version=model_version,
+                category=category,
+                severity=severity,
+                annotated_path=annotated_path,
+                details=json.dumps(details) if details is not None else None,
+            ))
+            db.commit()
+            metrics.increment("inference_cache.store")
+        except Exception:
+            logger.exception("Failed to persist inference cache entry")
+            db.rollback()
+        finally:
+            db.close()
+
+        self._maybe_purge()
+
+    def invalidate(self, digest: str, model_version: str) -> None:
+        with self._lock:
+            self._lru.pop((digest, model_version), None)
+        db = self.session_factory()
+        try:
+            db.query(InferenceCacheEntry).filter(
+                InferenceCacheEntry.content_hash == digest,
+                InferenceCacheEntry.model_version == model_version,
+            ).delete()
+            db.commit()
+        except Exception:
+            logger.exception("Failed to invalidate inference cache entry")
+            db.rollback()
+        finally:
+            db.close()
+
+    def _maybe_purge(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self._last_purge is not None and now - self._last_purge < self.purge_interval:
+                return
+            self._last_purge = now
+        self.purge()
+
+    def purge(self) -> int:
+        """Deletes rows older than max_age_days, then the oldest rows beyond max_rows; returns the count."""
+        db = self.session_factory()
+        removed = 0
+        try:
+            if self.max_age_days > 0:
+                cutoff = datetime.now(timezone.utc) - timedelta(days=self.max_age_days)
+                removed += db.query(InferenceCacheEntry).filter(
+                    InferenceCacheEntry.created_at < cutoff
+                ).delete(synchronize_session=False)
+            if self.max_rows > 0:
+                excess = db.query(InferenceCacheEntry).count() - self.max_rows
+                if excess > 0:
+                    oldest = db.query(InferenceCacheEntry.content_hash, InferenceCacheEntry.model_version) \
+                        .order_by(InferenceCacheEntry.created_at).limit(excess).all()
+                    for digest, version in oldest:
+                        removed += db.query(InferenceCacheEntry).filter(
+                            InferenceCacheEntry.content_hash == digest,
+                            InferenceCacheEntry.model_version == version,
+                        ).delete(synchronize_session=False)
+            db.commit()
+            if removed:
+                logger.info(f"Purged {removed} old inference cache entries.")
+        except Exception:
+            logger.exception("Failed to purge old inference cache entries")
+            db.rollback()
+        finally:
+            db.close()
+        return removed
+
+    def _remember(self, key: tuple, entry: dict) -> None:
+        if self.max_items == 0:
+            return
+        with self._lock:
+            self._lru[key] = entry
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_items:
+                self._lru.popitem(last=False)
+
+    @staticmethod
+    def _row_to_dict(row: InferenceCacheEntry) -> dict:
+        return {
+            "category": row.category,
+            "severity": row.severity,
+            "annotated_path": row.annotated_path,
+            "details": json.loads(row.details) if row.details else None,
+        }
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Returns the process-wide cache, or None when caching is disabled."""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+        return _cache
@@ -0,0 +1,171 @@
+# app/services/shadow.py
+import os
+import time
+import random
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+
+from app.database import SessionLocal
+from app.models.inference_model import ShadowResult
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+# Registry version of the candidate classifier (unset = shadow evaluation off)
+SHADOW_VERSION = os.environ.get("FIXMATE_SHADOW_VERSION") or None
+# Fraction of classified images also sent to the candidate
+SHADOW_SAMPLE_RATE = float(os.environ.get("FIXMATE_SHADOW_SAMPLE_RATE", "0.1"))
+# Sampled images allowed to wait for the candidate; more are dropped, never queued
+SHADOW_MAX_PENDING = int(os.environ.get("FIXMATE_SHADOW_MAX_PENDING", "32"))
+
+
+# ----------------------
+# Shadow evaluator
+# ----------------------
+class ShadowEvaluator:
+    """
+    Classifies a sample of live traffic with a candidate model and records
+    how it compares with the serving model.
+
+    Runs on its own single thread after the primary prediction has been
+    returned, so it never adds latency to a response; when it falls behind,
+    new samples are dropped rather than queued.
+    """
+    def __init__(self, model_manager, sample_rate: float = SHADOW_SAMPLE_RATE,
+                 max_pending: int = SHADOW_MAX_PENDING, session_factory=SessionLocal):
+        self.models = model_manager
+        self.candidate_version = model_manager.model_version
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self.session_factory = session_factory
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def maybe_submit(self, input_tensor: torch.Tensor, primary: dict, primary_version: str, primary_ms: float) -> None:
+        """Samples one classified image; input_tensor is the already preprocessed (C, H, W) input."""
+        if random.random() >= self.sample_rate:
+            return
+        with self._lock:
+            if self._pending >= self.max_pending:
+                metrics.increment("shadow.dropped")
+                return
+            self._pending += 1
+        self._pool.submit(self._evaluate, input_tensor, primary, primary_version, primary_ms)
+
+    def _evaluate(self, input_tensor: torch.Tensor, primary: dict, primary_version: str, primary_ms: float) -> None:
+        try:
+            start = time.perf_counter()
+            with torch.no_grad():
+                outputs = self.models.class_model(input_tensor.unsqueeze(0).to(self.models.device))
+                probabilities = torch.softmax(outputs.float() / self.models.temperature, dim=1)[0].cpu()
+            candidate_ms = (time.perf_counter() - start) * 1000
+            confidence, index = torch.max(probabilities, 0)
+            candidate_label = self.models.class_names[index.item()]
+            self._record(ShadowResult(
+                candidate_version=self.candidate_version,
+                primary_version=primary_version,
+                primary_label=primary["label"],
+                candidate_label=candidate_label,
+                agree=candidate_label == primary["label"],
+                primary_confidence=primary["confidence"],
+                candidate_confidence=round(confidence.item(), 4),
+                primary_ms=round(primary_ms, 2),
+                candidate_ms=round(candidate_ms, 2),
+            ))
+            metrics.increment("shadow.evaluated")
+        except Exception:
+            logger.exception("Shadow evaluation failed")
+            metrics.increment("shadow.failed")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _record(self, row: ShadowResult) -> None:
+        db = self.session_factory()
+        try:
+            db.add(row)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+
+
+def create_shadow_evaluator() -> Optional[ShadowEvaluator]:
+    """Loads the configured candidate classifier (no detector), or returns None when shadowing is off."""
+    if not SHADOW_VERSION or SHADOW_SAMPLE_RATE <= 0:
+        return None
+    from app.services.ai_service import AIModelManager, WARMUP_ENABLED
+    try:
+        model_manager = AIModelManager(registry_version=SHADOW_VERSION, detector_load="disabled")
+        if WARMUP_ENABLED:
+            model_manager.warmup()
+    except Exception:
+        logger.exception(f"Failed to load shadow candidate '{SHADOW_VERSION}'; shadow evaluation disabled.")
+        return None
+    logger.info(f"Shadow evaluation of {model_manager.model_version} on {SHADOW_SAMPLE_RATE:.0%} of traffic.")
+    return ShadowEvaluator(model_manager)
+
+
+# ----------------------
+# Summary
+# ----------------------
+def _percentiles(values: List[float]) -> Optional[Dict[str, float]]:
+    if not values:
+        return None
+    p50, p95, p99 = np.percentile(np.asarray(values), [50, 95, 99])
+    return {"p50": round(float(p50), 2), "p95": round(float(p95), 2), "p99": round(float(p99), 2)}
+
+def summarize(db, candidate_version: Optional[str] = None) -> List[dict]:
+    """Agreement rate, confusion (primary label -> candidate label counts) and latency per candidate."""
+    query = db.query(
+        ShadowResult.candidate_version, ShadowResult.primary_label, ShadowResult.candidate_label,
+        ShadowResult.agree, ShadowResult.primary_ms, ShadowResult.candidate_ms,
+    )
+    if candidate_version:
+        query = query.filter(ShadowResult.candidate_version == candidate_version)
+
+    groups: Dict[str, dict] = {}
+    for version, primary_label, candidate_label, agree, primary_ms, candidate_ms in query.yield_per(1000):
+        group = groups.setdefault(version, {
+            "samples": 0, "agreements": 0,
+            "confusion": defaultdict(lambda: defaultdict(int)),
+            "primary_ms": [], "candidate_ms": [],
+        })
+        group["samples"] += 1
+        group["agreements"] += int(agree)
+        group["confusion"][primary_label][candidate_label] += 1
+        if primary_ms is not None:
+            group["primary_ms"].append(primary_ms)
+        if candidate_ms is not None:
+            group["candidate_ms"].append(candidate_ms)
+
+    summaries = []
+    for version, group in sorted(groups.items()):
+        confusion = group["confusion"]
+        summaries.append({
+            "candidate_version": version,
+            "samples": group["samples"],
+            "agreement_rate": round(group["agreements"] / group["samples"], 4),
+            # Of the images the primary gave each label, how often the candidate agreed
+            "per_class_agreement": {
+                label: round(row.get(label, 0) / sum(row.values()), 4) for label, row in sorted(confusion.items())
+            },
+            "confusion": {label: dict(row) for label, row in sorted(confusion.items())},
+            "latency_ms": {
+                "primary": _percentiles(group["primary_ms"]),
+                "candidate": _percentiles(group["candidate_ms"]),
+            },
+        })
+    return summaries
@@ -0,0 +1,63 @@
+# app/services/slicing.py
+import os
+import logging
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ----------------------
+# Sliced (tiled) detection policy
+# ----------------------
+# YOLO letterboxes every input to 640 px, so a pothole that is 30 px wide in
+# a 4000 px dashcam frame shrinks to a few pixels. In sliced mode the
+# detector also sees overlapping native-resolution tiles of the image
+# (SLICE_BATCH inputs per YOLO call) as well as the whole frame, and the
+# boxes are merged with NMS. Sliced images bypass the detector micro-batcher
+# and run one at a time.
+#
+#   off    - whole frame only (default)
+#   auto   - slice images whose longest side is at least SLICE_MIN_SIDE
+#   always - slice every image larger than one tile
+SLICE_MODES = ("off", "auto", "always")
+SLICE_MODE = os.environ.get("FIXMATE_SLICED_DETECTION", "off").lower()
+if SLICE_MODE not in SLICE_MODES:
+    logger.warning(f"Unknown sliced detection mode '{SLICE_MODE}', using 'off'.")
+    SLICE_MODE = "off"
+SLICE_MIN_SIDE = int(os.environ.get("FIXMATE_SLICE_MIN_SIDE", "1920"))
+SLICE_TILE = int(os.environ.get("FIXMATE_SLICE_TILE", "640"))
+SLICE_OVERLAP = float(os.environ.get("FIXMATE_SLICE_OVERLAP", "0.2"))
+SLICE_NMS_IOU = float(os.environ.get("FIXMATE_SLICE_NMS_IOU", "0.5"))
+# Tiles (plus the whole frame) per YOLO call
+SLICE_BATCH = max(1, int(os.environ.get("FIXMATE_SLICE_BATCH", "8")))
+# Ingest stays at INGEST_MAX_SIDE for the classifier, hash and cascade;
+# tiles of that thumbnail would add nothing the whole-frame pass does not
+# already see, so an image that will be sliced is decoded again for the
+# detector alone, with its longest side capped here
+SLICE_MAX_SIDE = int(os.environ.get("FIXMATE_SLICE_MAX_SIDE", "4096"))
+
+
+def should_slice(width: int, height: int) -> bool:
+    if SLICE_MODE == "off" or max(width, height) <= SLICE_TILE:
+        return False
+    return SLICE_MODE == "always" or max(width, height) >= SLICE_MIN_SIDE
+
+def needs_detector_decode(source_size: Tuple[int, int], ingested_size: Tuple[int, int]) -> bool:
+    """Whether an original of source_size will be sliced and has more detail than the ingest buffer."""
+    return should_slice(*source_size) and max(source_size) > max(ingested_size)
+
+def _starts(length: int, tile: int, stride: int) -> List[int]:
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile, stride))
+    starts.append(length - tile)  # last tile flush with the edge
+    return starts
+
+def tile_windows(width: int, height: int, tile: int = SLICE_TILE,
+                 overlap: float = SLICE_OVERLAP) -> List[Tuple[int, int, int, int]]:
+    """(x1, y1, x2, y2) windows of at most tile x tile covering the image with the given overlap."""
+    stride = max(1, int(tile * (1 - overlap)))
+    return [
+        (x, y, min(x + tile, width), min(y + tile, height))
+        for y in _starts(height, tile, stride)
+        for x in _starts(width, tile, stride)
+    ]
@@ -0,0 +1,130 @@
+# app/services/thread_budget.py
+import os
+import sys
+import logging
+import threading
+import multiprocessing
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))  # respects taskset / container cpusets
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.environ.get(name, "").strip()
+    return int(value) if value else None
+
+def _cli_workers(argv: List[str]) -> Optional[int]:
+    """
+    `--workers N` from the server command line. uvicorn does not export it,
+    but the workers it spawns inherit the parent's sys.argv.
+    """
+    for i, arg in enumerate(argv):
+        if arg == "--workers" and i + 1 < len(argv):
+            value = argv[i + 1]
+        elif arg.startswith("--workers="):
+            value = arg.split("=", 1)[1]
+        else:
+            continue
+        try:
+            return int(value)
+        except ValueError:
+            return None
+    return None
+
+# Cores this box may use for inference (default: all cores available to the process)
+CPU_BUDGET = _env_int("FIXMATE_CPU_BUDGET") or _available_cores()
+# uvicorn worker processes sharing those cores (uvicorn reads WEB_CONCURRENCY too).
+# None when neither is set and the command line has no --workers
+DETECTED_SERVER_WORKERS = (_env_int("FIXMATE_SERVER_WORKERS") or _env_int("WEB_CONCURRENCY")
+                           or _cli_workers(sys.argv[1:]))
+SERVER_WORKERS = DETECTED_SERVER_WORKERS or 1
+# Explicit per-process overrides; unset means "derive from the budget"
+TORCH_THREADS = _env_int("FIXMATE_TORCH_THREADS")
+TORCH_INTEROP_THREADS = _env_int("FIXMATE_TORCH_INTEROP_THREADS")
+CV2_THREADS = _env_int("FIXMATE_CV2_THREADS")
+
+
+# ----------------------
+# Thread budget
+# ----------------------
+@dataclass(frozen=True)
+class ThreadBudget:
+    cores: int
+    processes: int
+    torch_threads: int
+    torch_interop_threads: int
+    cv2_threads: int
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+def compute_budget(processes: Optional[int] = None, cores: Optional[int] = None) -> ThreadBudget:
+    """
+    Splits `cores` between `processes` model-holding processes (uvicorn
+    workers, or inference worker processes in process mode) so their
+    thread pools do not oversubscribe the CPU.
+
+    Each process gets an equal share for torch intra-op threads. Inter-op
+    parallelism is not useful for these sequential models, and OpenCV only
+    does colour conversion and drawing here, so both get one thread;
+    parallelism across requests comes from the processes themselves.
+    """
+    cores = max(1, cores or CPU_BUDGET)
+    if processes is None and DETECTED_SERVER_WORKERS is None and multiprocessing.parent_process() is not None:
+        # A worker of a launcher we cannot see into (gunicorn, uvicorn.run(workers=N))
+        logger.warning(f"Server worker count unknown: this worker sizes its thread pools for all {cores} "
+                       f"core(s). Set FIXMATE_SERVER_WORKERS to the number of workers to share them.")
+    processes = max(1, processes or SERVER_WORKERS)
+    share = max(1, cores // processes)
+    return ThreadBudget(
+        cores=cores,
+        processes=processes,
+        torch_threads=TORCH_THREADS or share,
+        torch_interop_threads=TORCH_INTEROP_THREADS or 1,
+        cv2_threads=CV2_THREADS if CV2_THREADS is not None else 1,
+    )
+
+_applied: Optional[ThreadBudget] = None
+_applied_pid: Optional[int] = None
+_lock = threading.Lock()
+
+def apply_thread_budget(budget: Optional[ThreadBudget] = None) -> ThreadBudget:
+    """
+    Configures torch and OpenCV thread pools for this process (once per
+    process; later calls return the budget already in force). Also exports
+    OMP/MKL/OpenBLAS limits so native libraries and child processes follow.
+    """
+    global _applied, _applied_pid
+    with _lock:
+        if _applied is not None and _applied_pid == os.getpid():
+            return _applied
+        budget = budget or compute_budget()
+
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            os.environ[var] = str(budget.torch_threads)
+
+        import torch
+        torch.set_num_threads(budget.torch_threads)
+        try:
+            torch.set_num_interop_threads(budget.torch_interop_threads)
+        except RuntimeError:
+            # Only settable before the first parallel op in this process
+            logger.debug("torch inter-op threads already fixed for this process")
+
+        # ultralytics calls cv2.setNumThreads(0) when imported, so the detector
+        # loader applies cv2_threads again once YOLO is loaded
+        import cv2
+        cv2.setNumThreads(budget.cv2_threads)
+
+        _applied, _applied_pid = budget, os.getpid()
+        logger.info(f"Thread budget applied: {budget.to_dict()}")
+        return budget
+
+def current_budget() -> Optional[ThreadBudget]:
+    return _applied if _applied_pid == os.getpid() else None
@@ -6,6 +6,8 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import NoResultFound
 from app.models.ticket_model import User, Ticket, TicketAudit, TicketStatus, SeverityLevel
 from app.utils import normalize_image_path_for_url, UPLOADS_DIR_RESOLVED
+from app.services.dedup import get_duplicate_index
+from app.services.annotation_service import delete_detections
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -45,6 +47,7 @@ class TicketService:
         longitude: float,
         description: str = "",
         address: Optional[str] = None,
+        image_phash: Optional[str] = None,
     ) -> Ticket:
         """
         Create a Ticket record.
@@ -65,10 +68,12 @@ class TicketService:
             longitude=longitude,
             description=description,
             address=address,
+            image_phash=image_phash,
         )
         self.db.add(ticket)
         self.db.commit()
         self.db.refresh(ticket)
+        get_duplicate_index().add(ticket.id, ticket.latitude, ticket.longitude, ticket.image_phash)
         logger.info(f"Created ticket {ticket}")
         return ticket
 
@@ -151,6 +156,7 @@ class TicketService:
                 if inside_uploads and absolute.exists():
                     try:
                         absolute.unlink()
+                        delete_detections(self.db, absolute.name)
                         logger.info(f"Deleted image file: {absolute}")
                     except Exception as e:
                         logger.warning(f"Failed to delete image file {absolute}: {e}")
@@ -163,6 +169,7 @@ class TicketService:
         try:
             self.db.delete(ticket)
             self.db.commit()
+            get_duplicate_index().remove(ticket_id)
             logger.info(f"Deleted ticket {ticket_id}")
             return True
         except Exception as e:
@@ -1,12 +1,18 @@
 import os
+import time
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from app.database import Base, engine
-from app.routes import report, tickets, analytics, users
-from app.services.global_ai import init_ai_service
+from app.routes import report, tickets, analytics, users, metrics, jobs, admin
+from app.services.global_ai import init_ai_service, shutdown_ai_service, get_readiness, start_model_watcher
+from app.services import metrics as metrics_service
+from app.services.inference_executor import shutdown_inference_executor
+from app.services.job_service import JOBS_ENABLED, get_job_runner
+from app.services.dedup import start_duplicate_index
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -19,8 +25,15 @@ async def lifespan(app: FastAPI):
     logger.info("Starting CityPulse Backend...")
     init_ai_service()  # ✅ Models load once here
     logger.info("AI models loaded successfully.")
+    start_model_watcher()
+    start_duplicate_index()
+    if JOBS_ENABLED:
+        get_job_runner().start()
     yield
     logger.info("CityPulse Backend shutting down...")
+    await get_job_runner().stop()
+    shutdown_inference_executor()
+    shutdown_ai_service()
 
 # ----------------------
 # Initialize FastAPI
@@ -64,6 +77,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ----------------------
+# Server-Timing: per-stage latencies recorded while serving the request
+# ----------------------
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    stages = metrics_service.start_request()
+    start = time.perf_counter()
+    response = await call_next(request)
+    if stages:
+        total_ms = (time.perf_counter() - start) * 1000
+        response.headers["Server-Timing"] = f"{metrics_service.server_timing_header(stages)}, total;dur={total_ms:.1f}"
+        response.headers["Timing-Allow-Origin"] = "*"
+    return response
+
 # ----------------------
 # Include routers
 # ----------------------
@@ -72,6 +99,9 @@ try:
     app.include_router(tickets.router, prefix="/api", tags=["Tickets"])
     app.include_router(analytics.router, prefix="/api", tags=["Analytics"])
     app.include_router(users.router, prefix="/api", tags=["Users"])
+    app.include_router(metrics.router, prefix="/api", tags=["Metrics"])
+    app.include_router(jobs.router, prefix="/api", tags=["Jobs"])
+    app.include_router(admin.router, prefix="/api", tags=["Admin"])
     print("✅ All routers included successfully")
 except Exception as e:
     print(f"❌ Error including routers: {e}")
@@ -82,16 +112,131 @@ except Exception as e:
 def root():
     return {"message": "Welcome to CityPulse Backend API! Visit /docs for API documentation."}
 
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once models are loaded and warmed up, 503 before."""
+    readiness = get_readiness()
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
+
 @app.get("/test")
 def test():
     return {"status": "Backend is working", "timestamp": "2025-09-27T10:12:41"}
 
 print("✅ FastAPI server setup complete")
 
+# ----------------------
+# Preload-before-fork multi-worker mode
+# ----------------------
+# `python main.py --workers N` loads the models once in this (master)
+# process, then forks N uvicorn workers that share the weights copy-on-write
+# instead of each loading a private copy. Measure the effect with
+# `python scripts/measure_memory.py`.
+PRELOAD_WORKERS = int(os.environ.get("FIXMATE_PRELOAD_WORKERS", "1"))
+
+def _preload_models(workers: int) -> None:
+    import gc
+    import dataclasses
+    from app.services import ai_service
+    from app.services.thread_budget import compute_budget, apply_thread_budget
+
+    # GNU OpenMP does not survive fork once its thread team exists, so the
+    # master runs single-threaded; each worker applies its own share below
+    apply_thread_budget(dataclasses.replace(compute_budget(processes=workers), torch_threads=1))
+    if ai_service.DETECTOR_LOAD_MODE == "background":
+        # A loader thread would not be copied into the workers
+        ai_service.DETECTOR_LOAD_MODE = "eager"
+    init_ai_service()
+    # Keep the collector from touching (and so copying) every preloaded object
+    gc.collect()
+    gc.freeze()
+
+def _run_worker(sock, workers: int, host: str, port: int) -> None:
+    import uvicorn
+    from app.services.thread_budget import compute_budget, apply_thread_budget
+
+    apply_thread_budget(compute_budget(processes=workers))
+    # SQLite connections opened by the master must not be shared with it
+    try:
+        engine.dispose(close=False)
+    except TypeError:
+        engine.dispose()
+    config = uvicorn.Config(app, host=host, port=port, log_level="info")
+    uvicorn.Server(config).run(sockets=[sock])
+
+def serve_preforked(host: str, port: int, workers: int) -> None:
+    import signal
+    import socket
+
+    from app.services.global_ai import INFERENCE_MODE
+    if INFERENCE_MODE == "process":
+        # Inference worker pools must be started per server worker, after the fork
+        logger.warning("FIXMATE_INFERENCE_MODE=process: models are not preloaded in the master.")
+    else:
+        _preload_models(workers)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    children = {}
+    stopping = False
+
+    def spawn(slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                _run_worker(sock, workers, host, port)
+            finally:
+                os._exit(0)
+        children[pid] = slot
+        logger.info(f"Started worker {slot} (pid {pid})")
+
+    def stop(signum, _frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for slot in range(workers):
+        spawn(slot)
+    logger.info(f"Serving on http://{host}:{port} with {workers} preforked workers (master pid {os.getpid()})")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = children.pop(pid, None)
+        if slot is not None and not stopping:
+            logger.warning(f"Worker {slot} (pid {pid}) exited with status {status}, restarting it")
+            spawn(slot)
+    shutdown_ai_service()
+
 # Start the server when running this script directly
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    print("🚀 Starting server on http://0.0.0.0:8000")
-    print("📚 API documentation available at http://127.0.0.1:8000/docs")
-    print("🔗 Also accessible from mobile/emulator at http://192.168.100.59:8000")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    parser = argparse.ArgumentParser(description="Run the CityPulse backend")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=PRELOAD_WORKERS,
+                        help="preforked workers sharing one copy of the models (1 = single process)")
+    args = parser.parse_args()
+
+    print(f"🚀 Starting server on http://{args.host}:{args.port}")
+    print(f"📚 API documentation available at http://127.0.0.1:{args.port}/docs")
+    print(f"🔗 Also accessible from mobile/emulator at http://192.168.100.59:{args.port}")
+    if args.workers > 1:
+        serve_preforked(args.host, args.port, args.workers)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
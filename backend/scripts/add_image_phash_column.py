@@ -0,0 +1,58 @@
+import sqlite3
+import os
+import sys
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    backend_dir = os.path.normpath(os.path.join(script_dir, '..'))
+    db_path = os.path.normpath(os.path.join(backend_dir, 'app', 'db', 'fixmate.db'))
+    print(f"Using database: {db_path}")
+    if not os.path.exists(db_path):
+        print(f"DB not found: {db_path}")
+        return 2
+
+    conn = sqlite3.connect(db_path)
+    try:
+        cur = conn.cursor()
+        cur.execute("PRAGMA table_info(tickets);")
+        cols = [row[1] for row in cur.fetchall()]
+        if 'image_phash' in cols:
+            print("Column 'image_phash' already exists")
+        else:
+            cur.execute("ALTER TABLE tickets ADD COLUMN image_phash TEXT;")
+            conn.commit()
+            print("Added 'image_phash' column to 'tickets' table")
+
+        # Backfill hashes for existing tickets so they take part in duplicate detection
+        from app.services.dedup import perceptual_hash
+        from app.services.image_io import INGEST_MAX_SIDE, load_image
+        from app.utils import normalize_image_path_for_url
+
+        cur.execute("SELECT id, image_path FROM tickets WHERE image_phash IS NULL;")
+        updated = 0
+        for ticket_id, image_path in cur.fetchall():
+            rel = normalize_image_path_for_url(image_path)
+            file_path = os.path.join(backend_dir, rel) if rel else None
+            if not file_path or not os.path.exists(file_path):
+                continue
+            try:
+                # Hash the same downscaled decode /analyze and /report use
+                phash = perceptual_hash(load_image(file_path, INGEST_MAX_SIDE))
+            except Exception as e:
+                print(f"Skipping ticket {ticket_id}: {e}")
+                continue
+            cur.execute("UPDATE tickets SET image_phash = ? WHERE id = ?;", (phash, ticket_id))
+            updated += 1
+        conn.commit()
+        print(f"Backfilled image_phash for {updated} ticket(s)")
+        return 0
+    except Exception as e:
+        print("Failed to add 'image_phash' column:", e)
+        return 1
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""
+Benchmark the classifier and detector on synthetic images: latency and
+throughput per batch size, for several input resolutions, torch thread
+counts and inference engines. CPU only.
+
+Every (engine, threads) combination runs in its own spawned process, so
+thread pools and loaded engines never leak between measurements. Classifier
+timings include preprocessing (resize + to-tensor) of the synthetic
+photos; detector timings include YOLO's own letterboxing and NMS.
+
+Results can be written as JSON and compared against a stored baseline:
+a case whose throughput drops by more than --threshold is a regression and
+makes the script exit with status 1. So does a combination whose process
+crashes or runs past --combo-timeout; it is recorded as failed.
+
+Usage (from backend/, with model weights in place):
+    python scripts/bench_inference.py
+    python scripts/bench_inference.py --engines torch,onnx --threads 1,2,4 --batch-sizes 1,4,8,16
+    python scripts/bench_inference.py --json results.json --baseline bench_baseline.json --threshold 0.1
+    python scripts/bench_inference.py --quick --update-baseline --baseline bench_baseline.json
+"""
+import os
+import sys
+import json
+import time
+import queue
+import platform
+import argparse
+import statistics
+import dataclasses
+import multiprocessing as mp
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+
+import numpy as np
+
+# Identifies one measurement across runs
+CASE_KEY = ("model", "engine", "threads", "resolution", "batch_size")
+# How often the parent checks that a benchmark process is still alive
+POLL_SECONDS = 1.0
+
+def synthetic_images(width: int, height: int, count: int, seed: int = 0) -> list:
+    """Smooth noise upscaled from a coarse grid: compresses and resizes like a photo, unlike white noise."""
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        coarse = rng.integers(0, 256, (max(1, height // 16), max(1, width // 16), 3), dtype=np.uint8)
+        images.append(np.ascontiguousarray(np.repeat(np.repeat(coarse, 16, axis=0), 16, axis=1)[:height, :width]))
+    return images
+
+def parse_resolution(value: str) -> tuple:
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+def _timings(fn, repeat: int, warmup: int) -> list:
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+def _summary(times: list, batch_size: int) -> dict:
+    ordered = sorted(times)
+    mean = statistics.mean(times)
+    return {
+        "mean_ms": round(mean, 2),
+        "p50_ms": round(ordered[len(ordered) // 2], 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        "throughput_ips": round(batch_size * 1000 / mean, 2),
+    }
+
+def _run_combo(engine: str, threads: int, args, out) -> None:
+    """Child process: load the models once with this engine/thread count and measure every case."""
+    try:
+        import torch
+        from PIL import Image
+        from app.services.ai_service import AIModelManager
+        from app.services.thread_budget import compute_budget
+
+        budget = dataclasses.replace(compute_budget(processes=1), torch_threads=threads)
+        # Only the classifier is quantized; the torch runs cover the detector
+        run_detector = "detector" in args.models and engine != "int8"
+        models = AIModelManager(
+            device="cpu", engine=engine, detector_engine=engine,
+            detector_load="eager" if run_detector else "disabled", thread_budget=budget,
+        )
+        results = []
+        for width, height in args.resolutions:
+            images = synthetic_images(width, height, max(args.batch_sizes))
+            for n in args.batch_sizes:
+                batch = images[:n]
+                case = {"engine": engine, "threads": threads, "resolution": f"{width}x{height}", "batch_size": n}
+                if "classifier" in args.models:
+                    if models.engine != engine:
+                        results.append(dict(case, model="classifier", error=f"engine unavailable (loaded {models.engine})"))
+                    else:
+                        def classify():
+                            tensors = torch.stack([models.preprocess(Image.fromarray(image)) for image in batch])
+                            with torch.no_grad():
+                                models.class_model(tensors)
+                        results.append(dict(case, model="classifier", **_summary(
+                            _timings(classify, args.repeat, args.warmup), n)))
+                if run_detector:
+                    if models.detector_engine != engine:
+                        results.append(dict(case, model="detector", error=f"engine unavailable (loaded {models.detector_engine})"))
+                    else:
+                        detector = models.detection_model
+                        results.append(dict(case, model="detector", **_summary(
+                            _timings(lambda: detector(batch, verbose=False), args.repeat, args.warmup), n)))
+        out.put({"results": results})
+    except Exception as e:
+        out.put({"error": f"{type(e).__name__}: {e}"})
+
+def run_combo(engine: str, threads: int, args) -> list:
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    proc = ctx.Process(target=_run_combo, args=(engine, threads, args, out))
+    proc.start()
+    deadline = time.monotonic() + args.combo_timeout
+    reply = None
+    while reply is None:
+        try:
+            reply = out.get(timeout=POLL_SECONDS)
+        except queue.Empty:
+            if proc.exitcode is not None:
+                # Crashed (segfault, OOM kill) without reporting; drain a late reply first
+                try:
+                    reply = out.get_nowait()
+                except queue.Empty:
+                    reply = {"error": f"benchmark process exited with code {proc.exitcode}"}
+            elif time.monotonic() > deadline:
+                proc.terminate()
+                reply = {"error": f"timed out after {args.combo_timeout:.0f}s"}
+    proc.join(timeout=30)
+    if proc.exitcode is None:
+        proc.kill()
+        proc.join()
+    if "error" in reply:
+        return [{"model": m, "engine": engine, "threads": threads, "error": reply["error"], "failed": True}
+                for m in args.models]
+    return reply["results"]
+
+def environment() -> dict:
+    import torch
+    return {
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+def case_key(row: dict) -> tuple:
+    return tuple(row.get(k) for k in CASE_KEY)
+
+def compare(results: list, baseline: list, threshold: float) -> list:
+    """Throughput change of every case present in both runs; regressions fell by more than threshold."""
+    previous = {case_key(r): r for r in baseline if "throughput_ips" in r}
+    rows = []
+    for r in results:
+        base = previous.get(case_key(r))
+        if base is None or "throughput_ips" not in r:
+            continue
+        change = r["throughput_ips"] / base["throughput_ips"] - 1
+        rows.append(dict(zip(CASE_KEY, case_key(r)), baseline_ips=base["throughput_ips"],
+                         throughput_ips=r["throughput_ips"], change=round(change, 4),
+                         regression=change < -threshold))
+    return rows
+
+def print_results(results: list) -> None:
+    print(f"{'model':<10} {'engine':<11} {'thr':>3} {'resolution':>10} {'batch':>5} "
+          f"{'mean ms':>9} {'p95 ms':>9} {'img/s':>9}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['model']:<10} {r['engine']:<11} {r['threads']:>3}  {r['error']}")
+            continue
+        print(f"{r['model']:<10} {r['engine']:<11} {r['threads']:>3} {r['resolution']:>10} {r['batch_size']:>5} "
+              f"{r['mean_ms']:>9} {r['p95_ms']:>9} {r['throughput_ips']:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Classifier/detector latency and throughput vs batch size")
+    parser.add_argument("--models", default="classifier,detector", help="comma-separated: classifier, detector")
+    parser.add_argument("--engines", default="torch", help="comma-separated engines (torch, torchscript, onnx, int8)")
+    parser.add_argument("--threads", default="1,2,4", help="comma-separated torch thread counts")
+    parser.add_argument("--resolutions", default="640x480,1280x960,1920x1440", help="comma-separated WxH")
+    parser.add_argument("--batch-sizes", default="1,2,4,8,16", help="comma-separated batch sizes")
+    parser.add_argument("--repeat", type=int, default=20, help="timed iterations per case")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed iterations per case")
+    parser.add_argument("--combo-timeout", type=float, default=1800,
+                        help="seconds one engine/threads combination may run before it is killed")
+    parser.add_argument("--quick", action="store_true", help="small grid for CI: 1280x960, batches 1,8, 5 repeats")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed fractional throughput drop")
+    parser.add_argument("--update-baseline", action="store_true", help="write these results to --baseline")
+    args = parser.parse_args()
+
+    args.models = [m.strip() for m in args.models.split(",") if m.strip()]
+    args.resolutions = [parse_resolution(r) for r in args.resolutions.split(",")]
+    args.batch_sizes = [int(n) for n in args.batch_sizes.split(",")]
+    if args.quick:
+        args.resolutions, args.batch_sizes, args.repeat, args.warmup = [(1280, 960)], [1, 8], 5, 1
+    cores = os.cpu_count() or 1
+    threads = [t for t in (int(t) for t in args.threads.split(",")) if t <= cores] or [cores]
+
+    results = []
+    for engine in [e.strip() for e in args.engines.split(",")]:
+        for t in threads:
+            results.extend(run_combo(engine, t, args))
+    print_results(results)
+
+    report = {"environment": environment(), "results": results}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    status = 0
+    failed = {(r["engine"], r["threads"]) for r in results if r.get("failed")}
+    if failed:
+        print(f"\n{len(failed)} engine/threads combination(s) failed.")
+        status = 1
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline["results"], args.threshold)
+        print(f"\nAgainst {args.baseline} (recorded {baseline['environment'].get('timestamp')}, "
+              f"threshold {args.threshold:.0%}):")
+        for row in rows:
+            flag = "REGRESSION" if row["regression"] else ""
+            print(f"{row['model']:<10} {row['engine']:<11} {row['threads']:>3} {row['resolution']:>10} "
+                  f"{row['batch_size']:>5} {row['baseline_ips']:>9} -> {row['throughput_ips']:>9} "
+                  f"{row['change']:>+8.1%} {flag}")
+        regressions = [row for row in rows if row["regression"]]
+        if not rows:
+            print("No cases in common with the baseline.")
+        elif regressions:
+            print(f"{len(regressions)} of {len(rows)} case(s) regressed.")
+            status = 1
+        else:
+            print(f"All {len(rows)} case(s) within the threshold.")
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Benchmark the upload ingest stage: full-resolution decode versus the
+EXIF-aware, reduced-size decode used by /api/analyze.
+
+Each mode runs in its own process so peak RSS is not shared between them.
+Without --images, a synthetic 12 MP JPEG with an EXIF rotation is used.
+
+Usage (from backend/):
+    python scripts/bench_ingest.py
+    python scripts/bench_ingest.py --images static/uploads --max-side 1024 --repeat 20
+"""
+import os
+import sys
+import io
+import glob
+import time
+import json
+import argparse
+import resource
+import multiprocessing as mp
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+
+import numpy as np
+from PIL import Image
+
+from app.services.image_io import INGEST_MAX_SIDE, decode_image, ingest_image
+from bench_inference import _summary  # same percentile method as the inference benchmark
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg')
+
+def synthetic_photo(width=4032, height=3024, orientation=6) -> bytes:
+    """A noisy 12 MP JPEG tagged as 'rotate 90 CW', like a portrait phone photo."""
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    image = Image.fromarray(base).resize((width, height), Image.BILINEAR)
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=90, exif=exif)
+    return buf.getvalue()
+
+def _run(mode, payloads, max_side, repeat, out):
+    decode = (lambda data: decode_image(data)) if mode == "full" else (lambda data: ingest_image(data, max_side)[0])
+    shape = decode(payloads[0]).shape  # warm-up, also reports the output size
+    times = []
+    for _ in range(repeat):
+        for data in payloads:
+            start = time.perf_counter()
+            decode(data)
+            times.append((time.perf_counter() - start) * 1000)
+    summary = _summary(times, batch_size=1)
+    # ru_maxrss is KiB on Linux
+    out.put({
+        "mode": mode,
+        "output_shape": list(shape),
+        "mean_ms": summary["mean_ms"],
+        "p95_ms": summary["p95_ms"],
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full vs. reduced-size upload decoding")
+    parser.add_argument("--images", help="directory of JPEGs to use instead of a synthetic photo")
+    parser.add_argument("--max-side", type=int, default=INGEST_MAX_SIDE or 1280)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.images:
+        paths = sorted(p for p in glob.glob(os.path.join(args.images, "*")) if p.lower().endswith(IMAGE_EXTENSIONS))
+        if not paths:
+            print(f"No JPEGs found in {args.images}")
+            return 1
+        payloads = [open(p, "rb").read() for p in paths[:50]]
+    else:
+        payloads = [synthetic_photo()]
+    print(f"{len(payloads)} image(s), max side {args.max_side}, {args.repeat} repeat(s)")
+
+    ctx = mp.get_context("spawn")
+    results = []
+    for mode in ("full", "ingest"):
+        out = ctx.Queue()
+        proc = ctx.Process(target=_run, args=(mode, payloads, args.max_side, args.repeat, out))
+        proc.start()
+        results.append(out.get())
+        proc.join()
+
+    for r in results:
+        print(json.dumps(r))
+    full, ingest = results
+    print(f"Speed-up: {full['mean_ms'] / ingest['mean_ms']:.1f}x, "
+          f"peak RSS {full['peak_rss_mb']} MB -> {ingest['peak_rss_mb']} MB")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Sweep uvicorn worker counts and per-worker torch thread counts, and report
+throughput and tail latency of /api/analyze for each combination.
+
+For every combination a fresh server is started with FIXMATE_SERVER_WORKERS
+and FIXMATE_TORCH_THREADS set (the thread budget then sizes torch/OpenCV
+pools), warmed up, and loaded with concurrent uploads. The result cache and
+duplicate detection are disabled so every request runs the models.
+
+Usage (from backend/, with model weights in place):
+    python scripts/bench_threads.py
+    python scripts/bench_threads.py --workers 1,2,4 --torch-threads auto,1,2 --requests 300 --concurrency 16
+    python scripts/bench_threads.py --image static/uploads/example.jpg --json thread_sweep.json
+"""
+import os
+import sys
+import io
+import json
+import time
+import uuid
+import signal
+import argparse
+import statistics
+import subprocess
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+
+from PIL import Image
+
+BACKEND_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+UPLOADS_DIR = os.path.join(BACKEND_DIR, "static", "uploads")
+
+def synthetic_jpeg(width=1280, height=960) -> bytes:
+    image = Image.effect_noise((width, height), 64).convert("RGB")
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+def multipart(field: str, filename: str, data: bytes, content_type: str = "image/jpeg"):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+def wait_ready(base_url: str, workers: int, timeout: float) -> bool:
+    """Waits until several consecutive /ready probes succeed (each may hit a different worker)."""
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/ready", timeout=5) as resp:
+                streak = streak + 1 if resp.status == 200 else 0
+        except (urllib.error.URLError, ConnectionError, OSError):
+            streak = 0
+        if streak >= 3 * workers:
+            return True
+        time.sleep(0.5)
+    return False
+
+def one_request(url: str, body: bytes, content_type: str):
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": content_type}, method="POST")
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=120) as resp:
+            payload = json.loads(resp.read())
+            ok = resp.status == 200
+    except urllib.error.HTTPError as e:
+        payload, ok = None, False
+        e.read()
+    latency_ms = (time.perf_counter() - start) * 1000
+    if payload and payload.get("filename"):
+        try:
+            os.remove(os.path.join(UPLOADS_DIR, payload["filename"]))
+        except OSError:
+            pass
+    return ok, latency_ms
+
+def run_combo(workers: int, torch_threads: str, args, image: bytes) -> dict:
+    env = dict(os.environ, FIXMATE_SERVER_WORKERS=str(workers), FIXMATE_CACHE_ENABLED="0",
+               FIXMATE_DEDUP_ENABLED="0", FIXMATE_INFERENCE_MODE="thread")
+    env.pop("FIXMATE_TORCH_THREADS", None)
+    if torch_threads != "auto":
+        env["FIXMATE_TORCH_THREADS"] = torch_threads
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, start_new_session=True,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        if not wait_ready(base_url, workers, args.start_timeout):
+            return {"workers": workers, "torch_threads": torch_threads, "error": "server did not become ready"}
+
+        body, content_type = multipart("image", "bench.jpg", image)
+        url = f"{base_url}/api/analyze"
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            # Warm every worker's batchers and allocator before measuring
+            list(pool.map(lambda _: one_request(url, body, content_type), range(args.concurrency * workers)))
+            start = time.perf_counter()
+            results = list(pool.map(lambda _: one_request(url, body, content_type), range(args.requests)))
+            elapsed = time.perf_counter() - start
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(server.pid, signal.SIGKILL)
+
+    latencies = sorted(ms for ok, ms in results if ok)
+    errors = sum(1 for ok, _ in results if not ok)
+    def pct(q):
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 1) if latencies else None
+    return {
+        "workers": workers,
+        "torch_threads": torch_threads,
+        "requests": args.requests,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(statistics.mean(latencies), 1) if latencies else None,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep uvicorn workers x torch threads for /api/analyze")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated uvicorn worker counts")
+    parser.add_argument("--torch-threads", default="auto,1,2", help="comma-separated per-worker torch threads; 'auto' uses the thread budget")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--image", help="JPEG to upload (default: synthetic 1280x960)")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--start-timeout", type=float, default=300)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    image = open(args.image, "rb").read() if args.image else synthetic_jpeg()
+    results = []
+    print(f"{'workers':>7} {'torch':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>6}")
+    for workers in [int(w) for w in args.workers.split(",")]:
+        for torch_threads in [t.strip() for t in args.torch_threads.split(",")]:
+            r = run_combo(workers, torch_threads, args, image)
+            results.append(r)
+            if "error" in r:
+                print(f"{workers:>7} {torch_threads:>6}  {r['error']}")
+                continue
+            print(f"{workers:>7} {torch_threads:>6} {r['throughput_rps']:>8} {r['p50_ms']:>8} "
+                  f"{r['p95_ms']:>8} {r['p99_ms']:>8} {r['errors']:>6}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
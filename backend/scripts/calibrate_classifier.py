@@ -0,0 +1,94 @@
+"""
+Fit a softmax temperature for the classifier so its confidences are
+calibrated, and write it to best_model.calibration.json (picked up by
+AIModelManager at startup).
+
+The labelled data directory must contain one sub-folder per class name
+from class_mapping.json, e.g. data/pothole/*.jpg, data/garbage/*.jpg.
+
+Usage (from backend/):
+    python scripts/calibrate_classifier.py --data-dir /data/citypulse_val
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+
+import torch
+from PIL import Image
+from torchvision import transforms
+
+from app.services import engines
+
+BACKEND_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+CLASS_MODEL_PATH = os.path.join(BACKEND_DIR, "app", "models", "classification", "best_model.pth")
+CLASS_MAPPING_PATH = os.path.join(BACKEND_DIR, "app", "models", "classification", "class_mapping.json")
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+preprocess = transforms.Compose([
+    transforms.Resize(engines.CLASSIFIER_INPUT_SIZE),
+    transforms.ToTensor()
+])
+
+def collect_logits(model, data_dir, class_names, batch_size):
+    samples = []
+    for label, name in enumerate(class_names):
+        for path in sorted(glob.glob(os.path.join(data_dir, name, "*"))):
+            if path.lower().endswith(IMAGE_EXTENSIONS):
+                samples.append((path, label))
+
+    logits, labels = [], []
+    with torch.no_grad():
+        for i in range(0, len(samples), batch_size):
+            chunk = samples[i:i + batch_size]
+            batch = torch.stack([preprocess(Image.open(p).convert("RGB")) for p, _ in chunk])
+            logits.append(model(batch))
+            labels += [label for _, label in chunk]
+    if not samples:
+        return None, None
+    return torch.cat(logits), torch.tensor(labels)
+
+def fit_temperature(logits, labels):
+    """Grid search over T minimising negative log-likelihood; robust and dependency-free."""
+    candidates = torch.logspace(-1, 1, steps=200)  # 0.1 .. 10
+    nll = torch.nn.functional.cross_entropy
+    losses = torch.stack([nll(logits / t, labels) for t in candidates])
+    best = int(torch.argmin(losses))
+    return float(candidates[best]), float(nll(logits, labels)), float(losses[best])
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit the classifier softmax temperature")
+    parser.add_argument("--data-dir", required=True, help="folder with one sub-folder per class")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    with open(CLASS_MAPPING_PATH, "r") as f:
+        class_mapping = json.load(f)
+    class_names = [class_mapping[str(i)] for i in range(len(class_mapping))]
+    model = engines.build_eager_classifier(CLASS_MODEL_PATH, len(class_names), torch.device("cpu"))
+
+    logits, labels = collect_logits(model, args.data_dir, class_names, args.batch_size)
+    if logits is None:
+        print(f"No labelled images found under {args.data_dir}")
+        return 1
+
+    temperature, nll_before, nll_after = fit_temperature(logits, labels)
+    calibration = {
+        "temperature": temperature,
+        "images": int(labels.numel()),
+        "nll_before": nll_before,
+        "nll_after": nll_after,
+        "source_weights": os.path.basename(CLASS_MODEL_PATH),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    with open(engines.calibration_path(CLASS_MODEL_PATH), "w") as f:
+        json.dump(calibration, f, indent=2)
+    print(json.dumps(calibration, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+Export the classifier (best_model.pth) and the YOLO detector
+(best_severity_check.pt) to the alternate inference engines.
+
+Usage (from backend/):
+    python scripts/export_models.py                  # both engines
+    python scripts/export_models.py --engine onnx
+    python scripts/export_models.py --only classifier
+
+Select the engine at runtime with FIXMATE_INFERENCE_ENGINE=onnx|torchscript.
+"""
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+
+from app.services import engines
+
+def main():
+    parser = argparse.ArgumentParser(description="Export CityPulse models to ONNX / TorchScript")
+    parser.add_argument("--engine", choices=["onnx", "torchscript", "all"], default="all")
+    parser.add_argument("--only", choices=["classifier", "detector"], default=None)
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    models_dir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'models'))
+    class_model_path = os.path.join(models_dir, "classification", "best_model.pth")
+    class_mapping_path = os.path.join(models_dir, "classification", "class_mapping.json")
+    detection_model_path = os.path.join(models_dir, "detection", "best_severity_check.pt")
+
+    with open(class_mapping_path, "r") as f:
+        num_classes = len(json.load(f))
+
+    targets = ["onnx", "torchscript"] if args.engine == "all" else [args.engine]
+    for engine in targets:
+        if args.only in (None, "classifier"):
+            print(f"Classifier -> {engine}: {engines.export_classifier(class_model_path, num_classes, engine, args.opset)}")
+        if args.only in (None, "detector"):
+            print(f"Detector   -> {engine}: {engines.export_detector(detection_model_path, engine, args.opset)}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
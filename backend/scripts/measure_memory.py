@@ -0,0 +1,154 @@
+"""
+Report per-worker memory of a multi-worker backend: RSS, PSS (proportional
+share of shared pages) and USS (pages private to the process).
+
+Compares `python main.py --workers N` (models preloaded in the master and
+shared copy-on-write with forked workers) with `uvicorn main:app --workers N`
+(every worker loads its own copy). USS is what each extra worker really
+costs; PSS sums to the box's total footprint.
+
+Linux only (reads /proc/<pid>/smaps_rollup).
+
+Usage (from backend/, with model weights in place):
+    python scripts/measure_memory.py
+    python scripts/measure_memory.py --workers 4 --mode preload,uvicorn --warm-requests 20
+    python scripts/measure_memory.py --image static/uploads/example.jpg --json memory.json
+"""
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+
+from scripts.bench_threads import BACKEND_DIR, synthetic_jpeg, multipart, wait_ready, one_request
+
+def smaps_rollup(pid: int) -> dict:
+    """Rss / Pss / Uss of one process in kB."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss_kb": fields.get("Rss", 0),
+        "pss_kb": fields.get("Pss", 0),
+        "uss_kb": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+def descendants(pid: int) -> list:
+    """All live descendants of pid, breadth first."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; the parent pid follows the closing paren
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    found, queue = [], [pid]
+    while queue:
+        for child in sorted(children.get(queue.pop(0), [])):
+            found.append(child)
+            queue.append(child)
+    return found
+
+def process_name(pid: int) -> str:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().replace(b"\0", b" ").decode(errors="replace").strip()[:60]
+    except OSError:
+        return "?"
+
+def measure(mode: str, args, image: bytes) -> dict:
+    env = dict(os.environ, FIXMATE_SERVER_WORKERS=str(args.workers), FIXMATE_INFERENCE_MODE="thread")
+    if mode == "preload":
+        command = [sys.executable, "main.py", "--host", "127.0.0.1", "--port", str(args.port),
+                   "--workers", str(args.workers)]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.port),
+                   "--workers", str(args.workers), "--log-level", "warning"]
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, start_new_session=True,
+                              stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        if not wait_ready(base_url, args.workers, args.start_timeout):
+            return {"mode": mode, "error": "server did not become ready"}
+        if args.warm_requests:
+            # Touch the inference path in every worker so lazily allocated memory shows up
+            body, content_type = multipart("image", "memory.jpg", image)
+            with ThreadPoolExecutor(max_workers=args.workers * 2) as pool:
+                list(pool.map(lambda _: one_request(f"{base_url}/api/analyze", body, content_type),
+                              range(args.warm_requests)))
+        time.sleep(args.settle)
+
+        processes = []
+        for pid in [server.pid] + descendants(server.pid):
+            try:
+                processes.append({"pid": pid, "name": process_name(pid), **smaps_rollup(pid)})
+            except OSError:
+                continue
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(server.pid, signal.SIGKILL)
+
+    return {
+        "mode": mode,
+        "workers": args.workers,
+        "processes": processes,
+        "total_pss_kb": sum(p["pss_kb"] for p in processes),
+        "total_uss_kb": sum(p["uss_kb"] for p in processes),
+    }
+
+def mb(kb: int) -> str:
+    return f"{kb / 1024:.1f}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker USS/PSS of preloaded vs independently loaded workers")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--mode", default="preload,uvicorn", help="comma-separated: preload, uvicorn")
+    parser.add_argument("--warm-requests", type=int, default=0, help="analyze requests to send before measuring")
+    parser.add_argument("--image", help="JPEG for warm requests (default: synthetic 1280x960)")
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds to wait before reading /proc")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--start-timeout", type=float, default=300)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        print("measure_memory.py needs Linux /proc/<pid>/smaps_rollup")
+        return 1
+
+    image = open(args.image, "rb").read() if args.image else synthetic_jpeg()
+    results = []
+    for mode in [m.strip() for m in args.mode.split(",")]:
+        r = measure(mode, args, image)
+        results.append(r)
+        print(f"\n{mode} ({args.workers} workers)")
+        if "error" in r:
+            print(f"  {r['error']}")
+            continue
+        print(f"  {'pid':>7} {'RSS MB':>8} {'PSS MB':>8} {'USS MB':>8}  command")
+        for p in r["processes"]:
+            print(f"  {p['pid']:>7} {mb(p['rss_kb']):>8} {mb(p['pss_kb']):>8} {mb(p['uss_kb']):>8}  {p['name']}")
+        print(f"  {'total':>7} {'':>8} {mb(r['total_pss_kb']):>8} {mb(r['total_uss_kb']):>8}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Build the INT8 quantized classifier and its validation report.
+
+Images in static/uploads are split deterministically into a calibration set
+(used by static quantization) and a held-out set. The held-out top-1
+agreement between the INT8 and fp32 models is written to
+best_model.int8.json; AIModelManager refuses to activate the INT8 model
+when that agreement is below FIXMATE_INT8_MIN_AGREEMENT.
+
+Usage (from backend/):
+    python scripts/quantize_classifier.py                       # static, x86 qconfig
+    python scripts/quantize_classifier.py --mode dynamic
+    python scripts/quantize_classifier.py --images-dir /data/val --holdout-fraction 0.5
+
+Then run with FIXMATE_INFERENCE_ENGINE=int8.
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+
+import torch
+from PIL import Image
+from torchvision import transforms
+
+from app.services import engines
+
+BACKEND_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+CLASS_MODEL_PATH = os.path.join(BACKEND_DIR, "app", "models", "classification", "best_model.pth")
+CLASS_MAPPING_PATH = os.path.join(BACKEND_DIR, "app", "models", "classification", "class_mapping.json")
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+preprocess = transforms.Compose([
+    transforms.Resize(engines.CLASSIFIER_INPUT_SIZE),
+    transforms.ToTensor()
+])
+
+def load_batch(paths):
+    return torch.stack([preprocess(Image.open(p).convert("RGB")) for p in paths])
+
+def split_images(images_dir, holdout_fraction):
+    """Every n-th image (sorted by name) goes to the held-out set."""
+    paths = sorted(p for p in glob.glob(os.path.join(images_dir, "*")) if p.lower().endswith(IMAGE_EXTENSIONS))
+    step = max(1, round(1 / holdout_fraction)) if holdout_fraction > 0 else len(paths) + 1
+    holdout = paths[::step]
+    calibration = [p for p in paths if p not in holdout]
+    return calibration, holdout
+
+def quantize_static(model, calibration_paths, batch_size):
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+    example = torch.rand(1, 3, *engines.CLASSIFIER_INPUT_SIZE)
+    prepared = prepare_fx(model, get_default_qconfig_mapping(torch.backends.quantized.engine), (example,))
+    with torch.no_grad():
+        for i in range(0, len(calibration_paths), batch_size):
+            prepared(load_batch(calibration_paths[i:i + batch_size]))
+    return convert_fx(prepared)
+
+def quantize_dynamic(model):
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def top1(model, paths, batch_size):
+    predictions = []
+    with torch.no_grad():
+        for i in range(0, len(paths), batch_size):
+            predictions += torch.argmax(model(load_batch(paths[i:i + batch_size])), 1).tolist()
+    return predictions
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize the CityPulse classifier to INT8")
+    parser.add_argument("--mode", choices=["static", "dynamic"], default="static")
+    parser.add_argument("--images-dir", default=os.path.join(BACKEND_DIR, "static", "uploads"))
+    parser.add_argument("--holdout-fraction", type=float, default=0.3)
+    parser.add_argument("--min-holdout", type=int, default=3, help="refuse to approve with fewer held-out images")
+    parser.add_argument("--min-agreement", type=float, default=engines.INT8_MIN_AGREEMENT)
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    if "x86" in torch.backends.quantized.supported_engines:
+        torch.backends.quantized.engine = "x86"
+
+    with open(CLASS_MAPPING_PATH, "r") as f:
+        num_classes = len(json.load(f))
+    fp32 = engines.build_eager_classifier(CLASS_MODEL_PATH, num_classes, torch.device("cpu"))
+
+    calibration, holdout = split_images(args.images_dir, args.holdout_fraction)
+    print(f"Calibration images: {len(calibration)}, held-out images: {len(holdout)}")
+    if args.mode == "static" and not calibration:
+        print("No calibration images found, aborting.")
+        return 1
+
+    if args.mode == "static":
+        # prepare_fx mutates the module, so quantize a fresh copy
+        int8 = quantize_static(engines.build_eager_classifier(CLASS_MODEL_PATH, num_classes, torch.device("cpu")),
+                               calibration, args.batch_size)
+    else:
+        int8 = quantize_dynamic(engines.build_eager_classifier(CLASS_MODEL_PATH, num_classes, torch.device("cpu")))
+    int8.eval()
+
+    # Validation on the held-out set
+    expected = top1(fp32, holdout, args.batch_size)
+    actual = top1(int8, holdout, args.batch_size)
+    agreement = sum(e == a for e, a in zip(expected, actual)) / len(holdout) if holdout else 0.0
+    approved = len(holdout) >= args.min_holdout and agreement >= args.min_agreement
+
+    out_path = engines.classifier_artifact_path(CLASS_MODEL_PATH, "int8")
+    with torch.no_grad():
+        scripted = torch.jit.freeze(torch.jit.trace(int8, torch.rand(1, 3, *engines.CLASSIFIER_INPUT_SIZE)))
+    scripted.save(out_path)
+
+    report = {
+        "mode": args.mode,
+        "quantized_engine": torch.backends.quantized.engine,
+        "source_weights": os.path.basename(CLASS_MODEL_PATH),
+        "source_sha256": engines.file_sha256(CLASS_MODEL_PATH),
+        "calibration_images": len(calibration),
+        "holdout_images": len(holdout),
+        "top1_agreement": agreement,
+        "min_agreement": args.min_agreement,
+        "approved": approved,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    with open(engines.int8_report_path(CLASS_MODEL_PATH), "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps(report, indent=2))
+    print(f"INT8 model written to {out_path}: {'APPROVED' if approved else 'REJECTED'}")
+    return 0 if approved else 2
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""
+Shared pytest setup for the backend unit tests.
+
+Puts backend/ on sys.path so tests can import the app package, points
+FIXMATE_DB at a throwaway file so nothing touches app/db/fixmate.db, and
+provides an in-memory database fixture.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+os.environ.setdefault("FIXMATE_DB", os.path.join(tempfile.mkdtemp(prefix="fixmate-test-"), "fixmate.db"))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import inference_model, job_model, ticket_model  # noqa: F401  (register tables)
+
+
+@pytest.fixture
+def session_factory():
+    """sessionmaker bound to a fresh in-memory SQLite database with every app table."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+@pytest.fixture
+def api_client(monkeypatch, tmp_path):
+    """
+    TestClient for the app serving instant mock AI results, with uploads
+    written to tmp_path / "uploads". Startup (model loading) is not run.
+    """
+    pytest.importorskip("torch")
+    from fastapi.testclient import TestClient
+    import main
+    from app.services import analysis_service, global_ai
+
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    monkeypatch.setattr(analysis_service, "UPLOADS_DIR", uploads)
+    monkeypatch.setattr(global_ai, "_ai_service", global_ai.MockAIService(classify_ms=0, detect_ms=0))
+    monkeypatch.setattr(global_ai, "_ready", True)
+    return TestClient(main.app)
@@ -0,0 +1,59 @@
+"""
+Tests for load shedding on POST /api/analyze: a saturated inference
+executor answers 503 with Retry-After and leaves no upload behind.
+
+Run from backend/:
+    python -m pytest test/test_analyze_route.py -q
+"""
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import cv2
+
+from app.services import analysis_service, inference_executor
+from app.services.inference_executor import InferenceExecutor
+
+
+def _jpeg(width: int = 64, height: int = 48) -> bytes:
+    image = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+@pytest.fixture
+def busy_executor(monkeypatch):
+    """Executor with one slot and no queue, held by a job until the test ends."""
+    executor = InferenceExecutor(max_concurrency=1, max_queue=0, retry_after=7)
+    release = threading.Event()
+    executor.submit(release.wait)
+    monkeypatch.setattr(inference_executor, "_executor", executor)
+    monkeypatch.setattr(inference_executor, "_executor_pid", inference_executor.os.getpid())
+    yield executor
+    release.set()
+    executor.shutdown()
+
+def _post_image(client):
+    return client.post("/api/analyze", files={"image": ("photo.jpg", _jpeg(), "image/jpeg")})
+
+
+def test_saturated_executor_rejects_before_saving(api_client, busy_executor):
+    response = _post_image(api_client)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+    assert list(analysis_service.UPLOADS_DIR.iterdir()) == []
+
+def test_queue_full_after_saving_removes_the_upload(api_client, busy_executor, monkeypatch):
+    # The last slot is taken between the saturation check and the decode job
+    monkeypatch.setattr(busy_executor, "is_saturated", lambda: False)
+    response = _post_image(api_client)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+    assert list(analysis_service.UPLOADS_DIR.iterdir()) == []
+
+def test_analyze_succeeds_with_a_free_slot(api_client):
+    response = _post_image(api_client)
+    assert response.status_code == 200
+    body = response.json()
+    assert (analysis_service.UPLOADS_DIR / body["filename"]).exists()
+    assert body["model_version"] == "mock"
@@ -0,0 +1,138 @@
+"""
+Tests for lazily rendered annotated images (app/services/annotation_service.py):
+the derived-image LRU cache, cleanup when a ticket is deleted, and the
+/tickets/{id}/annotated endpoint.
+
+Each test runs in a temporary working directory, so static/ is never touched.
+
+Run from backend/:
+    python -m pytest test/test_annotation_service.py -q
+"""
+import os
+import json
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import cv2
+
+from app.database import get_db
+from app.models.inference_model import ImageDetection
+from app.models.ticket_model import SeverityLevel
+from app.services import annotation_service, ticket_service
+from app.services.annotation_service import get_detections, render_annotated, save_detections
+from app.services.ticket_service import TicketService
+
+BOXES = [{"box": [10, 10, 40, 30], "confidence": 0.9, "severity": "High"}]
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Temporary cwd with static/uploads, and derived images under static/derived."""
+    monkeypatch.chdir(tmp_path)
+    uploads = tmp_path / "static" / "uploads"
+    uploads.mkdir(parents=True)
+    monkeypatch.setattr(annotation_service, "DERIVED_DIR", tmp_path / "static" / "derived")
+    monkeypatch.setattr(ticket_service, "UPLOADS_DIR_RESOLVED", uploads.resolve())
+    return tmp_path
+
+def _upload(name: str = "photo.jpg", width: int = 64, height: int = 48) -> Path:
+    path = Path("static") / "uploads" / name
+    cv2.imwrite(str(path), np.full((height, width, 3), 128, dtype=np.uint8))
+    return path
+
+def _detection(filename: str, boxes=BOXES, size=(64, 48)) -> ImageDetection:
+    return ImageDetection(filename=filename, severity="High", image_width=size[0], image_height=size[1],
+                          boxes=json.dumps(boxes))
+
+def _ticket(db, image_path: Path) -> str:
+    service = TicketService(db)
+    user = service.create_user(name="Tester", email=f"{image_path.stem}@example.local")
+    ticket = service.create_ticket(user_id=user.id, image_path=image_path.as_posix(), category="pothole",
+                                   severity=SeverityLevel.HIGH, latitude=3.1, longitude=101.6)
+    return ticket.id
+
+def _fill(path: Path, size: int, mtime: float) -> None:
+    path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+
+
+def test_evict_removes_least_recently_used_first(workdir):
+    derived = annotation_service.DERIVED_DIR
+    derived.mkdir(parents=True)
+    for i, name in enumerate(["old.jpg", "mid.jpg", "new.jpg"]):
+        _fill(derived / name, 100, mtime=1000 + i)
+    _fill(derived / "writing.jpg.1.2.tmp", 100, mtime=0)
+
+    annotation_service._evict(max_bytes=250)
+    assert sorted(p.name for p in derived.iterdir()) == ["mid.jpg", "new.jpg", "writing.jpg.1.2.tmp"]
+    annotation_service._evict(max_bytes=100)
+    assert sorted(p.name for p in derived.iterdir()) == ["new.jpg", "writing.jpg.1.2.tmp"]
+
+def test_cache_hit_refreshes_recency(workdir):
+    first, second = _upload("a.jpg"), _upload("b.jpg")
+    a = render_annotated(first, _detection("a.jpg"))
+    b = render_annotated(second, _detection("b.jpg"))
+    os.utime(a, (1000, 1000))
+    os.utime(b, (2000, 2000))
+    assert render_annotated(first, _detection("a.jpg")) == a   # hit: a becomes most recent
+    annotation_service._evict(max_bytes=a.stat().st_size)
+    assert a.exists() and not b.exists()
+
+def test_overlay_key_changes_with_the_boxes(workdir):
+    source = _upload()
+    first = render_annotated(source, _detection("photo.jpg"))
+    moved = render_annotated(source, _detection("photo.jpg", boxes=[dict(BOXES[0], box=[0, 0, 5, 5])]))
+    assert first != moved
+    assert render_annotated(source, _detection("photo.jpg"), fmt="webp").suffix == ".webp"
+
+def test_boxes_are_mapped_onto_the_stored_image(workdir):
+    source = _upload(width=64, height=48)
+    # Boxes refer to a 2x larger original; the overlay is drawn on the stored copy
+    detection = _detection("photo.jpg", boxes=[dict(BOXES[0], box=[20, 20, 80, 60])], size=(128, 96))
+    rendered = cv2.imread(str(render_annotated(source, detection)))
+    assert rendered.shape[:2] == (48, 64)
+    assert not np.allclose(rendered[10, 10:40], 128, atol=8)  # outline drawn at the scaled position
+
+def test_deleting_a_ticket_removes_its_detections_and_overlays(workdir, session_factory):
+    source = _upload()
+    save_detections("photo.jpg", "High", BOXES, [64, 48], session_factory=session_factory)
+    db = session_factory()
+    ticket_id = _ticket(db, source)
+    rendered = render_annotated(source, get_detections(db, "photo.jpg"))
+    other = _upload("other.jpg")
+    kept = render_annotated(other, _detection("other.jpg"))
+
+    assert TicketService(db).delete_ticket(ticket_id)
+    assert not source.exists() and not rendered.exists()
+    assert get_detections(db, "photo.jpg") is None
+    assert kept.exists()
+    db.close()
+
+def test_annotated_endpoint(workdir, session_factory, api_client, monkeypatch):
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+    monkeypatch.setitem(api_client.app.dependency_overrides, get_db, override_get_db)
+    db = session_factory()
+    plain = _ticket(db, _upload("plain.jpg"))
+    boxed = _ticket(db, _upload("boxed.jpg"))
+    db.close()
+    save_detections("boxed.jpg", "High", BOXES, [64, 48], session_factory=session_factory)
+
+    # No detections: the original photo is served unchanged
+    response = api_client.get(f"/api/tickets/{plain}/annotated")
+    assert response.status_code == 200
+    assert response.content == Path("static/uploads/plain.jpg").read_bytes()
+
+    response = api_client.get(f"/api/tickets/{boxed}/annotated", params={"format": "webp"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert len(list(annotation_service.DERIVED_DIR.glob("boxed-*.webp"))) == 1
+
+    assert api_client.get("/api/tickets/missing/annotated").status_code == 404
@@ -0,0 +1,114 @@
+"""
+Tests for POST /api/analyze/batch: zip expansion, request limits, archive
+errors and the NDJSON response stream. Mock AI results, no model weights.
+
+Run from backend/:
+    python -m pytest test/test_batch_analyze.py -q
+"""
+import io
+import json
+import zipfile
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import cv2
+
+from app.routes import report
+
+
+def _image(ext: str = ".jpg", seed: int = 0) -> bytes:
+    image = np.random.default_rng(seed).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+    return cv2.imencode(ext, image)[1].tobytes()
+
+def _zip(members: dict, compression=zipfile.ZIP_STORED) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=compression) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buf.getvalue()
+
+def _patch_u16(data: bytes, signature: bytes, offset: int, value: int) -> bytes:
+    data = bytearray(data)
+    at = data.find(signature) + offset
+    data[at:at + 2] = value.to_bytes(2, "little")
+    return bytes(data)
+
+def _flip_byte(data: bytes, marker: bytes) -> bytes:
+    data = bytearray(data)
+    data[data.find(marker)] ^= 0xFF
+    return bytes(data)
+
+def _encrypted_member() -> bytes:
+    data = _zip({"a.jpg": b"x" * 1000})
+    data = _patch_u16(data, b"PK\x03\x04", 6, 1)     # local header: encrypted flag
+    return _patch_u16(data, b"PK\x01\x02", 8, 1)     # central directory: encrypted flag
+
+def _unsupported_method() -> bytes:
+    data = _zip({"a.jpg": b"x" * 1000})
+    data = _patch_u16(data, b"PK\x03\x04", 8, 77)
+    return _patch_u16(data, b"PK\x01\x02", 10, 77)
+
+def _bad_crc() -> bytes:
+    return _flip_byte(_zip({"a.jpg": b"x" * 1000}), b"xxxx")
+
+def _corrupt_deflate() -> bytes:
+    data = bytearray(_zip({"a.jpg": b"x" * 1000}, zipfile.ZIP_DEFLATED))
+    start = data.find(b"a.jpg") + len("a.jpg")
+    data[start:start + 4] = b"\xff\xff\xff\xff"
+    return bytes(data)
+
+def _post(client, parts):
+    files = [("images", (name, data, content_type)) for name, data, content_type in parts]
+    return client.post("/api/analyze/batch", files=files)
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_zip_and_image_uploads_stream_one_line_per_image(api_client):
+    archive = _zip({"a.jpg": _image(seed=1), "nested/b.png": _image(".png", seed=2),
+                    "notes.txt": b"ignored", "__MACOSX/": b"", "nested/.hidden.jpg": b"ignored"})
+    response = _post(api_client, [("photos.zip", archive, "application/zip"),
+                                  ("c.jpg", _image(seed=3), "image/jpeg")])
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = _lines(response)
+    assert sorted((line["index"], line["source"]) for line in lines) == [
+        (0, "photos.zip/a.jpg"), (1, "photos.zip/nested/b.png"), (2, "c.jpg")]
+    for line in lines:
+        assert "error" not in line
+        assert line["model_version"] == "mock"
+        assert line["category"] and line["severity"]
+
+def test_too_many_images_is_rejected(api_client, monkeypatch):
+    monkeypatch.setattr(report, "BATCH_MAX_IMAGES", 2)
+    images = [(f"{i}.jpg", _image(seed=i), "image/jpeg") for i in range(3)]
+    assert _post(api_client, images).status_code == 413
+    archive = _zip({f"{i}.jpg": _image(seed=i) for i in range(3)})
+    assert _post(api_client, [("photos.zip", archive, "application/zip")]).status_code == 413
+
+def test_too_many_bytes_is_rejected(api_client, monkeypatch):
+    image = _image()
+    monkeypatch.setattr(report, "BATCH_MAX_TOTAL_BYTES", len(image) + 1)
+    assert _post(api_client, [("a.jpg", image, "image/jpeg"), ("b.jpg", image, "image/jpeg")]).status_code == 413
+    archive = _zip({"a.jpg": image, "b.jpg": image})
+    assert _post(api_client, [("photos.zip", archive, "application/zip")]).status_code == 413
+
+def test_oversized_archive_member_is_rejected(api_client, monkeypatch):
+    monkeypatch.setattr(report, "BATCH_MAX_IMAGE_BYTES", 10)
+    response = _post(api_client, [("photos.zip", _zip({"a.jpg": _image()}), "application/zip")])
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("name, data, content_type", [
+    ("notes.txt", b"hello", "text/plain"),
+    ("photos.zip", b"not a zip", "application/zip"),
+    ("photos.zip", _encrypted_member(), "application/zip"),
+    ("photos.zip", _unsupported_method(), "application/zip"),
+    ("photos.zip", _bad_crc(), "application/zip"),
+    ("photos.zip", _corrupt_deflate(), "application/zip"),
+    ("photos.zip", _zip({"notes.txt": b"no images"}), "application/zip"),
+], ids=["not-an-image", "not-a-zip", "encrypted", "unsupported-method", "bad-crc", "corrupt-deflate", "no-images"])
+def test_invalid_uploads_are_rejected(api_client, name, data, content_type):
+    assert _post(api_client, [(name, data, content_type)]).status_code == 400
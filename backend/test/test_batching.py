@@ -0,0 +1,107 @@
+"""
+Unit tests for the MicroBatcher scheduler (app/services/batching.py).
+
+Run from backend/:
+    python -m pytest test/test_batching.py -q
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.batching import MicroBatcher
+
+
+class Recorder:
+    """batch_fn that remembers every batch it was called with."""
+    def __init__(self, fn=lambda x: x * 2):
+        self.fn = fn
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, items):
+        with self.lock:
+            self.batches.append(list(items))
+        return [self.fn(x) for x in items]
+
+
+def test_concurrent_calls_are_coalesced():
+    recorder = Recorder()
+    # A long wait, so every submission lands in the first batch
+    batcher = MicroBatcher(recorder, max_batch_size=4, max_wait_ms=500)
+    try:
+        futures = [batcher.submit(i) for i in range(4)]
+        assert [f.result(timeout=5) for f in futures] == [0, 2, 4, 6]
+        assert recorder.batches == [[0, 1, 2, 3]]
+    finally:
+        batcher.close()
+
+def test_batches_never_exceed_max_size():
+    recorder = Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=3, max_wait_ms=50)
+    try:
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            results = list(pool.map(batcher, range(10)))
+        assert results == [i * 2 for i in range(10)]
+        assert all(len(b) <= 3 for b in recorder.batches)
+        assert sorted(x for b in recorder.batches for x in b) == list(range(10))
+    finally:
+        batcher.close()
+
+def test_max_batch_size_one_runs_inline():
+    recorder = Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=1)
+    assert batcher(21) == 42
+    assert batcher._thread is None
+
+def test_batch_exception_fails_every_item():
+    def boom(items):
+        raise ValueError("model exploded")
+    batcher = MicroBatcher(boom, max_batch_size=2, max_wait_ms=500)
+    try:
+        futures = [batcher.submit(i) for i in range(2)]
+        for f in futures:
+            with pytest.raises(ValueError, match="model exploded"):
+                f.result(timeout=5)
+    finally:
+        batcher.close()
+
+def test_wrong_result_count_is_an_error():
+    batcher = MicroBatcher(lambda items: items[:1], max_batch_size=2, max_wait_ms=500)
+    try:
+        futures = [batcher.submit(i) for i in range(2)]
+        for f in futures:
+            with pytest.raises(RuntimeError, match="returned 1 results for 2 items"):
+                f.result(timeout=5)
+    finally:
+        batcher.close()
+
+def test_cancelled_items_are_skipped():
+    entered, release = threading.Event(), threading.Event()
+    recorder = Recorder()
+
+    def slow(items):
+        entered.set()
+        release.wait(5)
+        return recorder(items)
+
+    batcher = MicroBatcher(slow, max_batch_size=2, max_wait_ms=0)
+    try:
+        first = batcher.submit("first")
+        assert entered.wait(5)  # the worker is busy with the first batch
+        second = batcher.submit("second")
+        third = batcher.submit("third")
+        assert second.cancel()
+        release.set()
+        assert first.result(timeout=5) == "firstfirst"
+        assert third.result(timeout=5) == "thirdthird"
+        assert "second" not in [x for b in recorder.batches for x in b]
+    finally:
+        batcher.close()
+
+def test_worker_restarts_after_close():
+    batcher = MicroBatcher(Recorder(), max_batch_size=2, max_wait_ms=1)
+    assert batcher(1) == 2
+    batcher.close()
+    assert batcher(2) == 4
+    batcher.close()
@@ -0,0 +1,115 @@
+"""
+Unit tests for the classifier -> detector cascade: the branch policy
+(app/services/cascade.py) and how run_analysis applies it, using a stub
+ai_service instead of the models.
+
+Run from backend/:
+    python -m pytest test/test_cascade.py -q
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("torch")
+
+from app.models.ticket_model import SeverityLevel
+from app.services import cascade, metrics
+from app.services.ai_service import DetectorDisabledError
+from app.services.analysis_service import run_analysis
+
+BOX = {"box": [10, 10, 50, 50], "confidence": 0.9, "severity": "High"}
+
+
+def _prediction(label: str, p_pothole: float) -> dict:
+    probabilities = {"pothole": p_pothole, label: 1 - p_pothole} if label != "pothole" else {"pothole": p_pothole}
+    confidence = probabilities[label]
+    return {"label": label, "confidence": confidence, "probabilities": probabilities,
+            "top_k": [{"label": label, "confidence": confidence}]}
+
+class StubAIService:
+    """Returns a fixed prediction and detection; records detector calls."""
+    def __init__(self, prediction: dict, boxes=None, detector_disabled: bool = False):
+        self.prediction = prediction
+        self.boxes = boxes or []
+        self.detector_disabled = detector_disabled
+        self.detect_calls = 0
+
+    def predict_image(self, image):
+        return self.prediction
+
+    def detect_boxes(self, image, output_path=None, source_size=None):
+        self.detect_calls += 1
+        if self.detector_disabled:
+            raise DetectorDisabledError("disabled")
+        severity = max((b["severity"] for b in self.boxes), default="Unknown")
+        return {"severity": severity, "boxes": self.boxes, "image_size": [image.shape[1], image.shape[0]]}
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+def _image():
+    return np.zeros((48, 64, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("label, p_pothole, expected", [
+    ("pothole", 0.90, cascade.DETECT),
+    ("pothole", 0.25, cascade.DETECT),                  # at the skip threshold
+    ("pothole", 0.24, cascade.SKIP_LOW_CONFIDENCE),
+    ("garbage", 0.30, cascade.DETECT_BORDERLINE),       # at the borderline threshold
+    ("garbage", 0.29, cascade.SKIP_NOT_POTHOLE),
+    ("Garbage", 0.00, cascade.SKIP_NOT_POTHOLE),
+    ("Pothole", 0.50, cascade.DETECT),                  # labels compare case-insensitively
+])
+def test_decide(label, p_pothole, expected):
+    assert cascade.decide(_prediction(label, p_pothole), skip_below=0.25, borderline=0.30) == expected
+    assert metrics.get_counter(f"cascade.{expected}") == 1
+
+def test_decide_without_probabilities_never_detects_borderline():
+    assert cascade.decide({"label": "garbage"}, borderline=0.0) == cascade.DETECT_BORDERLINE
+    assert cascade.decide({"label": "garbage"}, borderline=0.01) == cascade.SKIP_NOT_POTHOLE
+
+@pytest.mark.parametrize("promoted, counter", [
+    (True, "cascade.borderline_promoted"),
+    (False, "cascade.borderline_rejected"),
+])
+def test_record_borderline_outcome(promoted, counter):
+    cascade.record_borderline_outcome(promoted)
+    assert metrics.snapshot()["counters"] == {counter: 1}
+
+@pytest.mark.parametrize("label, p_pothole, boxes, category, severity, detect_calls", [
+    ("pothole", 0.90, [BOX], "pothole", SeverityLevel.HIGH, 1),
+    ("pothole", 0.10, [BOX], "pothole", SeverityLevel.NA, 0),     # skip_low_confidence
+    ("garbage", 0.05, [BOX], "garbage", SeverityLevel.NA, 0),     # skip_not_pothole
+    ("garbage", 0.40, [BOX], "pothole", SeverityLevel.HIGH, 1),   # borderline, promoted
+    ("garbage", 0.40, [], "garbage", SeverityLevel.NA, 1),        # borderline, rejected
+])
+def test_run_analysis_applies_the_cascade(monkeypatch, label, p_pothole, boxes, category, severity, detect_calls):
+    monkeypatch.setattr(cascade, "CASCADE_SKIP_BELOW", 0.25)
+    monkeypatch.setattr(cascade, "CASCADE_BORDERLINE", 0.30)
+    service = StubAIService(_prediction(label, p_pothole), boxes)
+    result = run_analysis(service, _image())
+    assert (result["category"], result["severity"]) == (category, severity)
+    assert result["detections"] == (boxes if severity != SeverityLevel.NA else [])
+    assert service.detect_calls == detect_calls
+
+def test_borderline_outcomes_are_counted(monkeypatch):
+    monkeypatch.setattr(cascade, "CASCADE_BORDERLINE", 0.30)
+    run_analysis(StubAIService(_prediction("garbage", 0.40), [BOX]), _image())
+    run_analysis(StubAIService(_prediction("garbage", 0.40), []), _image())
+    counters = metrics.snapshot()["counters"]
+    assert counters["cascade.detect_borderline"] == 2
+    assert counters["cascade.borderline_promoted"] == 1
+    assert counters["cascade.borderline_rejected"] == 1
+
+def test_disabled_detector_keeps_the_category_ungraded(monkeypatch):
+    monkeypatch.setattr(cascade, "CASCADE_BORDERLINE", 0.30)
+    result = run_analysis(StubAIService(_prediction("garbage", 0.40), [BOX], detector_disabled=True), _image())
+    assert (result["category"], result["severity"]) == ("garbage", SeverityLevel.NA)
+    assert "cascade.borderline_promoted" not in metrics.snapshot()["counters"]
+
+def test_run_analysis_reports_the_source_size():
+    result = run_analysis(StubAIService(_prediction("garbage", 0.0)), _image(), source_size=(640, 480))
+    assert result["image_size"] == [640, 480]
+    assert result["cascade"] == cascade.SKIP_NOT_POTHOLE
@@ -0,0 +1,106 @@
+"""
+Unit tests for the classifier execution options (engines.optimize_classifier):
+channels_last / bf16 / torch.compile are dropped when they fail or disagree
+with fp32, and the classifier keeps running in eager fp32.
+
+Uses a tiny randomly initialised CNN, so no model weights are needed.
+
+Run from backend/:
+    python -m pytest test/test_classifier_options.py -q
+"""
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from app.services import engines
+
+CPU = torch.device("cpu")
+
+
+class FailingLayout(torch.nn.Module):
+    """Tiny CNN whose .to(memory_format=channels_last) fails, like an unsupported custom op."""
+    def __init__(self, fail_channels_last: bool = False):
+        super().__init__()
+        with torch.random.fork_rng():
+            torch.manual_seed(0)
+            self.features = torch.nn.Sequential(torch.nn.Conv2d(3, 4, 3, stride=4), torch.nn.ReLU(),
+                                                torch.nn.AdaptiveAvgPool2d(1), torch.nn.Flatten())
+            self.fc = torch.nn.Linear(4, 3)
+        self.fail_channels_last = fail_channels_last
+        self.eval()
+
+    def to(self, *args, memory_format=None, **kwargs):
+        if self.fail_channels_last and memory_format == torch.channels_last:
+            raise RuntimeError("channels_last is not supported")
+        return super().to(*args, **({"memory_format": memory_format} if memory_format else {}), **kwargs)
+
+    def forward(self, x):
+        return self.fc(self.features(x))
+
+@pytest.fixture(autouse=True)
+def few_parity_samples(monkeypatch):
+    monkeypatch.setattr(engines, "PRECISION_PARITY_SAMPLES", 4)
+
+def _check_runs_in_eager(runner, model):
+    inputs = engines.parity_inputs(2, seed=1)
+    with torch.no_grad():
+        assert torch.equal(runner(inputs), model(inputs))
+    assert runner is model
+
+
+def test_defaults_leave_the_model_untouched():
+    model = FailingLayout()
+    runner, report = engines.optimize_classifier(model, CPU, precision="fp32", channels_last=False,
+                                                 compile_model=False)
+    assert runner is model
+    assert report["active"] == {"precision": "fp32", "channels_last": False, "compile": False}
+
+def test_compile_failure_falls_back_to_channels_last(monkeypatch):
+    def broken_compile(*args, **kwargs):
+        raise RuntimeError("no C++ compiler")
+    monkeypatch.setattr(torch, "compile", broken_compile)
+    model = FailingLayout()
+    runner, report = engines.optimize_classifier(model, CPU, precision="fp32", channels_last=True,
+                                                 compile_model=True)
+    assert report["active"] == {"precision": "fp32", "channels_last": True, "compile": False}
+    assert any(note.startswith("compile failed") for note in report["notes"])
+    inputs = engines.parity_inputs(2, seed=1)
+    with torch.no_grad():
+        assert torch.allclose(runner(inputs), model(inputs), atol=1e-5)
+
+def test_channels_last_failure_keeps_eager_fp32():
+    model = FailingLayout(fail_channels_last=True)
+    runner, report = engines.optimize_classifier(model, CPU, precision="fp32", channels_last=True,
+                                                 compile_model=False)
+    assert report["active"] == {"precision": "fp32", "channels_last": False, "compile": False}
+    assert any(note.startswith("bf16/channels_last failed") for note in report["notes"])
+    _check_runs_in_eager(runner, model)
+
+def test_every_attempt_failing_keeps_eager_fp32(monkeypatch):
+    def broken_compile(*args, **kwargs):
+        raise RuntimeError("no C++ compiler")
+    monkeypatch.setattr(torch, "compile", broken_compile)
+    model = FailingLayout(fail_channels_last=True)
+    runner, report = engines.optimize_classifier(model, CPU, precision="fp32", channels_last=True,
+                                                 compile_model=True)
+    assert report["active"]["compile"] is False and report["active"]["channels_last"] is False
+    assert len(report["notes"]) == 2
+    _check_runs_in_eager(runner, model)
+
+def test_low_agreement_with_fp32_keeps_eager_fp32(monkeypatch):
+    monkeypatch.setattr(engines, "PRECISION_MIN_AGREEMENT", 1.01)
+    model = FailingLayout()
+    runner, report = engines.optimize_classifier(model, CPU, precision="fp32", channels_last=True,
+                                                 compile_model=False)
+    assert report["parity"]["top1_agreement"] == 1.0
+    assert report["active"]["channels_last"] is False
+    assert next(model.parameters()).is_contiguous()
+    _check_runs_in_eager(runner, model)
+
+def test_unsupported_bf16_is_dropped(monkeypatch):
+    monkeypatch.setattr(engines, "cpu_supports_bf16", lambda: False)
+    model = FailingLayout()
+    runner, report = engines.optimize_classifier(model, CPU, precision="bf16", channels_last=False,
+                                                 compile_model=False)
+    assert "CPU has no native bf16 support, using fp32" in report["notes"]
+    _check_runs_in_eager(runner, model)
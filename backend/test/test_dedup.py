@@ -0,0 +1,105 @@
+"""
+Unit tests for near-duplicate detection (app/services/dedup.py): the
+perceptual hash and the in-memory DuplicateIndex.
+
+Run from backend/:
+    python -m pytest test/test_dedup.py -q
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from PIL import Image
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.services.dedup import DuplicateIndex, METRES_PER_DEGREE, hash_distance, perceptual_hash
+
+LAT, LON = 3.1390, 101.6869  # Kuala Lumpur
+HASH = "f0f0f0f0f0f0f0f0"
+
+
+def _offset(metres_north: float = 0.0, metres_east: float = 0.0):
+    lon_scale = np.cos(np.radians(LAT))
+    return LAT + metres_north / METRES_PER_DEGREE, LON + metres_east / (METRES_PER_DEGREE * lon_scale)
+
+def _flip_bits(phash: str, count: int) -> str:
+    return f"{int(phash, 16) ^ ((1 << count) - 1):016x}"
+
+def _photo(width: int = 320, height: int = 240, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 256, (height // 16, width // 16, 3), dtype=np.uint8)
+    return np.repeat(np.repeat(coarse, 16, axis=0), 16, axis=1)
+
+
+def test_hash_distance_counts_differing_bits():
+    assert hash_distance(0b1011, 0b0001) == 2
+    assert hash_distance(int(HASH, 16), int(_flip_bits(HASH, 5), 16)) == 5
+
+def test_perceptual_hash_survives_rescaling_but_not_a_different_photo():
+    photo = _photo()
+    smaller = np.asarray(Image.fromarray(photo).resize((160, 120), Image.BILINEAR))
+    h = perceptual_hash(photo)
+    assert len(h) == 16
+    assert hash_distance(int(h, 16), int(perceptual_hash(smaller), 16)) <= 4
+    assert hash_distance(int(h, 16), int(perceptual_hash(_photo(seed=1)), 16)) > 10
+
+def test_query_filters_by_radius_and_hash_distance():
+    index = DuplicateIndex(radius_m=25)
+    index.add("near", *_offset(10, 0), HASH)
+    index.add("far", *_offset(0, 60), HASH)
+    index.add("other-photo", *_offset(5, 5), _flip_bits(HASH, 20))
+    assert [m["ticket_id"] for m in index.query(LAT, LON, HASH, max_hash_distance=10)] == ["near"]
+
+def test_query_finds_neighbours_across_cell_boundaries():
+    index = DuplicateIndex(radius_m=25)
+    for i, (north, east) in enumerate([(20, 0), (-20, 0), (0, 20), (0, -20), (14, 14)]):
+        index.add(f"t{i}", *_offset(north, east), HASH)
+    assert len(index.query(LAT, LON, HASH, limit=10)) == 5
+
+def test_query_sorts_by_hash_then_physical_distance():
+    index = DuplicateIndex(radius_m=25)
+    index.add("closer-worse-hash", *_offset(2, 0), _flip_bits(HASH, 3))
+    index.add("farther", *_offset(20, 0), HASH)
+    index.add("closer", *_offset(5, 0), HASH)
+    matches = index.query(LAT, LON, HASH)
+    assert [m["ticket_id"] for m in matches] == ["closer", "farther", "closer-worse-hash"]
+    assert matches[0]["hash_distance"] == 0
+    assert matches[0]["distance_m"] == pytest.approx(5, abs=0.5)
+    assert len(index.query(LAT, LON, HASH, limit=2)) == 2
+
+def test_add_is_idempotent_and_remove_forgets():
+    index = DuplicateIndex()
+    index.add("t1", LAT, LON, HASH)
+    index.add("t1", LAT, LON, HASH)
+    index.add("no-hash", LAT, LON, None)
+    assert len(index) == 1
+    index.remove("t1")
+    index.remove("unknown")
+    assert len(index) == 0
+    assert index.query(LAT, LON, HASH) == []
+
+def test_refresh_loads_new_rows_incrementally():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    db = sessionmaker(bind=engine)()
+    db.execute(text("CREATE TABLE tickets (id TEXT PRIMARY KEY, latitude FLOAT, longitude FLOAT, image_phash TEXT)"))
+    insert = text("INSERT INTO tickets VALUES (:id, :lat, :lon, :phash)")
+    db.execute(insert, {"id": "t1", "lat": LAT, "lon": LON, "phash": HASH})
+    db.execute(insert, {"id": "unhashed", "lat": LAT, "lon": LON, "phash": None})
+    db.commit()
+
+    index = DuplicateIndex()
+    assert not index.loaded.is_set()
+    index.refresh(db, force=True)
+    assert index.loaded.is_set() and len(index) == 1
+    assert not index.refresh_due()
+
+    db.execute(insert, {"id": "t2", "lat": LAT, "lon": LON, "phash": HASH})
+    db.commit()
+    index.refresh(db)  # not due yet
+    assert len(index) == 1
+    index.refresh(db, force=True)
+    assert len(index) == 2
+    db.close()
+    engine.dispose()
@@ -0,0 +1,102 @@
+"""
+Parity checks between eager PyTorch and the exported inference engines.
+
+Run from backend/ after `python scripts/export_models.py`:
+    python -m pytest test/test_engine_parity.py -q
+
+The export checks use a randomly initialised ResNet18 and always run (ONNX
+needs onnx and onnxruntime installed). Tests against the real weights are
+skipped when the weights or exported artifacts are missing.
+"""
+import os
+import glob
+
+import pytest
+
+torch = pytest.importorskip("torch")
+np = pytest.importorskip("numpy")
+
+from app.services import engines
+from app.services.image_io import load_image
+
+BACKEND_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+CLASS_MODEL_PATH = os.path.join(BACKEND_DIR, "app", "models", "classification", "best_model.pth")
+DETECTION_MODEL_PATH = os.path.join(BACKEND_DIR, "app", "models", "detection", "best_severity_check.pt")
+UPLOADS_DIR = os.path.join(BACKEND_DIR, "static", "uploads")
+
+MIN_TOP1_AGREEMENT = 0.99
+NUM_CLASSES = 6
+
+@pytest.fixture(scope="module")
+def random_weights(tmp_path_factory):
+    """A randomly initialised ResNet18 classifier saved the way training saves best_model.pth."""
+    from torchvision import models
+    with torch.random.fork_rng():
+        torch.manual_seed(0)
+        model = models.resnet18(weights=None)
+        model.fc = torch.nn.Linear(model.fc.in_features, NUM_CLASSES)
+    path = tmp_path_factory.mktemp("classification") / "best_model.pth"
+    torch.save(model.state_dict(), path)
+    return str(path)
+
+@pytest.mark.parametrize("engine", ["torchscript", "onnx"])
+def test_exported_classifier_matches_eager(random_weights, engine):
+    if engine == "onnx":
+        pytest.importorskip("onnx")
+        pytest.importorskip("onnxruntime")
+    out_path = engines.export_classifier(random_weights, NUM_CLASSES, engine)
+    assert out_path == engines.classifier_artifact_path(random_weights, engine)
+    eager = engines.build_eager_classifier(random_weights, NUM_CLASSES, torch.device("cpu"))
+    exported = engines.load_classifier(engine, random_weights, NUM_CLASSES, torch.device("cpu"))
+    batch = engines.parity_inputs(4)  # also checks a batch size other than the traced one
+    with torch.no_grad():
+        expected = eager(batch)
+        actual = exported(batch).float()
+    assert actual.shape == (4, NUM_CLASSES)
+    torch.testing.assert_close(actual, expected, rtol=1e-3, atol=1e-4)
+    assert torch.equal(actual.argmax(1), expected.argmax(1))
+
+def _manager(engine):
+    from app.services.ai_service import AIModelManager
+    if not os.path.exists(CLASS_MODEL_PATH) or not os.path.exists(DETECTION_MODEL_PATH):
+        pytest.skip("model weights not available")
+    if engine != "torch":
+        if engine == "onnx":
+            pytest.importorskip("onnxruntime")
+        if not os.path.exists(engines.classifier_artifact_path(CLASS_MODEL_PATH, engine)):
+            pytest.skip(f"{engine} artifacts not exported")
+    return AIModelManager(device="cpu", engine=engine)
+
+def _sample_batch(manager):
+    """Real uploads when available, topped up with seeded random images."""
+    from PIL import Image
+    images = [load_image(p) for p in sorted(glob.glob(os.path.join(UPLOADS_DIR, "*.jpg")))[:32]]
+    rng = np.random.default_rng(0)
+    images += [rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8) for _ in range(8)]
+    return images, torch.stack([manager.preprocess(Image.fromarray(img)) for img in images])
+
+@pytest.fixture(scope="module")
+def eager():
+    return _manager("torch")
+
+@pytest.mark.parametrize("engine", ["torchscript", "onnx"])
+def test_classifier_top1_agreement(eager, engine):
+    candidate = _manager(engine)
+    _, batch = _sample_batch(eager)
+    with torch.no_grad():
+        expected = torch.argmax(eager.class_model(batch), 1)
+        actual = torch.argmax(candidate.class_model(batch), 1)
+    agreement = (expected == actual).float().mean().item()
+    assert agreement >= MIN_TOP1_AGREEMENT, f"{engine} top-1 agreement {agreement:.3f}"
+
+@pytest.mark.parametrize("engine", ["torchscript", "onnx"])
+def test_detector_severity_agreement(eager, engine):
+    from app.services.ai_service import AIService
+    if not os.path.exists(engines.detector_artifact_path(DETECTION_MODEL_PATH, engine)):
+        pytest.skip(f"{engine} detector not exported")
+    candidate = _manager(engine)
+    images, _ = _sample_batch(eager)
+    expected = [AIService(eager, batch_max_size=1).detect_image(img) for img in images]
+    actual = [AIService(candidate, batch_max_size=1).detect_image(img) for img in images]
+    agreement = sum(e == a for e, a in zip(expected, actual)) / len(images)
+    assert agreement >= MIN_TOP1_AGREEMENT, f"{engine} severity agreement {agreement:.3f}"
@@ -0,0 +1,75 @@
+"""
+Unit tests for upload ingest (app/services/image_io.py): EXIF orientation,
+reduced-size JPEG decoding, and reporting the original size in upright
+coordinates.
+
+Run from backend/:
+    python -m pytest test/test_image_io.py -q
+"""
+import io
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from PIL import Image
+
+from app.services.image_io import EXIF_ORIENTATION, decode_image, ingest_image, load_image
+
+
+def _photo(width: int, height: int, orientation: int = 1, fmt: str = "JPEG") -> bytes:
+    """Grey image stored as width x height, with a red block in its stored top-left corner."""
+    pixels = np.full((height, width, 3), 128, dtype=np.uint8)
+    pixels[: height // 4, : width // 4] = (255, 0, 0)
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = orientation
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, format=fmt, exif=exif, quality=95)
+    return buf.getvalue()
+
+def _red_corner(image: np.ndarray) -> str:
+    """Which corner of an RGB array holds the red block."""
+    h, w = image.shape[:2]
+    corners = {"top-left": image[h // 8, w // 8], "top-right": image[h // 8, w - 1 - w // 8],
+               "bottom-left": image[h - 1 - h // 8, w // 8], "bottom-right": image[h - 1 - h // 8, w - 1 - w // 8]}
+    return next(name for name, (r, g, b) in corners.items() if r > 200 and g < 80 and b < 80)
+
+
+@pytest.mark.parametrize("orientation, upright_size, corner", [
+    (1, (400, 300), "top-left"),
+    (3, (400, 300), "bottom-right"),   # rotated 180
+    (6, (300, 400), "top-right"),      # rotate 90 CW to display, e.g. a portrait phone photo
+    (8, (300, 400), "bottom-left"),    # rotate 90 CCW to display
+])
+def test_ingest_applies_exif_orientation(orientation, upright_size, corner):
+    image, source_size = ingest_image(_photo(400, 300, orientation), max_side=0)
+    assert source_size == upright_size
+    assert image.shape == (upright_size[1], upright_size[0], 3)
+    assert _red_corner(image) == corner
+
+def test_ingest_downscales_rotated_jpeg_and_reports_the_original_size():
+    # 4000x3000 stored, displayed as 3000x4000 portrait; draft() decodes at 1/4 or 1/2 scale
+    image, source_size = ingest_image(_photo(4000, 3000, orientation=6), max_side=1000)
+    assert source_size == (3000, 4000)
+    assert image.shape == (1000, 750, 3)
+    assert image.dtype == np.uint8
+    assert _red_corner(image) == "top-right"
+
+def test_small_images_are_not_upscaled():
+    image, source_size = ingest_image(_photo(320, 240), max_side=1280)
+    assert source_size == (320, 240)
+    assert image.shape == (240, 320, 3)
+
+def test_png_is_downscaled_without_draft():
+    image, source_size = ingest_image(_photo(800, 400, fmt="PNG"), max_side=200)
+    assert source_size == (800, 400)
+    assert image.shape == (100, 200, 3)
+
+def test_load_and_decode_match_ingest(tmp_path):
+    data = _photo(2000, 1500, orientation=6)
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(data)
+    ingested, _ = ingest_image(data, max_side=640)
+    assert np.array_equal(load_image(str(path), 640), ingested)
+    assert np.array_equal(decode_image(data, 640), ingested)
+    assert load_image(str(path)).shape == (2000, 1500, 3)
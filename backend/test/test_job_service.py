@@ -0,0 +1,123 @@
+"""
+Unit tests for analysis job claiming, leases and recovery
+(app/services/job_service.py).
+
+Each test uses its own in-memory SQLite database; the app database is never touched.
+
+Run from backend/:
+    python -m pytest test/test_job_service.py -q
+"""
+import os
+import sys
+import socket
+import subprocess
+from datetime import datetime, timedelta, timezone
+
+from app.models.job_model import AnalysisJob, JobStatus
+from app.services import job_service
+from app.services.job_service import JobRunner
+
+
+def _runner(session_factory, worker_id):
+    runner = JobRunner(session_factory=session_factory)
+    runner.worker_id = worker_id
+    return runner
+
+def _add_job(session_factory, job_id, minutes_ago=0, **fields):
+    db = session_factory()
+    created = datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)
+    db.add(AnalysisJob(id=job_id, filename=f"{job_id}.jpg", created_at=created, **fields))
+    db.commit()
+    db.close()
+
+def _job(session_factory, job_id):
+    db = session_factory()
+    try:
+        return db.query(AnalysisJob).filter(AnalysisJob.id == job_id).one()
+    finally:
+        db.close()
+
+def _dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_claim_marks_job_running(session_factory):
+    _add_job(session_factory, "j1")
+    runner = _runner(session_factory, "host:1")
+    assert runner._claim_next() == "j1"
+    job = _job(session_factory, "j1")
+    assert job.status == JobStatus.RUNNING
+    assert job.worker == "host:1"
+    assert job.attempts == 1
+    assert job.started_at is not None
+    assert runner._claim_next() is None
+
+def test_claims_oldest_first(session_factory):
+    _add_job(session_factory, "newer", minutes_ago=1)
+    _add_job(session_factory, "older", minutes_ago=5)
+    runner = _runner(session_factory, "host:1")
+    assert [runner._claim_next(), runner._claim_next()] == ["older", "newer"]
+
+def test_each_job_is_claimed_once_across_workers(session_factory):
+    for i in range(6):
+        _add_job(session_factory, f"j{i}", minutes_ago=10 - i)
+    runners = [_runner(session_factory, f"host:{n}") for n in (1, 2, 3)]
+    claimed = []
+    for _ in range(4):
+        claimed.extend(job_id for job_id in (r._claim_next() for r in runners) if job_id)
+    assert sorted(claimed) == [f"j{i}" for i in range(6)]
+
+def test_finished_jobs_are_never_claimed(session_factory):
+    _add_job(session_factory, "done", status=JobStatus.DONE)
+    _add_job(session_factory, "failed", status=JobStatus.FAILED)
+    assert _runner(session_factory, "host:1")._claim_next() is None
+
+def test_expired_lease_is_requeued_and_reclaimed(session_factory, monkeypatch):
+    monkeypatch.setattr(job_service, "JOB_LEASE_SECONDS", 60)
+    monkeypatch.setattr(job_service, "JOB_MAX_ATTEMPTS", 3)
+    _add_job(session_factory, "lost", status=JobStatus.RUNNING, worker="elsewhere:1", attempts=1,
+             started_at=datetime.now(timezone.utc) - timedelta(minutes=5))
+    _add_job(session_factory, "busy", status=JobStatus.RUNNING, worker="elsewhere:1", attempts=1,
+             started_at=datetime.now(timezone.utc))
+    assert _runner(session_factory, "host:2")._claim_next() == "lost"
+    job = _job(session_factory, "lost")
+    assert job.worker == "host:2"
+    assert job.attempts == 2
+    assert _job(session_factory, "busy").worker == "elsewhere:1"
+
+def test_expired_lease_fails_after_max_attempts(session_factory, monkeypatch):
+    monkeypatch.setattr(job_service, "JOB_LEASE_SECONDS", 60)
+    monkeypatch.setattr(job_service, "JOB_MAX_ATTEMPTS", 3)
+    _add_job(session_factory, "poison", status=JobStatus.RUNNING, worker="elsewhere:1", attempts=3,
+             started_at=datetime.now(timezone.utc) - timedelta(minutes=5))
+    assert _runner(session_factory, "host:2")._claim_next() is None
+    job = _job(session_factory, "poison")
+    assert job.status == JobStatus.FAILED
+    assert job.error == "Gave up after 3 attempt(s)"
+    assert job.finished_at is not None
+
+def test_recover_requeues_jobs_of_dead_local_workers_only(session_factory):
+    host = socket.gethostname()
+    now = datetime.now(timezone.utc)
+    _add_job(session_factory, "dead", status=JobStatus.RUNNING, worker=f"{host}:{_dead_pid()}",
+             attempts=1, started_at=now)
+    _add_job(session_factory, "alive", status=JobStatus.RUNNING, worker=f"{host}:{os.getpid()}",
+             attempts=1, started_at=now)
+    _add_job(session_factory, "remote", status=JobStatus.RUNNING, worker="other-host:1",
+             attempts=1, started_at=now)
+    _runner(session_factory, f"{host}:0")._recover()
+    assert _job(session_factory, "dead").status == JobStatus.QUEUED
+    assert _job(session_factory, "dead").worker is None
+    assert _job(session_factory, "alive").status == JobStatus.RUNNING
+    assert _job(session_factory, "remote").status == JobStatus.RUNNING
+
+def test_shutdown_requeue_does_not_count_an_attempt(session_factory):
+    _add_job(session_factory, "j1")
+    runner = _runner(session_factory, "host:1")
+    runner._claim_next()
+    runner._requeue(lambda job: job.worker == runner.worker_id, count_attempt=False)
+    job = _job(session_factory, "j1")
+    assert job.status == JobStatus.QUEUED
+    assert job.attempts == 0
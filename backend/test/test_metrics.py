@@ -0,0 +1,96 @@
+"""
+Unit tests for the in-process metrics registry (app/services/metrics.py):
+counters, latency histograms and per-request Server-Timing stages.
+
+Run from backend/:
+    python -m pytest test/test_metrics.py -q
+"""
+import asyncio
+import contextvars
+
+import pytest
+
+from app.services import metrics
+from app.services.metrics import BUCKETS_MS, Histogram
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_counters():
+    metrics.increment("a")
+    metrics.increment("a", 2)
+    assert metrics.get_counter("a") == 3
+    assert metrics.get_counter("missing") == 0
+
+def test_histogram_buckets_are_upper_bounds():
+    h = Histogram()
+    for value in (0.5, 0.6, 100, 100.1, 10 ** 6):
+        h.observe(value)
+    buckets = h.to_dict()["buckets"]
+    assert buckets["0.5"] == 1     # a bound is inclusive
+    assert buckets["1"] == 1
+    assert buckets["100"] == 1
+    assert buckets["250"] == 1
+    assert buckets["+Inf"] == 1
+    assert sum(buckets.values()) == h.count == 5
+
+def test_histogram_summary_and_quantiles():
+    h = Histogram()
+    for _ in range(90):
+        h.observe(3)      # bucket 5
+    for _ in range(10):
+        h.observe(40)     # bucket 50
+    d = h.to_dict()
+    assert d["count"] == 100
+    assert d["sum_ms"] == pytest.approx(670)
+    assert d["mean_ms"] == pytest.approx(6.7)
+    assert d["p50_ms"] == 5
+    assert d["p95_ms"] == 50
+    assert d["p99_ms"] == 50
+
+def test_quantile_of_empty_and_overflowing_histograms():
+    assert Histogram().quantile(0.5) is None
+    assert Histogram().to_dict()["mean_ms"] is None
+    h = Histogram()
+    h.observe(BUCKETS_MS[-1] * 2)
+    assert h.quantile(0.5) is None
+
+def test_timed_records_stage_histogram_and_request_stages():
+    stages = metrics.start_request()
+    with metrics.timed("decode"):
+        pass
+    assert metrics.timed_call("classify", lambda x: x + 1, 1) == 2
+    assert [name for name, _ in stages] == ["decode", "classify"]
+    histograms = metrics.snapshot()["histograms"]
+    assert histograms["stage.decode"]["count"] == 1
+    assert histograms["stage.classify"]["count"] == 1
+
+def test_stages_outside_a_request_only_reach_histograms():
+    ctx = contextvars.Context()
+    ctx.run(metrics.record_stage, "background", 1.0)
+    assert metrics.snapshot()["histograms"]["stage.background"]["count"] == 1
+
+def test_stages_follow_the_request_into_worker_threads():
+    async def request():
+        stages = metrics.start_request()
+        await asyncio.to_thread(metrics.record_stage, "imwrite", 2.0)
+        return stages
+    assert asyncio.run(request()) == [("imwrite", 2.0)]
+
+def test_server_timing_header_sums_repeated_stages():
+    header = metrics.server_timing_header([("detector.forward", 1.5), ("save", 2.0), ("detector.forward", 1.0)])
+    assert header == "detector-forward;dur=2.5, save;dur=2.0"
+
+def test_snapshot_and_reset():
+    metrics.increment("b")
+    metrics.observe("lat", 3)
+    snap = metrics.snapshot()
+    assert snap["counters"] == {"b": 1}
+    assert snap["histograms"]["lat"]["count"] == 1
+    metrics.reset()
+    assert metrics.snapshot() == {"counters": {}, "histograms": {}}
@@ -0,0 +1,63 @@
+"""
+Unit tests for MockAIService (app/services/global_ai.py): results are a
+pure function of the image content, and the simulated latency follows the
+configured distribution.
+
+Run from backend/:
+    python -m pytest test/test_mock_ai.py -q
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("torch")
+
+import cv2
+
+from app.services import global_ai
+from app.services.analysis_service import analyze_upload
+from app.services.global_ai import MOCK_CATEGORIES, MockAIService
+
+
+def _jpeg(seed: int) -> bytes:
+    image = np.random.default_rng(seed).integers(0, 256, (120, 160, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+def _service() -> MockAIService:
+    return MockAIService(classify_ms=0, detect_ms=0)
+
+def _outcome(content: bytes) -> tuple:
+    result = analyze_upload(_service(), content)
+    return result["category"], result["severity"], result["confidence"], result["detections"]
+
+
+def test_same_bytes_give_the_same_result():
+    content = _jpeg(0)
+    assert _outcome(content) == _outcome(content)
+
+def test_different_bytes_can_differ():
+    outcomes = {_outcome(_jpeg(seed))[:2] for seed in range(20)}
+    assert len(outcomes) > 1
+    assert {category for category, _ in outcomes} <= set(MOCK_CATEGORIES)
+
+def test_prediction_is_a_distribution_over_the_mock_categories():
+    prediction = _service().predict_image(np.zeros((32, 32, 3), dtype=np.uint8))
+    assert set(prediction["probabilities"]) == set(MOCK_CATEGORIES)
+    assert sum(prediction["probabilities"].values()) == pytest.approx(1, abs=1e-3)
+    assert prediction["label"] == prediction["top_k"][0]["label"]
+    assert prediction["confidence"] == max(prediction["probabilities"].values())
+
+def test_boxes_are_reported_in_source_coordinates():
+    image = np.random.default_rng(3).integers(0, 256, (100, 200, 3), dtype=np.uint8)
+    small = _service().detect_boxes(image)
+    large = _service().detect_boxes(image, source_size=(400, 200))
+    assert large["image_size"] == [400, 200]
+    assert len(small["boxes"]) == len(large["boxes"])
+    for a, b in zip(small["boxes"], large["boxes"]):
+        assert all(abs(2 * u - v) <= 2 for u, v in zip(a["box"], b["box"]))
+
+@pytest.mark.parametrize("dist", ["fixed", "normal", "lognormal", "exponential"])
+def test_latency_samples_have_the_configured_mean(dist):
+    samples = [global_ai._sample_latency_ms(20.0, dist=dist, cv=0.3) for _ in range(4000)]
+    assert min(samples) >= 0
+    assert np.mean(samples) == pytest.approx(20.0, rel=0.1)
+    assert global_ai._sample_latency_ms(0.0, dist=dist) == 0.0
@@ -0,0 +1,142 @@
+"""
+Unit tests for model loading in AIModelManager: parallel loading, warmup,
+the /ready readiness report and the detector load modes.
+
+The weight loaders are replaced by tiny in-memory models, so no model
+weights are needed.
+
+Run from backend/:
+    python -m pytest test/test_model_loading.py -q
+"""
+import time
+import logging
+import threading
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from app.services import ai_service, global_ai
+from app.services.ai_service import AIModelManager, AIService, DetectorDisabledError
+
+
+class Loaders:
+    """Replacement classifier/detector loaders that count calls and can wait for each other."""
+    def __init__(self, barrier: threading.Barrier = None):
+        self.barrier = barrier
+        self.classifier_loads = 0
+        self.detector_loads = 0
+        self.detector_calls = []
+
+    def load_classifier(self, manager):
+        if self.barrier:
+            self.barrier.wait()
+        self.classifier_loads += 1
+        manager.class_model = torch.nn.Flatten()
+        manager.class_names = ["pothole", "other"]
+        manager.temperature = 1.0
+
+    def load_detector(self, manager):
+        if self.barrier:
+            self.barrier.wait()
+        self.detector_loads += 1
+        manager._detection_model = lambda images, verbose=False: self.detector_calls.append(len(images))
+
+@pytest.fixture
+def loaders(monkeypatch):
+    fake = Loaders()
+    monkeypatch.setattr(AIModelManager, "_load_classification_model", lambda self: fake.load_classifier(self))
+    monkeypatch.setattr(AIModelManager, "_load_detection_model", lambda self: fake.load_detector(self))
+    return fake
+
+
+def test_classifier_and_detector_load_in_parallel(loaders):
+    # Each loader waits for the other, so a sequential load would time out
+    loaders.barrier = threading.Barrier(2, timeout=5)
+    manager = AIModelManager(device="cpu", detector_load="eager")
+    assert (loaders.classifier_loads, loaders.detector_loads) == (1, 1)
+    assert set(manager.load_timings) == {"classifier", "detector", "total"}
+
+def test_warmup_runs_every_batch_size(loaders):
+    manager = AIModelManager(device="cpu", detector_load="eager")
+    timings = manager.warmup(batch_sizes=[1, 4])
+    assert set(timings) == {"classifier", "detector"}
+    assert set(timings["classifier"]) == set(timings["detector"]) == {"1", "4"}
+    assert loaders.detector_calls == [1, 4]
+    assert manager.status()["warmup_ms"] == timings
+
+def test_readiness(loaders, monkeypatch):
+    monkeypatch.setattr(global_ai, "_ai_service", None)
+    monkeypatch.setattr(global_ai, "_ready", False)
+    assert global_ai.get_readiness() == {"ready": False, "reason": "AI service not initialized"}
+
+    monkeypatch.setattr(global_ai, "_ai_service", global_ai.MockAIService())
+    assert global_ai.get_readiness()["ready"] is False
+
+    service = AIService(AIModelManager(device="cpu", detector_load="eager"), batch_max_size=1)
+    monkeypatch.setattr(global_ai, "_ai_service", service)
+    monkeypatch.setattr(global_ai, "_ready", True)
+    readiness = global_ai.get_readiness()
+    assert readiness["ready"] is True
+    assert readiness["model_version"] == service.model_version
+    assert readiness["detector_state"] == "loaded"
+
+def test_lazy_detector_loads_once_on_first_use(loaders):
+    manager = AIModelManager(device="cpu", detector_load="lazy")
+    assert manager.detector_state == "not_loaded"
+    assert loaders.detector_loads == 0
+    assert "detector" not in manager.warmup(batch_sizes=[1])
+
+    threads = [threading.Thread(target=lambda: manager.detection_model) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert loaders.detector_loads == 1
+    assert manager.detector_state == "loaded"
+
+def test_disabled_detector_never_loads(loaders):
+    manager = AIModelManager(device="cpu", detector_load="disabled")
+    assert manager.detector_state == "disabled"
+    with pytest.raises(DetectorDisabledError):
+        manager.detection_model
+    assert loaders.detector_loads == 0
+    assert "detector" not in manager.warmup(batch_sizes=[1])
+
+def test_detect_boxes_on_disabled_detector_raises_without_error_log(loaders, caplog):
+    service = AIService(AIModelManager(device="cpu", detector_load="disabled"), batch_max_size=4)
+    image = torch.zeros((32, 32, 3), dtype=torch.uint8).numpy()
+    with caplog.at_level("DEBUG"), pytest.raises(DetectorDisabledError):
+        service.detect_boxes(image)
+    assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+    assert loaders.detector_loads == 0
+
+def test_background_detector_loads_and_warms_up(loaders, monkeypatch):
+    monkeypatch.setattr(ai_service, "WARMUP_ENABLED", True)
+    monkeypatch.setattr(ai_service, "WARMUP_BATCH_SIZES", [2])
+    manager = AIModelManager(device="cpu", detector_load="background")
+    deadline = time.monotonic() + 5
+    while "detector" not in manager.warmup_timings and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert manager.detector_state == "loaded"
+    assert loaders.detector_loads == 1
+    assert loaders.detector_calls == [2]
+
+def test_unknown_detector_load_mode_falls_back_to_eager(loaders):
+    manager = AIModelManager(device="cpu", detector_load="sometimes")
+    assert manager.detector_load == "eager"
+    assert manager.detector_state == "loaded"
+
+def test_model_version_follows_the_calibration_file(loaders, monkeypatch, tmp_path):
+    weights = tmp_path / "best_model.pth"
+    weights.write_bytes(b"weights")
+    files = {"classifier": str(weights), "class_mapping": str(tmp_path / "class_mapping.json"),
+             "detector": str(tmp_path / "missing.pt")}
+    monkeypatch.setattr(ai_service.model_registry, "resolve_files", lambda version: files)
+
+    uncalibrated = AIModelManager(device="cpu", detector_load="disabled").model_version
+    (tmp_path / "best_model.calibration.json").write_text('{"temperature": 1.5}')
+    calibrated = AIModelManager(device="cpu", detector_load="disabled").model_version
+    (tmp_path / "best_model.calibration.json").write_text('{"temperature": 2.0}')
+    recalibrated = AIModelManager(device="cpu", detector_load="disabled").model_version
+    assert len({uncalibrated, calibrated, recalibrated}) == 3
@@ -0,0 +1,176 @@
+"""
+Tests for the model registry and zero-downtime hot swap: version file
+resolution, the ACTIVE marker and its watcher (app/services/model_registry.py,
+app/services/global_ai.py), AIService.swap_models, and not caching a result
+when the models were swapped while it was computed.
+
+Run from backend/:
+    python -m pytest test/test_model_registry.py -q
+"""
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+
+import cv2
+
+from app.services import analysis_service, global_ai, model_registry
+from app.services.ai_service import AIService
+from app.services.result_cache import ResultCache, content_hash
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, "REGISTRY_DIR", str(tmp_path))
+    return tmp_path
+
+def _add_version(registry, name, *keys):
+    version_dir = registry / name
+    version_dir.mkdir()
+    for key in keys:
+        path = version_dir / model_registry.VERSION_LAYOUT[key]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"weights")
+    return version_dir
+
+
+def test_resolve_files_falls_back_to_defaults_per_file(registry):
+    assert model_registry.resolve_files(None) == model_registry.DEFAULT_FILES
+    version_dir = _add_version(registry, "2025-10-03-retrain", "classifier")
+    files = model_registry.resolve_files("2025-10-03-retrain")
+    assert files["classifier"] == str(version_dir / model_registry.VERSION_LAYOUT["classifier"])
+    assert files["class_mapping"] == model_registry.DEFAULT_FILES["class_mapping"]
+    assert files["detector"] == model_registry.DEFAULT_FILES["detector"]
+
+@pytest.mark.parametrize("name", ["missing", "../classification", ".hidden", ""])
+def test_resolve_files_rejects_unknown_versions(registry, name):
+    (registry / ".hidden").mkdir()
+    with pytest.raises(ValueError):
+        model_registry.resolve_files(name)
+
+def test_set_active_version(registry):
+    _add_version(registry, "v1", "classifier")
+    assert model_registry.active_version() is None
+    assert model_registry.active_marker_mtime() is None
+
+    model_registry.set_active_version("v1")
+    assert model_registry.active_version() == "v1"
+    assert model_registry.active_marker_mtime() is not None
+    assert [v["name"] for v in model_registry.list_versions() if v["active"]] == ["v1"]
+    assert sorted(p.name for p in registry.iterdir()) == ["ACTIVE", "v1"]  # no temp file left
+
+    with pytest.raises(ValueError):
+        model_registry.set_active_version("missing")
+    assert model_registry.active_version() == "v1"
+
+    model_registry.set_active_version(None)
+    assert model_registry.active_version() is None
+
+def test_watcher_reloads_when_active_changes(registry, monkeypatch):
+    _add_version(registry, "v1", "classifier")
+    reloads = []
+    reloaded = threading.Event()
+    def fake_reload(version, wait=False):
+        reloads.append(version)
+        reloaded.set()
+        return True
+    monkeypatch.setattr(global_ai, "reload_ai_service", fake_reload)
+    monkeypatch.setattr(global_ai, "MODEL_WATCH_SECONDS", 0.01)
+    monkeypatch.setattr(global_ai, "_ai_service", None)
+    # Change ACTIVE only after the watcher has taken its first look
+    polled = threading.Event()
+    marker_mtime = model_registry.active_marker_mtime
+    def polled_mtime():
+        mtime = marker_mtime()
+        polled.set()
+        return mtime
+    monkeypatch.setattr(model_registry, "active_marker_mtime", polled_mtime)
+    global_ai._watcher_stop.clear()
+    watcher = threading.Thread(target=global_ai._watch_registry, daemon=True)
+    watcher.start()
+    try:
+        assert polled.wait(5)
+        model_registry.set_active_version("v1")
+        assert reloaded.wait(5)
+    finally:
+        global_ai._watcher_stop.set()
+        watcher.join(5)
+    assert reloads == ["v1"]
+
+
+# ----------------------
+# Hot swap
+# ----------------------
+class _Classifier(torch.nn.Module):
+    """Always predicts class `index`."""
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+
+    def forward(self, x):
+        logits = torch.zeros((x.shape[0], 2))
+        logits[:, self.index] = 10.0
+        return logits
+
+def _manager(version, index):
+    return SimpleNamespace(model_version=version, class_model=_Classifier(index), class_names=["pothole", "other"],
+                           device=torch.device("cpu"), temperature=1.0, preprocess=lambda image: torch.zeros(3, 8, 8))
+
+def test_swap_models_serves_the_new_manager(monkeypatch):
+    old, new = _manager("v1", 0), _manager("v2", 1)
+    service = AIService(old, batch_max_size=1)
+    tensor = torch.zeros(3, 8, 8)
+    assert service._classify_batch([tensor])[0]["label"] == "pothole"
+    assert service.swap_models(new) is old
+    assert service.model_version == "v2"
+    assert service._classify_batch([tensor])[0]["label"] == "other"
+
+def test_batch_in_flight_keeps_its_manager():
+    old, new = _manager("v1", 0), _manager("v2", 1)
+    service = AIService(old, batch_max_size=1)
+    entered, release = threading.Event(), threading.Event()
+    forward = old.class_model.forward
+    def slow_forward(x):
+        entered.set()
+        release.wait(5)
+        return forward(x)
+    old.class_model.forward = slow_forward
+    result = []
+    worker = threading.Thread(target=lambda: result.extend(service._classify_batch([torch.zeros(3, 8, 8)])))
+    worker.start()
+    assert entered.wait(5)
+    service.swap_models(new)
+    release.set()
+    worker.join(5)
+    assert result[0]["label"] == "pothole"
+
+class SwappingService:
+    """Stub service whose model version changes while an image is classified, if asked to."""
+    def __init__(self, swap: bool):
+        self.model_version = "v1"
+        self.swap = swap
+
+    def predict_image(self, image):
+        if self.swap:
+            self.model_version = "v2"
+        return {"label": "garbage", "confidence": 0.9, "probabilities": {"garbage": 0.9},
+                "top_k": [{"label": "garbage", "confidence": 0.9}]}
+
+@pytest.mark.parametrize("swap, cached", [(False, True), (True, False)])
+def test_result_is_not_cached_across_a_swap(session_factory, tmp_path, monkeypatch, swap, cached):
+    cache = ResultCache(session_factory=session_factory, purge_interval=3600)
+    service = SwappingService(swap)
+    monkeypatch.setattr(analysis_service, "get_result_cache", lambda: cache)
+    monkeypatch.setattr(analysis_service, "get_ai_service", lambda: service)
+    monkeypatch.setattr(analysis_service, "UPLOADS_DIR", tmp_path)
+    content = cv2.imencode(".jpg", np.full((48, 64, 3), 90, dtype=np.uint8))[1].tobytes()
+
+    response = asyncio.run(analysis_service.analyze_content(content, "photo.jpg"))
+    assert response["model_version"] == "v1"
+    assert response["category"] == "garbage"
+    key = analysis_service.cache_version("v1")
+    assert (cache.get(content_hash(content), key) is not None) == cached
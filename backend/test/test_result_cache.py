@@ -0,0 +1,106 @@
+"""
+Unit tests for the two-tier analysis result cache (app/services/result_cache.py).
+
+Each test uses its own in-memory SQLite database; the app database is never touched.
+
+Run from backend/:
+    python -m pytest test/test_result_cache.py -q
+"""
+from datetime import datetime, timedelta, timezone
+
+from app.models.inference_model import InferenceCacheEntry
+from app.services import metrics
+from app.services.result_cache import ResultCache, content_hash
+
+
+def _cache(session_factory, **kwargs):
+    kwargs.setdefault("max_items", 2)
+    kwargs.setdefault("max_age_days", 0)
+    kwargs.setdefault("max_rows", 0)
+    kwargs.setdefault("purge_interval", 3600)
+    return ResultCache(session_factory=session_factory, **kwargs)
+
+def _add_row(session_factory, digest, version, created_at):
+    db = session_factory()
+    db.add(InferenceCacheEntry(content_hash=digest, model_version=version, category="pothole",
+                               severity="low", created_at=created_at))
+    db.commit()
+    db.close()
+
+def _row_count(session_factory):
+    db = session_factory()
+    try:
+        return db.query(InferenceCacheEntry).count()
+    finally:
+        db.close()
+
+
+def test_content_hash_is_sha256():
+    assert content_hash(b"") == "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
+
+def test_put_then_get_hits_memory(session_factory):
+    metrics.reset()
+    cache = _cache(session_factory)
+    cache.put("a", "v1", "pothole", "high", details={"confidence": 0.9})
+    assert cache.get("a", "v1") == {"category": "pothole", "severity": "high",
+                                    "annotated_path": None, "details": {"confidence": 0.9}}
+    assert metrics.get_counter("inference_cache.hit.memory") == 1
+
+def test_model_version_is_part_of_the_key(session_factory):
+    cache = _cache(session_factory)
+    cache.put("a", "v1", "pothole", "high")
+    assert cache.get("a", "v2") is None
+
+def test_lru_evicts_oldest_and_falls_back_to_sqlite(session_factory):
+    metrics.reset()
+    cache = _cache(session_factory, max_items=2)
+    cache.put("a", "v1", "pothole", "high")
+    cache.put("b", "v1", "streetlight", "N/A")
+    cache.get("a", "v1")  # "a" becomes most recently used
+    cache.put("c", "v1", "garbage", "N/A")
+    assert list(cache._lru) == [("a", "v1"), ("c", "v1")]
+
+    assert cache.get("b", "v1")["category"] == "streetlight"
+    assert metrics.get_counter("inference_cache.hit.sqlite") == 1
+    # The SQLite hit is promoted back into memory
+    assert ("b", "v1") in cache._lru
+
+def test_results_survive_a_new_cache_instance(session_factory):
+    _cache(session_factory).put("a", "v1", "pothole", "medium", annotated_path="static/x.jpg")
+    assert _cache(session_factory).get("a", "v1")["annotated_path"] == "static/x.jpg"
+
+def test_invalidate_removes_both_tiers(session_factory):
+    cache = _cache(session_factory)
+    cache.put("a", "v1", "pothole", "high")
+    cache.invalidate("a", "v1")
+    assert cache.get("a", "v1") is None
+    assert _row_count(session_factory) == 0
+
+def test_purge_by_age(session_factory):
+    now = datetime.now(timezone.utc)
+    _add_row(session_factory, "old", "v1", now - timedelta(days=40))
+    _add_row(session_factory, "new", "v1", now - timedelta(days=1))
+    cache = _cache(session_factory, max_age_days=30)
+    assert cache.purge() == 1
+    assert cache.get("old", "v1") is None
+    assert cache.get("new", "v1") is not None
+
+def test_purge_by_row_cap_keeps_newest_of_any_version(session_factory):
+    now = datetime.now(timezone.utc)
+    for i, version in enumerate(["v1", "v2", "v1", "v2"]):
+        _add_row(session_factory, f"img{i}", version, now - timedelta(hours=10 - i))
+    cache = _cache(session_factory, max_rows=2)
+    assert cache.purge() == 2
+    assert cache.get("img0", "v1") is None
+    assert cache.get("img1", "v2") is None
+    assert cache.get("img2", "v1") is not None
+    assert cache.get("img3", "v2") is not None
+
+def test_put_purges_at_most_once_per_interval(session_factory):
+    cache = _cache(session_factory, max_items=0, max_rows=1, purge_interval=3600)
+    cache.put("a", "v1", "pothole", "high")
+    cache.put("b", "v1", "pothole", "high")
+    assert _row_count(session_factory) == 2
+    cache._last_purge = None
+    cache.put("c", "v1", "pothole", "high")
+    assert _row_count(session_factory) == 1
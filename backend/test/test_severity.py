@@ -0,0 +1,97 @@
+"""
+Unit tests for detector box post-processing in AIService: the vectorized
+severity grading must agree with the per-box classify_severity rules.
+
+Uses fake YOLO results, so no model weights are needed.
+
+Run from backend/:
+    python -m pytest test/test_severity.py -q
+"""
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+np = pytest.importorskip("numpy")
+
+from app.services.ai_service import AIService, SEVERITY_TIERS
+
+
+class _Boxes:
+    """Stand-in for ultralytics Boxes: xyxy and conf tensors, len() = number of boxes."""
+    def __init__(self, xyxy, conf):
+        self.xyxy = torch.tensor(xyxy, dtype=torch.float32).reshape(-1, 4)
+        self.conf = torch.tensor(conf, dtype=torch.float32)
+
+    def __len__(self):
+        return len(self.conf)
+
+def _result(xyxy, conf):
+    return SimpleNamespace(boxes=_Boxes(xyxy, conf))
+
+
+def test_severity_tiers_match_classify_severity_on_random_boxes():
+    rng = np.random.default_rng(0)
+    height = 960
+    xs = np.sort(rng.integers(0, 1280, size=(2000, 2)), axis=1)
+    ys = np.sort(rng.integers(0, height, size=(2000, 2)), axis=1)
+    xyxy = np.stack([xs[:, 0], ys[:, 0], xs[:, 1], ys[:, 1]], axis=1)
+
+    tiers = AIService.severity_tiers(xyxy, height)
+    expected = [AIService.classify_severity(tuple(box), height) for box in xyxy.tolist()]
+    assert [SEVERITY_TIERS[t] for t in tiers] == expected
+
+@pytest.mark.parametrize("box, expected", [
+    ((0, 0, 250, 200), "Medium"),     # area 50000 is not above the High area threshold
+    ((0, 0, 250, 201), "High"),
+    ((0, 0, 100, 200), "Low"),        # area 20000 is not above the Medium threshold
+    ((0, 0, 101, 200), "Medium"),
+    ((0, 0, 10, 500), "Low"),         # bottom exactly at half height
+    ((0, 0, 10, 501), "Medium"),
+    ((0, 740, 10, 750), "Medium"),    # bottom exactly at three quarters
+    ((0, 741, 10, 751), "High"),
+])
+def test_threshold_boundaries(box, expected):
+    height = 1000
+    assert AIService.classify_severity(box, height) == expected
+    assert SEVERITY_TIERS[AIService.severity_tiers(np.array([box]), height)[0]] == expected
+
+def test_grade_boxes_truncates_and_rounds():
+    boxes = AIService.grade_boxes(np.array([[10.9, 20.2, 30.7, 40.99]]), np.array([0.123456]), image_height=1000)
+    assert boxes == [{"box": [10, 20, 30, 40], "confidence": 0.1235, "severity": "Low"}]
+
+def test_grade_boxes_grades_in_original_coordinates():
+    # 100x100 in a 2x downscaled frame is 200x200 = 40000 px in the original: Medium, not Low
+    xyxy, conf = np.array([[0.0, 0.0, 100.0, 100.0]]), np.array([0.9])
+    assert AIService.grade_boxes(xyxy, conf, image_height=1000)[0]["severity"] == "Low"
+    scaled = AIService.grade_boxes(xyxy, conf, image_height=1000, scale=2.0)
+    assert scaled[0]["box"] == [0, 0, 200, 200]
+    assert scaled[0]["severity"] == "Medium"
+
+def test_grade_boxes_empty():
+    assert AIService.grade_boxes(np.zeros((0, 4)), np.zeros((0,)), 1000) == []
+
+def test_boxes_from_results_matches_per_box_loop():
+    results = [
+        _result([[10, 10, 50, 50], [0, 600, 400, 900]], [0.9, 0.5]),
+        _result([], []),
+        _result([[100, 100, 400, 300]], [0.7]),
+    ]
+    height = 1000
+    boxes = AIService.boxes_from_results(results, height)
+    expected = []
+    for r in results:
+        for box in r.boxes.xyxy.tolist():
+            box = tuple(int(v) for v in box)
+            expected.append((list(box), AIService.classify_severity(box, height)))
+    assert [(b["box"], b["severity"]) for b in boxes] == expected
+    assert AIService.overall_severity(boxes) == "High"
+
+def test_raw_boxes_applies_tile_offset():
+    xyxy, conf = AIService._raw_boxes([_result([[1, 2, 3, 4]], [0.5])], offset=(640, 320))
+    assert xyxy.tolist() == [[641, 322, 643, 324]]
+    assert conf.tolist() == [0.5]
+
+def test_overall_severity():
+    assert AIService.overall_severity([]) == "Unknown"
+    assert AIService.overall_severity([{"severity": "Low"}, {"severity": "Medium"}]) == "Medium"
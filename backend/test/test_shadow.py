@@ -0,0 +1,102 @@
+"""
+Tests for shadow evaluation (app/services/shadow.py): recording candidate
+vs. serving predictions and the per-candidate summary behind /admin/shadow.
+
+Run from backend/:
+    python -m pytest test/test_shadow.py -q
+"""
+import time
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from app.models.inference_model import ShadowResult
+from app.services import metrics, shadow
+from app.services.shadow import ShadowEvaluator, summarize
+
+
+def _add(db, candidate, primary_label, candidate_label, primary_ms=10.0, candidate_ms=20.0):
+    db.add(ShadowResult(candidate_version=candidate, primary_version="v1", primary_label=primary_label,
+                        candidate_label=candidate_label, agree=primary_label == candidate_label,
+                        primary_confidence=0.9, candidate_confidence=0.8,
+                        primary_ms=primary_ms, candidate_ms=candidate_ms))
+
+def _candidate(index):
+    class Fixed(torch.nn.Module):
+        def forward(self, x):
+            logits = torch.zeros((x.shape[0], 2))
+            logits[:, index] = 5.0
+            return logits
+    return SimpleNamespace(model_version="v2", class_model=Fixed(), class_names=["pothole", "other"],
+                           device=torch.device("cpu"), temperature=1.0)
+
+def _drain(evaluator):
+    deadline = time.monotonic() + 5
+    while evaluator._pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_summary_agreement_confusion_and_latency(session_factory):
+    db = session_factory()
+    for _ in range(3):
+        _add(db, "v2", "pothole", "pothole")
+    _add(db, "v2", "pothole", "garbage", primary_ms=None, candidate_ms=None)
+    _add(db, "v2", "garbage", "garbage")
+    _add(db, "v3", "pothole", "garbage")
+    db.commit()
+
+    summaries = summarize(db)
+    assert [s["candidate_version"] for s in summaries] == ["v2", "v3"]
+    v2 = summaries[0]
+    assert v2["samples"] == 5
+    assert v2["agreement_rate"] == 0.8
+    assert v2["per_class_agreement"] == {"garbage": 1.0, "pothole": 0.75}
+    assert v2["confusion"] == {"garbage": {"garbage": 1}, "pothole": {"pothole": 3, "garbage": 1}}
+    assert v2["latency_ms"]["primary"] == {"p50": 10.0, "p95": 10.0, "p99": 10.0}
+    assert v2["latency_ms"]["candidate"]["p50"] == 20.0
+
+    assert [s["candidate_version"] for s in summarize(db, "v3")] == ["v3"]
+    assert summarize(db, "missing") == []
+    db.close()
+
+def test_summary_without_latencies(session_factory):
+    db = session_factory()
+    _add(db, "v2", "pothole", "pothole", primary_ms=None, candidate_ms=None)
+    db.commit()
+    assert summarize(db)[0]["latency_ms"] == {"primary": None, "candidate": None}
+    db.close()
+
+def test_evaluator_records_agreement(session_factory):
+    metrics.reset()
+    evaluator = ShadowEvaluator(_candidate(1), sample_rate=1.0, session_factory=session_factory)
+    primary = {"label": "pothole", "confidence": 0.9}
+    evaluator.maybe_submit(torch.zeros(3, 8, 8), primary, "v1", primary_ms=12.0)
+    evaluator.maybe_submit(torch.zeros(3, 8, 8), {"label": "other", "confidence": 0.7}, "v1", primary_ms=12.0)
+    _drain(evaluator)
+    evaluator.close()
+
+    db = session_factory()
+    rows = db.query(ShadowResult).order_by(ShadowResult.id).all()
+    assert [(r.primary_label, r.candidate_label, r.agree) for r in rows] == [
+        ("pothole", "other", False), ("other", "other", True)]
+    assert rows[0].candidate_version == "v2" and rows[0].primary_version == "v1"
+    assert metrics.get_counter("shadow.evaluated") == 2
+    db.close()
+
+def test_evaluator_samples_and_drops_instead_of_queueing(session_factory):
+    metrics.reset()
+    unsampled = ShadowEvaluator(_candidate(0), sample_rate=0.0, session_factory=session_factory)
+    unsampled.maybe_submit(torch.zeros(3, 8, 8), {"label": "pothole", "confidence": 0.9}, "v1", 1.0)
+    assert unsampled._pending == 0
+    unsampled.close()
+
+    full = ShadowEvaluator(_candidate(0), sample_rate=1.0, max_pending=0, session_factory=session_factory)
+    full.maybe_submit(torch.zeros(3, 8, 8), {"label": "pothole", "confidence": 0.9}, "v1", 1.0)
+    assert metrics.get_counter("shadow.dropped") == 1
+    full.close()
+
+def test_shadowing_is_off_without_a_candidate(monkeypatch):
+    monkeypatch.setattr(shadow, "SHADOW_VERSION", None)
+    assert shadow.create_shadow_evaluator() is None
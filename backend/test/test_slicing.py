@@ -0,0 +1,115 @@
+"""
+Unit tests for sliced detection: tile windows and the slicing policy
+(app/services/slicing.py), and the tile-offset / NMS merge in
+AIService._detect_sliced with a fake detector.
+
+Run from backend/:
+    python -m pytest test/test_slicing.py -q
+"""
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+np = pytest.importorskip("numpy")
+
+from app.services import slicing
+from app.services.ai_service import AIService
+
+
+class _Boxes:
+    def __init__(self, xyxy, conf):
+        self.xyxy = torch.tensor(xyxy, dtype=torch.float32).reshape(-1, 4)
+        self.conf = torch.tensor(conf, dtype=torch.float32)
+
+    def __len__(self):
+        return len(self.conf)
+
+class FakeDetector:
+    """
+    Finds one "pothole" per input wherever a white square is drawn, in the
+    input's own coordinates, like YOLO does for a tile. Records call sizes.
+    """
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, inputs, verbose=False):
+        self.calls.append([image.shape for image in inputs])
+        results = []
+        for image in inputs:
+            ys, xs = np.nonzero(image[:, :, 0] == 255)
+            if len(xs):
+                box = [[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]]
+                results.append(SimpleNamespace(boxes=_Boxes(box, [0.8])))
+            else:
+                results.append(SimpleNamespace(boxes=_Boxes([], [])))
+        return results
+
+def _service(detector):
+    models = SimpleNamespace(detection_model=detector, model_version="test")
+    return AIService(models, batch_max_size=1)
+
+
+@pytest.mark.parametrize("width, height", [(640, 640), (1000, 700), (1920, 1080), (4000, 3000), (300, 2000)])
+def test_windows_cover_the_image_within_bounds(width, height):
+    windows = slicing.tile_windows(width, height, tile=640, overlap=0.2)
+    covered = np.zeros((height, width), dtype=bool)
+    for x1, y1, x2, y2 in windows:
+        assert 0 <= x1 < x2 <= width and 0 <= y1 < y2 <= height
+        assert x2 - x1 == min(640, width) and y2 - y1 == min(640, height)
+        covered[y1:y2, x1:x2] = True
+    assert covered.all()
+
+def test_windows_overlap_and_end_flush_with_the_edge():
+    windows = slicing.tile_windows(1500, 640, tile=640, overlap=0.25)
+    assert [w[0] for w in windows] == [0, 480, 860]
+    assert windows[-1][2] == 1500
+    assert slicing.tile_windows(500, 400, tile=640) == [(0, 0, 500, 400)]
+
+def test_should_slice_modes(monkeypatch):
+    monkeypatch.setattr(slicing, "SLICE_TILE", 640)
+    monkeypatch.setattr(slicing, "SLICE_MIN_SIDE", 1920)
+    monkeypatch.setattr(slicing, "SLICE_MODE", "off")
+    assert not slicing.should_slice(4000, 3000)
+    monkeypatch.setattr(slicing, "SLICE_MODE", "auto")
+    assert slicing.should_slice(1920, 1080)
+    assert not slicing.should_slice(1280, 960)
+    monkeypatch.setattr(slicing, "SLICE_MODE", "always")
+    assert slicing.should_slice(1280, 960)
+    assert not slicing.should_slice(640, 480)
+
+def test_detector_decode_only_when_ingest_dropped_detail(monkeypatch):
+    monkeypatch.setattr(slicing, "SLICE_MODE", "auto")
+    monkeypatch.setattr(slicing, "SLICE_MIN_SIDE", 1920)
+    assert slicing.needs_detector_decode((4000, 3000), (1280, 960))
+    assert not slicing.needs_detector_decode((1600, 1200), (1280, 960))   # below SLICE_MIN_SIDE
+    assert not slicing.needs_detector_decode((4000, 3000), (4000, 3000))  # ingest kept full size
+
+def test_sliced_detection_maps_tile_boxes_back_and_merges_duplicates(monkeypatch):
+    monkeypatch.setattr(slicing, "SLICE_TILE", 640)
+    monkeypatch.setattr(slicing, "SLICE_OVERLAP", 0.2)
+    monkeypatch.setattr(slicing, "SLICE_BATCH", 4)
+    image = np.zeros((1200, 2000, 3), dtype=np.uint8)
+    image[700:740, 1300:1360] = 255  # lies in the overlap of several tiles
+    detector = FakeDetector()
+
+    boxes = _service(detector)._detect_sliced(image, scale=1.0)
+
+    # Every tile and the whole frame saw it; NMS keeps one box in image coordinates
+    assert boxes == [{"box": [1300, 700, 1360, 740], "confidence": 0.8, "severity": "Medium"}]
+    windows = slicing.tile_windows(2000, 1200)
+    assert sum(len(call) for call in detector.calls) == 1 + len(windows)
+    assert all(len(call) <= 4 for call in detector.calls)
+    assert detector.calls[0][0] == image.shape
+
+def test_sliced_detection_scales_boxes_to_the_original(monkeypatch):
+    monkeypatch.setattr(slicing, "SLICE_BATCH", 8)
+    image = np.zeros((1000, 2000, 3), dtype=np.uint8)
+    image[100:110, 100:120] = 255
+    boxes = _service(FakeDetector())._detect_sliced(image, scale=2.0)
+    assert [b["box"] for b in boxes] == [[200, 200, 240, 220]]
+
+def test_sliced_detection_without_boxes(monkeypatch):
+    monkeypatch.setattr(slicing, "SLICE_BATCH", 8)
+    image = np.zeros((1000, 2000, 3), dtype=np.uint8)
+    assert _service(FakeDetector())._detect_sliced(image, scale=1.0) == []
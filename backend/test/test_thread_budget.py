@@ -0,0 +1,59 @@
+"""
+Unit tests for the thread budget (app/services/thread_budget.py): splitting
+cores between server workers and finding out how many workers there are.
+
+Run from backend/:
+    python -m pytest test/test_thread_budget.py -q
+"""
+import logging
+import multiprocessing
+
+import pytest
+
+from app.services import thread_budget
+from app.services.thread_budget import _cli_workers, compute_budget
+
+
+@pytest.fixture(autouse=True)
+def no_overrides(monkeypatch):
+    for name in ("TORCH_THREADS", "TORCH_INTEROP_THREADS", "CV2_THREADS"):
+        monkeypatch.setattr(thread_budget, name, None)
+
+
+@pytest.mark.parametrize("argv, expected", [
+    (["main:app", "--workers", "4"], 4),
+    (["main:app", "--host", "0.0.0.0", "--workers=3"], 3),
+    (["main:app", "--reload"], None),
+    (["main:app", "--workers"], None),
+    (["main:app", "--workers", "many"], None),
+])
+def test_cli_workers(argv, expected):
+    assert _cli_workers(argv) == expected
+
+@pytest.mark.parametrize("cores, processes, torch_threads", [(8, 1, 8), (8, 4, 2), (8, 3, 2), (2, 4, 1)])
+def test_cores_are_split_between_processes(cores, processes, torch_threads):
+    budget = compute_budget(processes=processes, cores=cores)
+    assert (budget.cores, budget.processes, budget.torch_threads) == (cores, processes, torch_threads)
+    assert budget.torch_interop_threads == 1
+    assert budget.cv2_threads == 1
+
+def test_detected_server_workers_are_the_default(monkeypatch):
+    monkeypatch.setattr(thread_budget, "DETECTED_SERVER_WORKERS", 4)
+    monkeypatch.setattr(thread_budget, "SERVER_WORKERS", 4)
+    assert compute_budget(cores=8).torch_threads == 2
+
+def test_unknown_worker_count_in_a_child_process_warns(monkeypatch, caplog):
+    monkeypatch.setattr(thread_budget, "DETECTED_SERVER_WORKERS", None)
+    monkeypatch.setattr(thread_budget, "SERVER_WORKERS", 1)
+    monkeypatch.setattr(multiprocessing, "parent_process", lambda: object())
+    with caplog.at_level(logging.WARNING, logger=thread_budget.__name__):
+        assert compute_budget(cores=8).torch_threads == 8
+        compute_budget(processes=2, cores=8)   # explicit counts are trusted
+    assert len([r for r in caplog.records if "FIXMATE_SERVER_WORKERS" in r.getMessage()]) == 1
+
+def test_single_process_without_workers_does_not_warn(monkeypatch, caplog):
+    monkeypatch.setattr(thread_budget, "DETECTED_SERVER_WORKERS", None)
+    monkeypatch.setattr(multiprocessing, "parent_process", lambda: None)
+    with caplog.at_level(logging.WARNING, logger=thread_budget.__name__):
+        compute_budget(cores=8)
+    assert not caplog.records